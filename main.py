@@ -1,14 +1,13 @@
 import os
 import sys
 import json
-import urllib3
 import logging
 from logging import Logger
 from typing import Any
 
 CONFIG_FILE: str = "config.json"
 CURRENT_DIR: str = os.path.dirname(os.path.abspath(__file__))
-DEFAULT_CLIENT: urllib3.PoolManager = urllib3.PoolManager()
+CONNECTIONS: int = 8  # Maximum number of requests in flight per host
 
 logging.basicConfig(level=logging.INFO)
 LOG: Logger = logging.getLogger("main")
@@ -18,8 +17,11 @@ if scripts not in sys.path:
     sys.path.insert(0, scripts)
     LOG.debug(f"Added scripts directory to path: {scripts}")
 
-from search import search
+from network import METRICS, Cache, Client, profile
+from search import search, paginate, Planner
 from curate import curate
+from curate.output import Writer
+from curate.shard import shard, work, LEASE
 
 def setup(config: str) -> dict[str, Any]:
     """
@@ -30,7 +32,10 @@ def setup(config: str) -> dict[str, Any]:
         config (str): Path to the JSON configuration file.
 
     Returns:
-        dict[str, Any]: A dictionary with parsed 'search' and 'data' sections.
+        dict[str, Any]: A dictionary with parsed 'search' and 'data' sections, the output
+            directory, the response cache (None if disabled), the client settings, the
+            profiler to run search and curation under (None if disabled) and the sharding
+            settings (None to curate in this process).
     """
     if not os.path.exists(config):
         raise FileNotFoundError(f"Config file '{config}' not found.")
@@ -51,6 +56,13 @@ def setup(config: str) -> dict[str, Any]:
         settings["data"]["tm"] = os.path.join(CURRENT_DIR, settings["data"]["tm"])
         os.makedirs(settings["data"]["tm"], exist_ok=True)
         LOG.debug(f"Ensured TM directory exists: {settings['data']['tm']}")
+    if settings.get("data", {}).get("mirror"):
+        settings["data"]["mirror"] = os.path.join(CURRENT_DIR, settings["data"]["mirror"])
+        LOG.debug(f"Using local PDB mirror: {settings['data']['mirror']}")
+    if "state" in settings.get("data", {}):
+        settings["data"]["state"] = os.path.join(CURRENT_DIR, settings["data"]["state"])
+        os.makedirs(os.path.dirname(settings["data"]["state"]), exist_ok=True)
+        LOG.debug(f"Using curation state store: {settings['data']['state']}")
 
     # Load external query file if specified
     query = settings.get("data", {}).get("rcsb", None)
@@ -62,10 +74,20 @@ def setup(config: str) -> dict[str, Any]:
             settings["data"]["rcsb"] = file.read()
             LOG.info(f"Loaded RCSB query from file: {query}")
 
+    # Open the response cache below the output directory
+    cache = None
+    if "cache" in settings:
+        cache = Cache(os.path.join(outdir, "cache/"), **settings["cache"])
+        LOG.debug(f"Opened response cache: {cache.path}")
+
     return {
         "search": settings.get("search", {}),
         "data": settings.get("data", {}),
         "output": outdir,
+        "cache": cache,
+        "client": settings.get("client", {}),
+        "profile": settings.get("profile", None),
+        "shards": settings.get("shards", None),
     }
 
 
@@ -74,19 +96,68 @@ if __name__ == "__main__":
         LOG.info("Setting up...")
         config = setup(os.path.join(CURRENT_DIR, CONFIG_FILE))
 
-        LOG.info("Running search...")
-        result = search(client=DEFAULT_CLIENT, config=config["search"])
-        LOG.info(f"Search returned {len(result)} entries.")
+        # Client settings for shard worker processes, which open their own client
+        settings = dict(config["client"])
+        if config["cache"] is not None:
+            settings["cache"] = {
+                "directory": os.path.dirname(config["cache"].path),
+                "size": config["cache"].size,
+                "ttl": config["cache"].ttl,
+            }
+        shards = os.path.join(config["output"], "shards/")
+
+        if "--worker" in sys.argv:
+            # Joins the shards of a curation coordinated from another host
+            LOG.info("Joining sharded curation...")
+            lease = (config["shards"] or {}).get("lease", LEASE)
+            work(shards, config["data"], settings, lease=lease)
+            sys.exit(0)
+
+        client = Client(
+            cache=config["cache"],
+            maxsize=config["client"].pop("connections", CONNECTIONS),
+            block=True,
+            **config["client"],
+        )
+
+        if config["search"].get("rows"):
+            # Results are streamed into curation page by page
+            LOG.info("Running paginated search...")
+            result = paginate(client=client, config=config["search"])
+        else:
+            LOG.info("Running search...")
+            planner = None
+            if config["search"].get("planner"):
+                planner = Planner(client, os.path.join(config["output"], "planner/"))
+            with METRICS.stage("search"), profile("search", config["output"], config["profile"]):
+                result = search(client=client, config=config["search"], planner=planner)
+            LOG.info(f"Search returned {len(result)} entries.")
 
         LOG.info("Curating data...")
-        curated = curate(client=DEFAULT_CLIENT, entries=result, options=config["data"])
+        with (
+            Writer(config["output"]) as writer,
+            METRICS.stage("curate"),
+            profile("curate", config["output"], config["profile"]),
+        ):
+            if config["shards"] is not None:
+                curated = shard(
+                    entries=result,
+                    options=config["data"],
+                    settings=settings,
+                    directory=shards,
+                    writer=writer,
+                    **config["shards"],
+                )
+            else:
+                curated = curate(
+                    client=client, entries=result, options=config["data"], writer=writer
+                )
         LOG.info(f"Curation complete. Final count: {len(curated['entries'])} entries.")
 
-        # Save curated data to output directory
-        output_file = os.path.join(config["output"], "data.json")
-        with open(output_file, "w", encoding="utf-8") as file:
-            json.dump(curated, file, indent=2)
- 
     except Exception:
         LOG.exception("Pipeline failed.")
         sys.exit(1)
+
+    finally:
+        if "config" in locals():
+            METRICS.save(config["output"])
@@ -0,0 +1,2 @@
+from .server import Server, patch
+from .suite import suite, compare
@@ -0,0 +1,552 @@
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+import importlib
+from collections import Counter
+from contextlib import AbstractContextManager, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import Logger
+from typing import Any, Iterator
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from network import Bucket
+
+try:
+    import msgpack
+except ImportError:  # BinaryCIF responses are optional, as in curate.storage
+    msgpack = None
+
+
+LOG: Logger = logging.getLogger(__name__)
+FIXTURES: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures/")
+# Modules and their endpoint constants served by the stand-in (dicts are rebound per key)
+MODULES: dict[str, str] = {
+    "search.request": "ENDPOINT",
+    "curate.rcsb": "ENDPOINT",
+    "curate.pdbe": "ENDPOINTS",
+    "curate.structure": "ENDPOINTS",
+    "curate.opm": "ENDPOINT",
+    "curate.pdbtm": "ENDPOINT",
+    "curate.memprotmd": "ENDPOINT",
+    "curate.alphafold": "ENDPOINT",
+    "curate.uniprot": "ENDPOINT",
+}
+# Route patterns on "host/path", matched in order, and the fixture they serve
+ROUTES: list[tuple[str, re.Pattern, str]] = [
+    ("POST", re.compile(r"search\.rcsb\.org/rcsbsearch/v2/query"), "search"),
+    ("POST", re.compile(r"data\.rcsb\.org/graphql"), "rcsb"),
+    ("*", re.compile(r"www\.ebi\.ac\.uk/pdbe/api/pdb/entry/(\w+)/(\w*)"), "pdbe"),
+    ("GET", re.compile(r"files\.rcsb\.org/download/(\w+)\.cif(\.gz)?"), "structure.cif"),
+    ("GET", re.compile(r"models\.rcsb\.org/(\w+)\.bcif"), "structure.bcif"),
+    ("GET", re.compile(r"opm-back\.cc\.lehigh\.edu/opm-backend/primary_structures/pdbid/(\w+)"), "opm.json"),
+    ("GET", re.compile(r"biomembhub\.org/shared/opm-assets/pdb/(\w+)\.pdb(\.gz)?"), "structure.pdb"),
+    ("GET", re.compile(r"pdbtm\.unitmp\.org/api/v1/entry/(\w+)\.json"), "pdbtm.json"),
+    ("GET", re.compile(r"pdbtm\.unitmp\.org/api/v1/entry/(\w+)\.trpdb(\.gz)?"), "structure.pdb"),
+    ("POST", re.compile(r"memprotmd\.bioch\.ox\.ac\.uk/api/references/PDB/(\w+)"), "memprotmd.json"),
+    ("GET", re.compile(r"memprotmd\.bioch\.ox\.ac\.uk/data/memprotmd/simulations/(\w{4})\w*/files/structures/at\.pdb(\.gz)?"), "structure.pdb"),
+    ("GET", re.compile(r"alphafold\.ebi\.ac\.uk/api/prediction/(\w+)"), "alphafold.json"),
+    ("*", re.compile(r"sparql\.uniprot\.org/sparql"), "sparql"),
+]
+HOSTS: tuple[str, ...] = tuple(
+    dict.fromkeys(pattern.pattern.split("/", 1)[0].replace("\\", "") for _, pattern, _ in ROUTES)
+)
+# Hosts of the optional sources, by source, that may lack an entry
+SOURCES: dict[str, str] = {
+    "pdbtm.unitmp.org": "pdbtm",
+    "opm-back.cc.lehigh.edu": "opm",
+    "biomembhub.org": "opm",
+    "memprotmd.bioch.ox.ac.uk": "memprotmd",
+    "alphafold.ebi.ac.uk": "alphafold",
+}
+
+
+def identifiers(count: int) -> list[str]:
+    """
+    Generates distinct, valid looking PDB entry IDs (a digit and three alphanumerics).
+
+    Args:
+        count (int): Number of IDs.
+
+    Returns:
+        list[str]: Upper-case entry IDs.
+    """
+    symbols = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    result = []
+    for i in range(count):
+        digit, rest = divmod(i, 36**3)
+        result.append(
+            f"{digit % 9 + 1}{symbols[rest // 1296]}{symbols[rest // 36 % 36]}{symbols[rest % 36]}"
+        )
+    return result
+
+
+@contextmanager
+def patch(urls: dict[str, str]) -> Iterator[None]:
+    """
+    Points the endpoint constants of the pipeline modules at a stand-in server while active.
+
+    Args:
+        urls (dict[str, str]): Base URL of the stand-in per upstream host, see `Server.urls`.
+    """
+    saved: list[tuple[Any, str, Any]] = []
+
+    def local(url: str) -> str:
+        host = re.sub(r"^https?://", "", url).split("/", 1)[0]
+        return re.sub(r"^https?://", f"{urls[host]}/", url) if host in urls else url
+
+    for name, constant in MODULES.items():
+        try:
+            module = importlib.import_module(name)
+        except ImportError as e:
+            LOG.debug(f"Not patching {name}: {e}")
+            continue
+        value = getattr(module, constant)
+        saved.append((module, constant, value))
+        if isinstance(value, dict):
+            setattr(module, constant, {key: local(url) for key, url in value.items()})
+        else:
+            setattr(module, constant, local(value))
+
+    try:
+        yield
+    finally:
+        for module, constant, value in saved:
+            setattr(module, constant, value)
+
+
+def binary(text: str) -> bytes:
+    """
+    Encodes an mmCIF text of whitespace separated values, as the fixtures hold, as
+    BinaryCIF. Integer and float columns are stored as byte arrays, others as string arrays.
+
+    Args:
+        text (str): mmCIF file content.
+
+    Returns:
+        bytes: BinaryCIF file content.
+    """
+    if msgpack is None:
+        raise ImportError("msgpack is required to serve BinaryCIF files")
+
+    header, categories = "", dict()
+    lines = iter(text.splitlines())
+    for line in lines:
+        line = line.strip()
+        if line.startswith("data_"):
+            header = line[5:]
+        elif line.startswith("_"):
+            name, value = line.split(None, 1)
+            category, column = name.split(".", 1)
+            categories.setdefault(category, dict())[column] = [value.strip()]
+        elif line == "loop_":
+            names, rows = [], []
+            for line in lines:
+                line = line.strip()
+                if line.startswith("_"):
+                    names.append(line)
+                elif not line or line.startswith("#"):
+                    break
+                else:
+                    rows.append(line.split())
+            category = names[0].split(".", 1)[0]
+            categories[category] = {
+                name.split(".", 1)[1]: [row[i] for row in rows] for i, name in enumerate(names)
+            }
+
+    def encode(values: list[str]) -> dict[str, Any]:
+        if all(value.lstrip("-").isdigit() for value in values):
+            return {
+                "data": np.asarray(values, "<i4").tobytes(),
+                "encoding": [{"kind": "ByteArray", "type": 3}],
+            }
+        try:
+            return {
+                "data": np.asarray(values, "<f8").tobytes(),
+                "encoding": [{"kind": "ByteArray", "type": 33}],
+            }
+        except ValueError:
+            pass
+        strings = list(dict.fromkeys(values))
+        offsets = np.cumsum([0] + [len(value) for value in strings]).astype("<i4")
+        return {
+            "data": np.asarray([strings.index(value) for value in values], "<i4").tobytes(),
+            "encoding": [
+                {
+                    "kind": "StringArray",
+                    "dataEncoding": [{"kind": "ByteArray", "type": 3}],
+                    "stringData": "".join(strings),
+                    "offsetEncoding": [{"kind": "ByteArray", "type": 3}],
+                    "offsets": offsets.tobytes(),
+                }
+            ],
+        }
+
+    block = {
+        "header": header,
+        "categories": [
+            {
+                "name": category,
+                "rowCount": len(next(iter(columns.values()))),
+                "columns": [
+                    {"name": name, "data": encode(values), "mask": None}
+                    for name, values in columns.items()
+                ],
+            }
+            for category, columns in categories.items()
+        ],
+    }
+    return msgpack.packb({"version": "0.3.0", "encoder": "stand-in", "dataBlocks": [block]})
+
+
+class Server:
+    """
+    Local stand-in for the RCSB, PDBe, OPM, PDBTM, MemProtMD, AlphaFold and UniProt APIs,
+    serving recorded fixtures for any entry ID, for offline benchmarks.
+
+    Every upstream URL is served below `http://127.0.0.1:<port>/<host>/<path>`, with one
+    port per host, and `patch` rebinds the endpoint constants of the pipeline modules
+    accordingly. A fixture file `fixtures/<name>` is a template in which `$entry`/`$ENTRY`
+    are replaced by the requested ID; a recording of a particular entry in
+    `fixtures/<entry>/<name>` takes precedence. BinaryCIF structures are encoded from the
+    mmCIF fixture (`binary`).
+
+    Latency, errors and throttling are configurable: every response is delayed, a fraction
+    of requests fails with 503, requests above the rate limit of a host are answered with
+    429 and a Retry-After header, and a fraction of entries is unknown (404) to each source.
+    """
+
+    def __init__(
+        self,
+        entries: int = 100,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error: float = 0.0,
+        limit: float | None = None,
+        missing: float = 0.0,
+        fixtures: str = FIXTURES,
+        seed: int = 0,
+    ) -> None:
+        """
+        Args:
+            entries (int): Number of entries the search returns.
+            latency (float): Delay of every response in seconds.
+            jitter (float): Maximum random delay added to the latency in seconds.
+            error (float): Fraction of requests failing with 503.
+            limit (float | None): Requests per second per host before answering 429.
+            missing (float): Fraction of entries each membrane and AlphaFold source lacks.
+            fixtures (str): Fixture directory.
+            seed (int): Seed of the random errors and delays.
+        """
+        self.entries = identifiers(entries)
+        self.latency = latency
+        self.jitter = jitter
+        self.error = error
+        self.limit = limit
+        self.missing = missing
+        self.fixtures = fixtures
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.templates: dict[str, str] = dict()
+        self.buckets: dict[str, Bucket] = dict()
+        self.requests: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.sent = 0
+        self.servers: dict[str, ThreadingHTTPServer] = dict()
+
+    @property
+    def urls(self) -> dict[str, str]:
+        """
+        Base URL per upstream host. Every host gets a port of its own, so clients keep
+        separate connection pools per host as against the live services.
+        """
+        if not self.servers:
+            raise RuntimeError("Server not started")
+        return {
+            host: "http://{}:{}".format(*server.server_address[:2])
+            for host, server in self.servers.items()
+        }
+
+    def __enter__(self) -> "Server":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Starts serving every upstream host on a free port in background threads.
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                server.handle(self, "GET")
+
+            def do_POST(self) -> None:
+                server.handle(self, "POST")
+
+            def log_message(self, format: str, *args: Any) -> None:
+                LOG.debug(format % args)
+
+        class HTTPServer(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request: Any, address: Any) -> None:
+                # Clients drop idle keep-alive connections, e.g. of cancelled requests
+                LOG.debug(f"Connection from {address} closed: {sys.exc_info()[1]}")
+
+        for host in HOSTS:
+            self.servers[host] = HTTPServer(("127.0.0.1", 0), Handler)
+            threading.Thread(target=self.servers[host].serve_forever, daemon=True).start()
+        LOG.info(f"Stand-in API serving {len(self.entries)} entries on {len(HOSTS)} ports")
+
+    def stop(self) -> None:
+        """
+        Stops serving.
+        """
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+        self.servers.clear()
+
+    def template(self, name: str, entry: str | None = None) -> str | None:
+        """
+        Loads a fixture, preferring a recording of the entry.
+
+        Args:
+            name (str): Fixture file name.
+            entry (str | None): Entry ID.
+
+        Returns:
+            str | None: Fixture text with the entry substituted, or None if there is none.
+        """
+        if entry is not None:
+            path = os.path.join(self.fixtures, entry.lower(), name)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as file:
+                    return file.read()
+
+        with self.lock:
+            if name not in self.templates:
+                path = os.path.join(self.fixtures, name)
+                if not os.path.exists(path):
+                    return None
+                with open(path, "r", encoding="utf-8") as file:
+                    self.templates[name] = file.read()
+            text = self.templates[name]
+
+        if entry is None:
+            return text
+        return text.replace("$ENTRY", entry.upper()).replace("$entry", entry.lower())
+
+    def absent(self, host: str, entry: str) -> bool:
+        """
+        Decides deterministically whether an optional source lacks an entry, so its
+        annotation and structure are missing alike.
+
+        Args:
+            host (str): Upstream host.
+            entry (str): Entry ID.
+
+        Returns:
+            bool: Whether the entry is unknown to the source.
+        """
+        if not self.missing or host not in SOURCES:
+            return False
+        digest = hashlib.sha256(f"{SOURCES[host]}/{entry.lower()}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") / 2**32 < self.missing
+
+    def search(self, body: dict[str, Any]) -> tuple[int, bytes]:
+        """
+        Answers a search query with the configured entries, paginated or in full.
+        """
+        options = body.get("request_options") or {}
+        results = [f"{entry}_1" for entry in self.entries]
+        total = len(results)
+        if not options.get("return_all_hits"):
+            paginate = options.get("paginate") or {"start": 0, "rows": 10}
+            results = results[paginate["start"] : paginate["start"] + paginate["rows"]]
+        if not results:
+            return 204, b""
+        output = {"query_id": "stand-in", "result_type": body.get("return_type"), "total_count": total}
+        if "group_by" in options:
+            output["group_count"] = total
+        return 200, json.dumps(output | {"result_set": results}).encode("utf-8")
+
+    def rcsb(self, body: dict[str, Any]) -> tuple[int, bytes]:
+        """
+        Answers a GraphQL entries query with one fixture entry per requested ID.
+        """
+        ids = (body.get("variables") or {}).get("ids") or []
+        entries = ",".join(self.template("rcsb.json", entry) or "null" for entry in ids)
+        return 200, f'{{"data": {{"entries": [{entries}]}}}}'.encode("utf-8")
+
+    def pdbe(self, feature: str, ids: list[str]) -> tuple[int, bytes]:
+        """
+        Answers a PDBe-KB entry API request for one (GET) or several (POST) entries.
+        """
+        values = []
+        for entry in ids:
+            text = self.template(f"{feature}.json", entry)
+            if text is None:
+                return 404, b"{}"
+            # Fixtures hold a single entry keyed by its ID
+            values.append(text.strip()[1:-1])
+        return 200, f"{{{','.join(values)}}}".encode("utf-8")
+
+    def sparql(self, query: str) -> tuple[int, bytes]:
+        """
+        Answers the UniProt SPARQL query of `curate.uniprot` for the entries of its VALUES.
+        """
+        entries = re.findall(r"\('(\w+)'\)", query)
+        record = json.loads(self.template("alphafold.json") or "[{}]")[0]
+        accession = record.get("uniprotAccession", "P00000")
+        bindings = [
+            {
+                "uniprot": {"type": "uri", "value": f"http://purl.uniprot.org/uniprot/{accession}"},
+                "rcsb": {"type": "literal", "value": ", ".join(entries)},
+                "alphafold": {"type": "literal", "value": f"http://purl.uniprot.org/alphafolddb/{accession}"},
+                "annotations": {"type": "literal", "value": ""},
+            }
+        ] if entries else []
+        output = {"head": {"vars": ["uniprot", "rcsb", "alphafold", "annotations"]}, "results": {"bindings": bindings}}
+        return 200, json.dumps(output).encode("utf-8")
+
+    def route(self, method: str, path: str, body: bytes) -> tuple[int, bytes, str]:
+        """
+        Resolves a request to a response.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Request path including the upstream host and query string.
+            body (bytes): Request body.
+
+        Returns:
+            tuple[int, bytes, str]: Status, body and content type.
+        """
+        parts = urlsplit(path)
+        target = parts.path.lstrip("/")
+
+        for allowed, pattern, name in ROUTES:
+            match = pattern.fullmatch(target)
+            if match is None or allowed not in ("*", method):
+                continue
+
+            match name:
+                case "search":
+                    return *self.search(json.loads(body or b"{}")), "application/json"
+                case "rcsb":
+                    return *self.rcsb(json.loads(body or b"{}")), "application/json"
+                case "pdbe":
+                    feature, entry = match.groups()
+                    ids = body.decode("utf-8").split(",") if method == "POST" else [entry]
+                    return *self.pdbe(feature, [i.strip() for i in ids if i.strip()]), "application/json"
+                case "sparql":
+                    parameters = parse_qs(parts.query) | parse_qs(body.decode("utf-8"))
+                    return *self.sparql((parameters.get("query") or [""])[0]), "application/sparql-results+json"
+
+            entry = match.group(1)
+            host = target.split("/", 1)[0]
+            if name == "structure.bcif":
+                text = self.template("structure.cif", entry)
+                if text is None:
+                    return 404, b'{"error": "not found"}', "application/json"
+                return 200, binary(text), "application/octet-stream"
+            text = None if self.absent(host, entry) else self.template(name, entry)
+            if text is None:
+                return 404, b'{"error": "not found"}', "application/json"
+            data = text.encode("utf-8")
+            if match.lastindex and match.lastindex > 1 and match.group(2):
+                return 200, gzip.compress(data, 1), "application/gzip"
+            kind = "application/json" if name.endswith(".json") else "text/plain"
+            return 200, data, kind
+
+        return 404, b'{"error": "unknown route"}', "application/json"
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str) -> None:
+        """
+        Serves a request with the configured latency, errors and rate limit.
+
+        Args:
+            request (BaseHTTPRequestHandler): Request handler.
+            method (str): HTTP method.
+        """
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        host = request.path.lstrip("/").split("/", 1)[0]
+
+        with self.lock:
+            self.requests[host] += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            failed = self.random.random() < self.error
+            if self.limit and host not in self.buckets:
+                self.buckets[host] = Bucket(self.limit)
+            bucket = self.buckets.get(host)
+
+        if delay:
+            time.sleep(delay)
+
+        headers = {}
+        if bucket is not None and not bucket.take():
+            status, data, kind = 429, b'{"error": "too many requests"}', "application/json"
+            headers["Retry-After"] = "1"
+        elif failed:
+            status, data, kind = 503, b'{"error": "unavailable"}', "application/json"
+        else:
+            status, data, kind = self.route(method, request.path, body)
+
+        # Byte ranges for resumed downloads
+        requested = request.headers.get("Range")
+        if status == 200 and requested and requested.startswith("bytes="):
+            offset = int(requested[6:].split("-", 1)[0] or 0)
+            if offset >= len(data):
+                status, data = 416, b""
+            else:
+                status, data = 206, data[offset:]
+                headers["Content-Range"] = f"bytes {offset}-{offset + len(data) - 1}/*"
+
+        with self.lock:
+            self.statuses[status] += 1
+            self.sent += len(data)
+
+        request.send_response(status)
+        request.send_header("Content-Type", kind)
+        request.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            request.send_header(key, value)
+        request.end_headers()
+        if data:
+            request.wfile.write(data)
+
+    def report(self) -> dict[str, Any]:
+        """
+        Summarises the requests served so far.
+
+        Returns:
+            dict[str, Any]: Requests per upstream host, responses per status and bytes sent.
+        """
+        with self.lock:
+            return {
+                "requests": sum(self.requests.values()),
+                "hosts": dict(self.requests),
+                "statuses": {str(status): count for status, count in self.statuses.items()},
+                "bytes": self.sent,
+            }
+
+    def patch(self) -> AbstractContextManager[None]:
+        """
+        Points the endpoint constants of the pipeline modules at the stand-in while active.
+        """
+        return patch(self.urls)
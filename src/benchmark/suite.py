@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import time
+import logging
+import resource
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from logging import Logger
+from typing import Any
+
+SCRIPTS: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if SCRIPTS not in sys.path:
+    sys.path.append(SCRIPTS)
+
+from network import METRICS, Client
+from search import search
+from curate import curate
+from curate.output import Writer
+
+from benchmark.server import Server, patch
+
+
+LOG: Logger = logging.getLogger(__name__)
+ROOT: str = os.path.join(SCRIPTS, "..")
+SIZES: tuple[int, ...] = (100, 1000, 10000)  # Number of entries per run
+CONNECTIONS: int = 8  # Maximum number of requests in flight per host, as in main.py
+TOLERANCE: float = 0.2  # Relative slowdown tolerated against a baseline
+
+
+def run(urls: dict[str, str], directory: str) -> dict[str, Any]:
+    """
+    Runs search and curation against a stand-in server. Executed in a fresh process per
+    size, so the peak resident memory covers that run alone.
+
+    Args:
+        urls (dict[str, str]): Base URLs of the stand-in server per upstream host.
+        directory (str): Scratch directory for structures, state and output.
+
+    Returns:
+        dict[str, Any]: Curated entries, wall times, peak RSS and stage timings.
+    """
+    with open(os.path.join(ROOT, "config.json"), "r", encoding="utf-8") as file:
+        config = json.load(file)
+    with open(os.path.join(ROOT, "src/curate/rcsb.gql"), "r", encoding="utf-8") as file:
+        query = file.read()
+
+    options = config["data"] | {
+        "rcsb": query,
+        "pdb": os.path.join(directory, "structure/"),
+        "tm": os.path.join(directory, "simulation/"),
+        "state": os.path.join(directory, "state.sqlite"),
+    }
+    os.makedirs(options["pdb"], exist_ok=True)
+    os.makedirs(options["tm"], exist_ok=True)
+
+    # No client side rate limits, the stand-in decides when to throttle
+    settings = {key: value for key, value in config.get("client", {}).items() if key != "rates"}
+    client = Client(maxsize=settings.pop("connections", CONNECTIONS), block=True, **settings)
+
+    with patch(urls):
+        start = time.perf_counter()
+        entries = search(client=client, config=config["search"] | {"planner": False})
+        searched = time.perf_counter() - start
+        with Writer(os.path.join(directory, "output/")) as writer:
+            data = curate(client=client, entries=entries, options=options, writer=writer)
+        wall = time.perf_counter() - start
+
+    return {
+        "entries": len(data["entries"]),
+        "search": round(searched, 3),
+        "wall": round(wall, 3),
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        "rss": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            / (2**20 if sys.platform == "darwin" else 2**10),
+            1,
+        ),
+        "stages": {
+            stage: round(values["seconds"], 3)
+            for stage, values in METRICS.report()["stages"].items()
+        },
+    }
+
+
+def suite(
+    sizes: tuple[int, ...] = SIZES,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error: float = 0.0,
+    limit: float | None = None,
+    missing: float = 0.0,
+) -> list[dict[str, Any]]:
+    """
+    Benchmarks `search()` + `curate()` end to end against the local stand-in server for
+    each number of entries, without touching the live services.
+
+    Args:
+        sizes (tuple[int, ...]): Numbers of entries to benchmark.
+        latency (float): Response delay of the stand-in in seconds.
+        jitter (float): Maximum random delay added to the latency in seconds.
+        error (float): Fraction of requests failing with 503.
+        limit (float | None): Requests per second per host before the stand-in answers 429.
+        missing (float): Fraction of entries each membrane source lacks.
+
+    Returns:
+        list[dict[str, Any]]: Per size the number of entries requested and curated,
+            requests, requests per second, wall time in seconds, peak RSS in MiB and
+            the server side request statistics.
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+
+    for size in sizes:
+        LOG.info(f"Benchmarking {size} entries...")
+        with (
+            Server(size, latency, jitter, error, limit, missing) as server,
+            tempfile.TemporaryDirectory() as directory,
+            ProcessPoolExecutor(max_workers=1, mp_context=context) as executor,
+        ):
+            result = executor.submit(run, server.urls, directory).result()
+            served = server.report()
+
+        result = {
+            "size": size,
+            "requests": served["requests"],
+            "throughput": round(served["requests"] / result["wall"], 1),
+        } | result | {"server": served}
+        LOG.info(
+            f"{size} entries: {result['wall']:.1f}s, {result['throughput']:.0f} req/s, "
+            f"peak RSS {result['rss']:.0f} MiB"
+        )
+        results.append(result)
+
+    return results
+
+
+def compare(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]], tolerance: float = TOLERANCE
+) -> list[str]:
+    """
+    Checks benchmark results against a baseline run of the same sizes.
+
+    Args:
+        results (list[dict[str, Any]]): Results of `suite`.
+        baseline (list[dict[str, Any]]): Earlier results of `suite`.
+        tolerance (float): Relative regression tolerated.
+
+    Returns:
+        list[str]: Descriptions of the regressions, empty if there are none.
+    """
+    reference = {item["size"]: item for item in baseline}
+    regressions = []
+    for result in results:
+        before = reference.get(result["size"])
+        if before is None:
+            continue
+        for key, worse in (("wall", 1), ("rss", 1), ("throughput", -1)):
+            if worse * (result[key] - before[key]) > tolerance * before[key]:
+                regressions.append(
+                    f"{result['size']} entries: {key} {before[key]} -> {result[key]}"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Offline end-to-end throughput benchmark.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error", type=float, default=0.0)
+    parser.add_argument("--limit", type=float, default=None)
+    parser.add_argument("--missing", type=float, default=0.0)
+    parser.add_argument("--output", default=os.path.join(ROOT, "results/benchmark.json"))
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    arguments = parser.parse_args()
+
+    results = suite(
+        tuple(arguments.sizes),
+        arguments.latency,
+        arguments.jitter,
+        arguments.error,
+        arguments.limit,
+        arguments.missing,
+    )
+    with open(arguments.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+
+    print(f"{'entries':>8} {'curated':>8} {'requests':>9} {'req/s':>8} {'wall s':>8} {'RSS MiB':>8}")
+    for result in results:
+        print(
+            f"{result['size']:>8} {result['entries']:>8} {result['requests']:>9} "
+            f"{result['throughput']:>8.0f} {result['wall']:>8.1f} {result['rss']:>8.0f}"
+        )
+
+    if arguments.baseline:
+        with open(arguments.baseline, "r", encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), arguments.tolerance)
+        for regression in regressions:
+            LOG.error(f"Regression: {regression}")
+        sys.exit(1 if regressions else 0)
@@ -1,98 +1,195 @@
 import os
 import logging
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 from curate.rcsb import rcsb
-from curate.pdbe import pdbe
+from curate.pdbe import pdbe, CHUNK as PDBE_CHUNK
 from curate.memprotmd import memprotmd
 from curate.pdbtm import pdbtm
 from curate.opm import opm
+from curate.membrane import membrane
 from curate.structure import structure
+from curate.state import State
+from curate.storage import locate, stored
+from curate.output import Writer
+from curate.scheduler import Scheduler
+from curate.redundancy import redundancy
+from curate.features import assemble, split
+from network import METRICS
 
 
 LOG = logging.getLogger(__name__)
 
 
-def curate(client, entries: set[str], options: dict[str, Any]) -> dict[str, Any]:
+def curate(
+    client, entries: Iterable[str], options: dict[str, Any], writer: Writer | None = None
+) -> dict[str, Any]:
     """
     Curates biological structure data in a staged pipeline:
       1. Queries RCSB for entry data.
       2. Downloads experimental PDB structure files.
       3. Queries PDBe-KB for entry data.
-      4. Fetches membrane annotation data from MemProtMD, PDBTM, or OPM and downloads simulated structures.
+      4. Fetches membrane annotation data from PDBTM, OPM, or MemProtMD and downloads simulated structures.
+
+    Structures are kept in the storage mode `options["storage"]` ("plain" by default, "gzip"
+    or "bcif"); presence checks accept files in any mode. Experimental structures found in
+    a local PDB mirror (`options["mirror"]`, divided mmCIF layout) are linked instead of
+    downloaded.
+
+    With `options["redundancy"]` (arguments of `redundancy.redundancy`), entries whose
+    sequences are redundant at the given identity are dropped after the RCSB stage, keeping
+    one representative per cluster for the structure, PDBe-KB and membrane stages.
+
+    Each stage checkpoints its output per entry in a state store (`options["state"]`, in memory
+    if not set). Re-runs only process the entries of a stage that are new or failed before.
+
+    With `options["scheduler"]` (worker threads per stage, see `scheduler.CONCURRENCY`), the
+    stages overlap: entries stream through bounded queues between the stages instead of
+    every stage waiting for all entries of the previous one.
 
     Args:
         client (urllib3.PoolManager): HTTP client used to execute the data queries.
-        entries (set[str]): Set of unique PDB identifiers to be curated.
+        entries (Iterable[str]): PDB identifiers to be curated. May be a generator, e.g. a
+            paginated search, in which case RCSB data is fetched as identifiers arrive.
+        options (dict[str, Any]): Data section of the configuration.
+        writer (Writer | None): Output writer receiving every entry, and the per-residue
+            feature tracks of its polymer entities, as soon as it is curated.
 
     Returns:
         dict[str, Any]: Curated data including RCSB, PDBe-KB, membrane data, as well as the final entry list.
     """
+    if options.get("scheduler") is not None:
+        return Scheduler(client, options, writer, options["scheduler"]).run(entries)
+
     data: dict[str, Any] = {"entries": [], "rcsb": {}, "pdbe": {}, "membrane": {}}
-    LOG.info(f"Starting data curation process for {len(entries)} entries...")
+    state = State(options.get("state", ":memory:"))
+    LOG.info("Starting data curation process...")
+
+    def emit(finished: set[str]) -> None:
+        if writer is None:
+            return
+        for entry in sorted(finished):
+            pdbe = {feature: data["pdbe"][feature][entry] for feature in options["pdbe"]}
+            record = {
+                "rcsb": data["rcsb"][entry],
+                "pdbe": pdbe,
+                "membrane": data["membrane"][entry],
+            }
+            with METRICS.stage("output"):
+                writer.write(entry, record)
+                for entity, matrix in assemble(data["rcsb"][entry], pdbe).items():
+                    writer.append(f"{entry}_{entity}", split(matrix))
+
+    # 1. RCSB entry data, requested while the entries are still arriving
+    finished = state.finished("rcsb")
+    seen, pending = set(), set()
+
+    def incoming() -> Iterator[str]:
+        for entry in entries:
+            entry = entry.lower()
+            if entry in seen:
+                continue
+            seen.add(entry)
+            if entry not in finished:
+                pending.add(entry)
+                yield entry
+
+    with METRICS.stage("rcsb"):
+        result = rcsb(client, incoming(), options["rcsb"])
+    fetched = {entry["entry"]["id"].lower(): entry for entry in result}
+    state.save("rcsb", fetched)
+    state.fail("rcsb", pending - fetched.keys())
+    entries = seen
+    LOG.info(f"RCSB: {len(entries)} entries received")
+    LOG.info(f"RCSB: {len(entries - pending)} entries restored from checkpoint")
     LOG.debug(f"Initial entries: {entries}")
-
-    # 1. RCSB entry data
-    result = rcsb(client, entries, options["rcsb"])
-    data["rcsb"] = {entry["entry"]["id"].lower(): entry for entry in result}
+    data["rcsb"] = state.done("rcsb", entries)
     entries = set(data["rcsb"].keys())
     LOG.info(f"RCSB: {len(entries)} entries retained")
     LOG.debug(f"Remaining entries: {entries}")
 
+    # Redundant entries only keep their cluster representative
+    if options.get("redundancy") is not None:
+        with METRICS.stage("redundancy"):
+            clusters = redundancy(data["rcsb"], **options["redundancy"])
+        data["rcsb"] = {entry: data["rcsb"][entry] for entry in clusters}
+        entries = set(clusters)
+        LOG.info(f"Redundancy: {len(entries)} representatives retained")
+        LOG.debug(f"Remaining entries: {entries}")
+
     # 2. PDB experimental structure
-    structure(client, "rcsb", list(entries), options["pdb"])
-    entries = {
-        file.removesuffix(".cif").lower()
-        for file in os.listdir(options["pdb"])
-        if file.endswith(".cif")
-    }
+    pending = entries - stored(options["pdb"], ".cif")
+    if pending:
+        with METRICS.stage("structure/rcsb"):
+            structure(
+                client,
+                "rcsb",
+                sorted(pending),
+                options["pdb"],
+                storage=options.get("storage", "plain"),
+                local=options.get("mirror"),
+            )
+    present = stored(options["pdb"], ".cif")
+    state.save(
+        "structure",
+        {
+            entry: os.path.basename(locate(options["pdb"], entry, ".cif") or "")
+            for entry in entries & present
+        },
+    )
+    state.fail("structure", pending - present)
+    entries &= present
     LOG.info(f"Structure: {len(entries)} entries retained")
     LOG.debug(f"Remaining entries: {entries}")
 
     # 3. PDBe-KB entry data
-    data["pdbe"] = pdbe(client, entries, options["pdbe"])
+    groups = state.outstanding([f"pdbe/{feature}" for feature in options["pdbe"]], entries)
+    restored = len(entries) - sum(len(pending) for pending in groups.values())
+    LOG.info(f"PDBe-KB: {restored} entries restored from checkpoint")
+    # Entries are only requested for the features they lack
+    for stages, pending in groups.items():
+        features = [feature for feature in options["pdbe"] if f"pdbe/{feature}" in stages]
+        with METRICS.stage("pdbe"):
+            result = pdbe(
+                client, pending, features, chunk=options.get("pdbe_chunk", PDBE_CHUNK)
+            )
+        for feature in features:
+            state.save(f"pdbe/{feature}", result[feature])
+            state.fail(f"pdbe/{feature}", pending - result[feature].keys())
+    data["pdbe"] = {
+        feature: state.done(f"pdbe/{feature}", entries) for feature in options["pdbe"]
+    }
     entries = set.intersection(
         *(set(data["pdbe"][feature].keys()) for feature in options["pdbe"])
     )
     LOG.info(f"PDBe-KB: {len(entries)} entries retained")
     LOG.debug(f"Remaining entries: {entries}")
 
-    # 4. Membrane data preference order: MemProtMD → PDBTM → OPM
-    processed = set()
-    for label, fetch in {"pdbtm": pdbtm, "opm": opm, "memprotmd": memprotmd}.items():
-        entries -= processed
-        if not entries:
-            break
-
-        result = fetch(client, entries)
-        data["membrane"].update(
-            {entry: value | {"_source": label} for entry, value in result.items()}
+    # 4. Membrane data, all sources queried at once, preferred PDBTM → OPM → MemProtMD
+    present = stored(options["tm"], ".pdb")
+    data["membrane"] = {
+        entry: value
+        for entry, value in state.done("membrane", entries).items()
+        if entry in present
+    }
+    data["entries"] += list(data["membrane"].keys())
+    entries -= set(data["membrane"].keys())
+    emit(set(data["membrane"].keys()))
+    LOG.info(f"Membrane: {len(data['membrane'])} entries restored from checkpoint")
+
+    with METRICS.stage("membrane"):
+        result = membrane(
+            client, entries, options["tm"], storage=options.get("storage", "plain")
         )
-
-        match label:
-            case "pdbtm" | "opm":
-                structure(client, label, list(result.keys()), options["tm"])
-            case "memprotmd":
-                structure(
-                    client,
-                    label,
-                    [
-                        entry["simulations"][-1]
-                        for entry in result.values()
-                        if "simulations" in entry and entry["simulations"]
-                    ],
-                    options["tm"],
-                )
-
-        processed = set(result.keys()) & {
-            file.removesuffix(".pdb").lower()
-            for file in os.listdir(options["tm"])
-            if file.endswith(".pdb")
-        }
-        data["entries"] += list(processed)
-
-        LOG.info(f"{label.upper()}: {len(processed)} entries processed")
-        LOG.debug(f"Processed entries: {processed}")
+    data["membrane"].update(result)
+    processed = set(result.keys()) & stored(options["tm"], ".pdb")
+    state.save("membrane", {entry: data["membrane"][entry] for entry in processed})
+    data["entries"] += list(processed)
+    emit(processed)
+    LOG.info(f"Membrane: {len(processed)} entries processed")
+    LOG.debug(f"Processed entries: {processed}")
+
+    state.fail("membrane", entries - processed)
 
     # Final retained set
     LOG.info(f"Final curated set: {len(data["entries"])} entries")
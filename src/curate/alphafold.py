@@ -4,25 +4,29 @@ import logging
 from logging import Logger
 from typing import Any
 
+from network import gather, WORKERS
+
 LOG: Logger = logging.getLogger(__name__)
 ENDPOINT: str = "https://alphafold.ebi.ac.uk/api/prediction/{}"
 
 
-def alphafold(client: urllib3.PoolManager, entries: set[str]) -> dict[str, Any]:
+def alphafold(
+    client: urllib3.PoolManager, entries: set[str], workers: int = WORKERS
+) -> dict[str, Any]:
     """
     Queries the AlphaFold API for a set of UniProt accessions.
 
     Args:
         client (urllib3.PoolManager): HTTP client for making requests.
         entries (set[str]): Set of UniProt accession IDs.
+        workers (int): Maximum number of concurrent requests.
 
     Returns:
         dict[str, Any]: Dictionary of AlphaFold predictions keyed by accession ID.
     """
-    results: dict[str, Any] = dict()
     LOG.info(f"Fetching AlphaFold metadata for {len(entries)} UniProt accessions...")
 
-    for entry in entries:
+    def fetch(entry: str) -> Any:
         try:
             response = client.request(
                 method="GET",
@@ -31,8 +35,8 @@ def alphafold(client: urllib3.PoolManager, entries: set[str]) -> dict[str, Any]:
             )
 
             if response.status == 200:
-                results[entry] = json.loads(response.data.decode("utf-8"))[0]
                 LOG.info(f"Retrieved AlphaFold entry for {entry}")
+                return json.loads(response.data.decode("utf-8"))[0]
             else:
                 LOG.error(
                     f"Failed to fetch AlphaFold data for {entry} (status {response.status})"
@@ -43,7 +47,9 @@ def alphafold(client: urllib3.PoolManager, entries: set[str]) -> dict[str, Any]:
             LOG.exception(f"Exception while fetching AlphaFold data for {entry}")
             LOG.error(str(e))
 
-    return results
+        return None
+
+    return dict(gather(fetch, entries, workers))
 
 
 if __name__ == "__main__":
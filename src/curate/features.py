@@ -0,0 +1,291 @@
+import logging
+from logging import Logger
+from typing import Any, Callable, Iterable
+
+import numpy as np
+
+
+LOG: Logger = logging.getLogger(__name__)
+TRACKS: tuple[str, ...] = (
+    "hydropathy",
+    "disorder",
+    "confidence",
+    "cytoplasmic",
+    "exoplasmic",
+    "helix",
+    "sheet",
+    "turn",
+    "present",
+)
+NUMERIC: set[str] = {"hydropathy", "disorder", "confidence"}
+CYTOPLASMIC: tuple[str, ...] = ("cytoplasmic", "cytosolic")
+EXOPLASMIC: tuple[str, ...] = ("extracellular", "exoplasmic", "lumenal", "periplasmic")
+
+# Range annotation predicates per track, applied to RCSB style features
+# ({"type", "name", "feature_positions": [{"beg_seq_id", "end_seq_id", "values"}]})
+RULES: dict[str, Callable[[str, str], bool]] = {
+    "hydropathy": lambda kind, name: kind == "hydropathy",
+    "disorder": lambda kind, name: kind == "disorder",
+    "confidence": lambda kind, name: kind in {"plddt", "ma_qa_metric_local"},
+    "cytoplasmic": lambda kind, name: kind in {"topology", "topological_domain"}
+    and name.startswith(CYTOPLASMIC),
+    "exoplasmic": lambda kind, name: kind in {"topology", "topological_domain"}
+    and name.startswith(EXOPLASMIC),
+    "helix": lambda kind, name: kind in {"helix", "helx_p"},
+    "sheet": lambda kind, name: kind in {"sheet", "strand"},
+    "turn": lambda kind, name: kind in {"turn", "turn_ty1_p"},
+    "present": lambda kind, name: kind == "observed",
+}
+
+
+def paint(
+    length: int,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    values: np.ndarray | None = None,
+    lengths: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Paints half-open residue intervals onto a track without looping over residues.
+
+    Without values, coverage is accumulated in a difference array (boolean track). With
+    values, each interval carries `lengths[i]` consecutive values that are scattered to
+    their positions at once (numeric track, NaN where unpainted; later intervals win).
+
+    Args:
+        length (int): Number of residues of the track.
+        starts (np.ndarray): Zero-based interval starts.
+        ends (np.ndarray): Exclusive interval ends.
+        values (np.ndarray | None): Concatenated per-position values of all intervals.
+        lengths (np.ndarray | None): Number of values per interval (defaults to ends - starts).
+
+    Returns:
+        np.ndarray: Boolean or float32 track of the given length.
+    """
+    starts = np.clip(np.asarray(starts, dtype=np.int64), 0, length)
+    ends = np.clip(np.asarray(ends, dtype=np.int64), 0, length)
+
+    if values is None:
+        delta = np.zeros(length + 1, dtype=np.int32)
+        np.add.at(delta, starts, 1)
+        np.add.at(delta, ends, -1)
+        return np.cumsum(delta[:-1]) > 0
+
+    track = np.full(length, np.nan, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+    lengths = np.asarray(ends - starts if lengths is None else lengths, dtype=np.int64)
+    if not len(values):
+        return track
+
+    # Position of every value: interval start plus its rank within the interval
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.repeat(starts, lengths) + np.arange(len(values)) - offsets
+    valid = (positions >= 0) & (positions < length)
+    track[positions[valid]] = values[valid]
+    return track
+
+
+def intervals(
+    features: Iterable[dict[str, Any]], rule: Callable[[str, str], bool]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray | None, np.ndarray]:
+    """
+    Collects the intervals and values of the range annotations matching a rule.
+
+    Args:
+        features (Iterable[dict[str, Any]]): RCSB style range annotations.
+        rule (Callable[[str, str], bool]): Predicate on the lower-case type and name.
+
+    Returns:
+        tuple: Zero-based starts, exclusive ends, concatenated values (None if no
+            annotation carries values) and the number of values per interval.
+    """
+    starts, ends, values, lengths = [], [], [], []
+    for feature in features:
+        kind = (feature.get("type") or "").lower()
+        name = (feature.get("name") or feature.get("description") or "").lower()
+        if not rule(kind, name):
+            continue
+        for position in feature.get("feature_positions") or []:
+            start = position["beg_seq_id"] - 1
+            end = position.get("end_seq_id") or start + len(position.get("values") or [1])
+            starts.append(start)
+            ends.append(end)
+            values.extend(position.get("values") or [])
+            lengths.append(len(position.get("values") or []))
+
+    return (
+        np.asarray(starts, dtype=np.int64),
+        np.asarray(ends, dtype=np.int64),
+        np.asarray(values, dtype=np.float32) if values else None,
+        np.asarray(lengths, dtype=np.int64),
+    )
+
+
+def segments(
+    pdbe: dict[str, Any], entity: str, kind: str, key: Callable[[dict], list]
+) -> list[dict[str, Any]]:
+    """
+    Converts PDBe-KB start/end residue ranges of an entity into RCSB style range annotations.
+
+    Args:
+        pdbe (dict[str, Any]): PDBe-KB response of one entry (with "molecules").
+        entity (str): Entity ID.
+        kind (str): Annotation type to assign.
+        key (Callable[[dict], list]): Extracts the ranges from a chain record.
+
+    Returns:
+        list[dict[str, Any]]: Range annotations of all chains of the entity.
+    """
+    positions = [
+        {
+            "beg_seq_id": item["start"]["residue_number"],
+            "end_seq_id": item["end"]["residue_number"],
+        }
+        for molecule in (pdbe or {}).get("molecules", [])
+        if str(molecule.get("entity_id")) == entity
+        for chain in molecule.get("chains", [])
+        for item in key(chain) or []
+    ]
+    return [{"type": kind, "name": kind, "feature_positions": positions}]
+
+
+def annotations(entity: str, pdbe: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Collects the PDBe-KB derived range annotations of an entity: observed residues (from
+    the polymer coverage, or the residue listing), helices and strands.
+
+    Args:
+        entity (str): Entity ID.
+        pdbe (dict[str, Any]): PDBe-KB data of one entry keyed by feature.
+
+    Returns:
+        list[dict[str, Any]]: RCSB style range annotations.
+    """
+    result = []
+
+    if "coverage" in pdbe:
+        result += segments(
+            pdbe["coverage"], entity, "observed", lambda chain: chain.get("observed")
+        )
+    elif "residues" in pdbe:
+        numbers = np.unique(
+            np.fromiter(
+                (
+                    residue["residue_number"]
+                    for molecule in pdbe["residues"].get("molecules", [])
+                    if str(molecule.get("entity_id")) == entity
+                    for chain in molecule.get("chains", [])
+                    for residue in chain.get("residues", [])
+                    if residue.get("observed_ratio", 0) > 0
+                ),
+                dtype=np.int64,
+            )
+        )
+        # Collapse consecutive residue numbers into runs
+        breaks = np.flatnonzero(np.diff(numbers) != 1)
+        firsts = numbers[np.concatenate(([0], breaks + 1))] if len(numbers) else numbers
+        lasts = numbers[np.concatenate((breaks, [-1]))] if len(numbers) else numbers
+        positions = [
+            {"beg_seq_id": int(first), "end_seq_id": int(last)}
+            for first, last in zip(firsts, lasts)
+        ]
+        result.append({"type": "observed", "name": "observed", "feature_positions": positions})
+
+    if "structure" in pdbe:
+        for kind, key in (("helix", "helices"), ("strand", "strands")):
+            result += segments(
+                pdbe["structure"],
+                entity,
+                kind,
+                lambda chain: (chain.get("secondary_structure") or {}).get(key),
+            )
+
+    return result
+
+
+def assemble(
+    rcsb: dict[str, Any],
+    pdbe: dict[str, Any] | None = None,
+    extra: dict[str, list[dict[str, Any]]] | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Builds the per-residue feature matrix of every polymer entity of an entry.
+
+    Args:
+        rcsb (dict[str, Any]): RCSB GraphQL entry (see rcsb.gql).
+        pdbe (dict[str, Any] | None): PDBe-KB data of the entry keyed by feature.
+        extra (dict[str, list[dict[str, Any]]] | None): Additional range annotations per
+            entity ID, e.g. topology or confidence from other sources.
+
+    Returns:
+        dict[str, np.ndarray]: Float32 matrix of shape (residues, len(TRACKS)) per entity ID,
+            with NaN for missing numeric values and 0/1 for boolean tracks.
+    """
+    result = dict()
+
+    for entity in rcsb.get("polymer_entities") or []:
+        identifier = str(entity["rcsb_polymer_entity_container_identifiers"]["entity_id"])
+        poly = entity.get("entity_poly") or {}
+        length = poly.get("rcsb_sample_sequence_length") or len(
+            poly.get("pdbx_seq_one_letter_code_can") or ""
+        )
+
+        features = list(entity.get("rcsb_polymer_entity_feature") or [])
+        features += annotations(identifier, pdbe or {})
+        features += (extra or {}).get(identifier, [])
+
+        matrix = np.empty((length, len(TRACKS)), dtype=np.float32)
+        for column, track in enumerate(TRACKS):
+            starts, ends, values, lengths = intervals(features, RULES[track])
+            if track in NUMERIC:
+                values = values if values is not None else np.zeros(0, dtype=np.float32)
+                matrix[:, column] = paint(length, starts, ends, values, lengths)
+            else:
+                matrix[:, column] = paint(length, starts, ends)
+
+        result[identifier] = matrix
+
+    return result
+
+
+def split(matrix: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Splits a feature matrix into named tracks, e.g. for `output.Writer`.
+
+    Args:
+        matrix (np.ndarray): Feature matrix from `assemble`.
+
+    Returns:
+        dict[str, np.ndarray]: Float32 numeric and boolean tracks keyed by name.
+    """
+    return {
+        track: matrix[:, column] if track in NUMERIC else matrix[:, column] > 0
+        for column, track in enumerate(TRACKS)
+    }
+
+
+def features(data: dict[str, Any]) -> dict[str, dict[str, np.ndarray]]:
+    """
+    Builds the feature matrices of all entries of a curated document.
+
+    Args:
+        data (dict[str, Any]): Output of `curate()`.
+
+    Returns:
+        dict[str, dict[str, np.ndarray]]: Feature matrices keyed by entry and entity ID.
+    """
+    LOG.info(f"Assembling per-residue features for {len(data['entries'])} entries...")
+    result = {
+        entry: assemble(
+            data["rcsb"][entry],
+            {
+                feature: values[entry]
+                for feature, values in data["pdbe"].items()
+                if entry in values
+            },
+        )
+        for entry in data["entries"]
+    }
+    count = sum(len(matrices) for matrices in result.values())
+    LOG.info(f"Assembled {count} feature matrices")
+    return result
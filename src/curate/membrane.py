@@ -0,0 +1,190 @@
+import os
+import queue
+import logging
+import threading
+import urllib3
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging import Logger
+from typing import Any, Callable
+
+from network import WORKERS
+from curate.pdbtm import fetch as fetch_pdbtm
+from curate.opm import fetch as fetch_opm
+from curate.memprotmd import fetch as fetch_memprotmd
+from curate.storage import Storage
+from curate.structure import manifest, plan, retrieve
+
+
+LOG: Logger = logging.getLogger(__name__)
+ORDER: tuple[str, ...] = ("pdbtm", "opm", "memprotmd")  # Source preference
+SOURCES: dict[str, Callable[[urllib3.PoolManager, str], Any]] = {
+    "pdbtm": fetch_pdbtm,
+    "opm": fetch_opm,
+    "memprotmd": fetch_memprotmd,
+}
+
+
+def target(label: str, entry: str, value: Any) -> str | None:
+    """
+    Gets the identifier of the structure to download for a membrane annotation.
+
+    Args:
+        label (str): Membrane source.
+        entry (str): PDB entry ID.
+        value (Any): Annotation returned by the source.
+
+    Returns:
+        str | None: Entry ID, or the latest simulation for MemProtMD (None if there is none).
+    """
+    if label == "memprotmd":
+        simulations = value.get("simulations") if isinstance(value, dict) else None
+        return simulations[-1] if simulations else None
+    return entry
+
+
+def membrane(
+    client: urllib3.PoolManager,
+    entries: set[str],
+    outdir: str,
+    workers: int = WORKERS,
+    storage: Storage = "plain",
+    order: tuple[str, ...] = ORDER,
+) -> dict[str, Any]:
+    """
+    Resolves the membrane annotation and structure of every entry from the first source in
+    preference order that has both.
+
+    All sources are queried for an entry at once, instead of one source after another for
+    all entries. As soon as the preferred source with an annotation is known, its structure
+    is downloaded and the lower-priority queries of the entry that have not started yet are
+    skipped. If the download fails, the next source is used. Queries are fed to the pool
+    from a bounded window, so skipping takes effect before they are sent.
+
+    Args:
+        client (urllib3.PoolManager): HTTP client.
+        entries (set[str]): Set of PDB entry IDs.
+        outdir (str): Directory to save the membrane structures to.
+        workers (int): Maximum number of concurrent requests.
+        storage (Storage): Storage mode of the structure files.
+        order (tuple[str, ...]): Membrane sources in order of preference.
+
+    Returns:
+        dict[str, Any]: Membrane data with its "_source" keyed by PDB ID, for entries
+            whose structure file is present.
+    """
+    LOG.info(f"Resolving membrane data for {len(entries)} entries from {', '.join(order)}...")
+
+    checksums = manifest(outdir)
+    lock = threading.Lock()
+    finished: queue.Queue = queue.Queue()
+    pending: dict[Future, tuple[str, str, str]] = dict()
+    inflight: dict[str, dict[str, Future]] = {entry: dict() for entry in entries}
+    answers: dict[str, dict[str, Any]] = {entry: dict() for entry in entries}
+    failed: dict[str, set[str]] = {entry: set() for entry in entries}
+    backlog = deque((entry, label) for entry in entries for label in order)
+    chosen: dict[str, str] = dict()
+    result: dict[str, Any] = dict()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+
+        def submit(kind: str, entry: str, label: str, task: Callable[[], Any]) -> Future:
+            future = executor.submit(task)
+            pending[future] = (kind, entry, label)
+            future.add_done_callback(finished.put)
+            return future
+
+        def query(entry: str, label: str) -> None:
+            inflight[entry][label] = submit(
+                "query", entry, label, lambda: SOURCES[label](client, entry)
+            )
+
+        def decide(entry: str) -> None:
+            for label in order:
+                if label in failed[entry]:
+                    continue
+                if label not in answers[entry]:
+                    # Wait for the preferred source, querying it again if it was cancelled
+                    if label not in inflight[entry]:
+                        query(entry, label)
+                    return
+
+                identifier = target(label, entry, answers[entry][label])
+                if answers[entry][label] is None or identifier is None:
+                    failed[entry].add(label)
+                    continue
+
+                # Skip what lower-priority sources have not started yet
+                for other in order[order.index(label) + 1 :]:
+                    future = inflight[entry].get(other)
+                    if future is not None and future.cancel():
+                        del inflight[entry][other]
+
+                chosen[entry] = label
+                task = plan(label, [identifier], storage)[0]
+                submit(
+                    "download",
+                    entry,
+                    label,
+                    lambda: retrieve(client, task, outdir, checksums, lock),
+                )
+                return
+
+            LOG.debug(f"No membrane source for {entry}")
+
+        def fill() -> None:
+            while backlog and len(pending) < 2 * workers:
+                entry, label = backlog.popleft()
+                if (
+                    entry in result
+                    or label in answers[entry]
+                    or label in inflight[entry]
+                    or (entry in chosen and order.index(label) > order.index(chosen[entry]))
+                ):
+                    continue
+                query(entry, label)
+
+        fill()
+        while pending:
+            future = finished.get()
+            kind, entry, label = pending.pop(future)
+            if future.cancelled():
+                continue
+
+            match kind:
+                case "query":
+                    inflight[entry].pop(label, None)
+                    answers[entry][label] = future.result()
+                    if entry not in result and entry not in chosen:
+                        decide(entry)
+                case "download":
+                    del chosen[entry]
+                    if future.result() is not None:
+                        result[entry] = answers[entry][label] | {"_source": label}
+                        for other in inflight[entry].values():
+                            other.cancel()
+                    else:
+                        LOG.warning(f"{label.upper()} structure of {entry} unavailable")
+                        failed[entry].add(label)
+                        decide(entry)
+            fill()
+
+    manifest(outdir, checksums)
+
+    sources = Counter(value["_source"] for value in result.values())
+    LOG.info(
+        f"Membrane: {len(result)} of {len(entries)} entries resolved "
+        f"({', '.join(f'{label.upper()}: {sources[label]}' for label in order)})"
+    )
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    result = membrane(
+        client=urllib3.PoolManager(),
+        entries={"6kzo", "1ubq"},
+        outdir=os.path.join(os.path.dirname(os.path.abspath(__file__)), "test"),
+    )
+    for entry, value in result.items():
+        print(entry, value["_source"])
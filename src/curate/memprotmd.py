@@ -4,50 +4,65 @@ import urllib3
 from logging import Logger
 from typing import Any
 
+from network import gather, WORKERS
+
 LOG: Logger = logging.getLogger(__name__)
 ENDPOINT: str = "https://memprotmd.bioch.ox.ac.uk/api/references/PDB/{}"
 
 
-def memprotmd(client: urllib3.PoolManager, entries: set[str]) -> dict[str, Any]:
+def fetch(client: urllib3.PoolManager, entry: str) -> Any:
     """
-    Fetches simulation metadata for entries from the MemProtMD API.
+    Fetches the MemProtMD simulation metadata of a single entry.
 
     Args:
         client (urllib3.PoolManager): HTTP client.
-        entries (set[str]): Set of PDB entry IDs.
+        entry (str): PDB entry ID.
 
     Returns:
-        dict[str, Any]: Simulation metadata keyed by PDB ID.
+        Any: Simulation metadata, or None on failure or if there is none.
     """
-    results: dict[str, Any] = dict()
-    LOG.info(f"Fetching MemProtMD data for {len(entries)} entries...")
+    try:
+        response = client.request(
+            method="POST",
+            url=ENDPOINT.format(entry),
+            headers={"Accept": "application/json"},
+        )
+
+        if response.status != 200:
+            LOG.error(f"Failed MemProtMD query for {entry}: {response.status}")
+            LOG.debug(json.dumps(response.data.decode("utf-8"), indent=2))
+            return None
 
-    for entry in entries:
-        try:
-            response = client.request(
-                method="POST",
-                url=ENDPOINT.format(entry),
-                headers={"Accept": "application/json"},
-            )
+        output = json.loads(response.data.decode("utf-8"))
+        if not output:
+            LOG.error(f"No MemProtMD data found for {entry}")
+            return None
 
-            if response.status != 200:
-                LOG.error(f"Failed MemProtMD query for {entry}: {response.status}")
-                LOG.debug(json.dumps(response.data.decode("utf-8"), indent=2))
-                continue
+        LOG.info(f"Retrieved MemProtMD simulations for {entry}")
+        return output
 
-            output = json.loads(response.data.decode("utf-8"))
-            if not output:
-                LOG.error(f"No MemProtMD data found for {entry}")
-                continue
+    except Exception as e:
+        LOG.exception(f"Exception while querying MemProtMD for {entry}")
+        LOG.error(e)
+        return None
 
-            results[entry] = output
-            LOG.info(f"Retrieved MemProtMD simulations for {entry}")
 
-        except Exception as e:
-            LOG.exception(f"Exception while querying MemProtMD for {entry}")
-            LOG.error(e)
+def memprotmd(
+    client: urllib3.PoolManager, entries: set[str], workers: int = WORKERS
+) -> dict[str, Any]:
+    """
+    Fetches simulation metadata for entries from the MemProtMD API.
+
+    Args:
+        client (urllib3.PoolManager): HTTP client.
+        entries (set[str]): Set of PDB entry IDs.
+        workers (int): Maximum number of concurrent requests.
 
-    return results
+    Returns:
+        dict[str, Any]: Simulation metadata keyed by PDB ID.
+    """
+    LOG.info(f"Fetching MemProtMD data for {len(entries)} entries...")
+    return dict(gather(lambda entry: fetch(client, entry), entries, workers))
 
 
 if __name__ == "__main__":
@@ -4,47 +4,63 @@ import urllib3
 from logging import Logger
 from typing import Any
 
+from network import gather, WORKERS
+
 LOG: Logger = logging.getLogger(__name__)
 ENDPOINT: str = "https://opm-back.cc.lehigh.edu/opm-backend/primary_structures/pdbid/{}"
 
 
-def opm(client: urllib3.PoolManager, entries: set[str]) -> dict[str, Any]:
+def fetch(client: urllib3.PoolManager, entry: str) -> Any:
     """
-    Fetches membrane thickness data from the OPM API.
+    Fetches the OPM membrane data of a single entry.
 
     Args:
         client (urllib3.PoolManager): HTTP client.
-        entries (set[str]): Set of PDB entry IDs.
+        entry (str): PDB entry ID.
 
     Returns:
-        dict[str, Any]: OPM membrane data keyed by PDB ID.
+        Any: OPM primary structure record, or None on failure.
     """
-    results: dict[str, Any] = dict()
-    LOG.info(f"Fetching OPM data for {len(entries)} entries...")
+    try:
+        response = client.request(
+            method="GET",
+            url=ENDPOINT.format(entry),
+            headers={"Accept": "application/json"},
+        )
 
-    for entry in entries:
-        try:
-            response = client.request(
-                method="GET",
-                url=ENDPOINT.format(entry),
-                headers={"Accept": "application/json"},
-            )
+        if response.status == 200:
+            LOG.info(f"Retrieved OPM data for {entry}")
+            return json.loads(response.data.decode("utf-8"))
+        else:
+            LOG.error(f"Failed OPM query for {entry}: {response.status}")
+            LOG.debug(json.dumps(response.data.decode("utf-8"), indent=2))
 
-            if response.status == 200:
-                results[entry] = json.loads(response.data.decode("utf-8"))
-                LOG.info(f"Retrieved OPM data for {entry}")
-            else:
-                LOG.error(f"Failed OPM query for {entry}: {response.status}")
-                LOG.debug(json.dumps(response.data.decode("utf-8"), indent=2))
+    except Exception as e:
+        LOG.exception(f"Exception while querying OPM for {entry}")
+        LOG.error(e)
 
-        except Exception as e:
-            LOG.exception(f"Exception while querying OPM for {entry}")
-            LOG.error(e)
+    return None
+
+
+def opm(
+    client: urllib3.PoolManager, entries: set[str], workers: int = WORKERS
+) -> dict[str, Any]:
+    """
+    Fetches membrane thickness data from the OPM API.
 
-    return results
+    Args:
+        client (urllib3.PoolManager): HTTP client.
+        entries (set[str]): Set of PDB entry IDs.
+        workers (int): Maximum number of concurrent requests.
+
+    Returns:
+        dict[str, Any]: OPM membrane data keyed by PDB ID.
+    """
+    LOG.info(f"Fetching OPM data for {len(entries)} entries...")
+    return dict(gather(lambda entry: fetch(client, entry), entries, workers))
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     result = opm(urllib3.PoolManager(), {"6kzo"})
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,293 @@
+import os
+import json
+import logging
+import threading
+from logging import Logger
+from typing import Any, Iterator
+
+import numpy as np
+
+
+LOG: Logger = logging.getLogger(__name__)
+ENTRIES: str = "entries.jsonl"  # One curated entry per line
+TRACKS: str = "tracks/"  # Columnar per-residue feature store
+INDEX: str = "index.json"  # Entry offsets and track types of the feature store
+
+
+class Writer:
+    """
+    Streaming output writer for curated entries.
+
+    Entry metadata is appended to a JSON Lines file as soon as an entry is finished.
+    Per-residue feature tracks are appended to one flat binary column per track: boolean
+    tracks bit-packed (`np.packbits`), numeric tracks as float32 with NaN for missing values.
+    An index with the residue offset and length of every entry is written on close, so
+    the columns can be memory-mapped and sliced without loading the whole store.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Args:
+            directory (str): Output directory.
+        """
+        self.directory = directory
+        os.makedirs(os.path.join(directory, TRACKS), exist_ok=True)
+
+        self.lock = threading.RLock()
+        self.file = open(os.path.join(directory, ENTRIES), "w", encoding="utf-8")
+        self.columns: dict[str, Any] = dict()
+        self.types: dict[str, str] = dict()
+        self.bits: dict[str, np.ndarray] = dict()
+        self.index: dict[str, list] = {"entries": [], "offsets": [], "lengths": []}
+        self.offset = 0
+        LOG.debug(f"Writing curated output to {directory}")
+
+    def __enter__(self) -> "Writer":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def write(
+        self,
+        entry: str,
+        record: dict[str, Any],
+        tracks: dict[str, np.ndarray] | None = None,
+    ) -> None:
+        """
+        Appends a finished entry to the output.
+
+        Args:
+            entry (str): Entry ID.
+            record (dict[str, Any]): Curated metadata of the entry.
+            tracks (dict[str, np.ndarray] | None): Per-residue tracks of equal length.
+        """
+        with self.lock:
+            self.file.write(json.dumps({"entry": entry} | record) + "\n")
+            self.file.flush()
+
+            if tracks:
+                self.extend(entry, tracks)
+
+    def append(self, entry: str, tracks: dict[str, np.ndarray]) -> None:
+        """
+        Appends the per-residue tracks of an entry (or polymer entity) to the columns.
+
+        Args:
+            entry (str): Entry or polymer entity ID.
+            tracks (dict[str, np.ndarray]): Per-residue tracks of equal length.
+        """
+        with self.lock:
+            self.extend(entry, tracks)
+
+    def extend(self, entry: str, tracks: dict[str, np.ndarray]) -> None:
+        """
+        Appends per-residue tracks to the columns. Must hold the lock.
+
+        Args:
+            entry (str): Entry or polymer entity ID.
+            tracks (dict[str, np.ndarray]): Per-residue tracks of equal length.
+        """
+        length = len(next(iter(tracks.values())))
+
+        for name, values in tracks.items():
+            values = np.asarray(values)
+            if len(values) != length:
+                raise ValueError(
+                    f"Track '{name}' of {entry} has {len(values)} residues, expected {length}"
+                )
+
+            if name not in self.columns:
+                self.add(name, "bool" if values.dtype == np.bool_ else "float32")
+
+            if self.types[name] == "bool":
+                self.pack(name, values.astype(bool))
+            else:
+                self.columns[name].write(values.astype(np.float32).tobytes())
+
+        # Tracks missing for this entry are padded
+        for name in self.columns.keys() - tracks.keys():
+            if self.types[name] == "bool":
+                self.pack(name, np.zeros(length, dtype=bool))
+            else:
+                padding = np.full(length, np.nan, dtype=np.float32)
+                self.columns[name].write(padding.tobytes())
+
+        self.index["entries"].append(entry)
+        self.index["offsets"].append(self.offset)
+        self.index["lengths"].append(length)
+        self.offset += length
+
+    def add(self, name: str, kind: str) -> None:
+        """
+        Opens a new column, padding it for the residues of entries written before.
+
+        Args:
+            name (str): Track name.
+            kind (str): Either "bool" or "float32".
+        """
+        extension = "bits" if kind == "bool" else "f4"
+        path = os.path.join(self.directory, TRACKS, f"{name}.{extension}")
+        self.columns[name] = open(path, "wb")
+        self.types[name] = kind
+
+        if kind == "bool":
+            self.bits[name] = np.zeros(0, dtype=bool)
+            self.pack(name, np.zeros(self.offset, dtype=bool))
+        else:
+            padding = np.full(self.offset, np.nan, dtype=np.float32)
+            self.columns[name].write(padding.tobytes())
+
+    def pack(self, name: str, values: np.ndarray) -> None:
+        """
+        Packs boolean values into a column, buffering bits that do not fill a byte yet.
+
+        Args:
+            name (str): Track name.
+            values (np.ndarray): Boolean values to append.
+        """
+        bits = np.concatenate((self.bits[name], values))
+        full = len(bits) - len(bits) % 8
+        self.columns[name].write(np.packbits(bits[:full]).tobytes())
+        self.bits[name] = bits[full:]
+
+    def close(self) -> None:
+        """
+        Flushes the columns and writes the feature store index.
+        """
+        with self.lock:
+            self.file.close()
+            for name, column in self.columns.items():
+                if self.types[name] == "bool" and len(self.bits[name]):
+                    column.write(np.packbits(self.bits[name]).tobytes())
+                column.close()
+
+            path = os.path.join(self.directory, TRACKS, INDEX)
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(self.index | {"tracks": self.types, "residues": self.offset}, file)
+
+        LOG.info(f"Wrote {len(self.index['entries'])} track sets to {self.directory}")
+
+
+class Tracks:
+    """
+    Read-only, memory-mapped view of a feature store written by `Writer`.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Args:
+            directory (str): Output directory of the writer.
+        """
+        root = os.path.join(directory, TRACKS)
+        with open(os.path.join(root, INDEX), "r", encoding="utf-8") as file:
+            index = json.load(file)
+
+        self.entries: list[str] = index["entries"]
+        self.offsets = np.asarray(index["offsets"], dtype=np.int64)
+        self.lengths = np.asarray(index["lengths"], dtype=np.int64)
+        self.types: dict[str, str] = index["tracks"]
+        self.positions = {entry: i for i, entry in enumerate(self.entries)}
+        self.columns: dict[str, np.ndarray] = dict()
+
+        for name, kind in self.types.items():
+            path = os.path.join(root, f"{name}.{'bits' if kind == 'bool' else 'f4'}")
+            dtype = np.uint8 if kind == "bool" else np.float32
+            self.columns[name] = (
+                np.memmap(path, dtype=dtype, mode="r")
+                if os.path.getsize(path)
+                else np.zeros(0, dtype=dtype)
+            )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, entry: str) -> dict[str, np.ndarray]:
+        """
+        Loads all tracks of a single entry.
+
+        Args:
+            entry (str): Entry ID.
+
+        Returns:
+            dict[str, np.ndarray]: Per-residue tracks.
+        """
+        i = self.positions[entry]
+        return {
+            name: self.track(name, int(self.offsets[i]), int(self.lengths[i]))
+            for name in self.types
+        }
+
+    def track(self, name: str, start: int = 0, length: int | None = None) -> np.ndarray:
+        """
+        Slices a track over a residue range of the store.
+
+        Args:
+            name (str): Track name.
+            start (int): Residue offset in the store.
+            length (int | None): Number of residues, up to the end of the store if None.
+
+        Returns:
+            np.ndarray: Boolean or float32 values.
+        """
+        column = self.columns[name]
+        if self.types[name] != "bool":
+            stop = None if length is None else start + length
+            return np.asarray(column[start:stop])
+
+        stop = start + length if length is not None else 8 * len(column)
+        bits = np.unpackbits(column[start // 8 : (stop + 7) // 8])
+        return bits[start % 8 : start % 8 + stop - start].astype(bool)
+
+
+def read(directory: str) -> Iterator[dict[str, Any]]:
+    """
+    Streams the curated entries written by `Writer`.
+
+    Args:
+        directory (str): Output directory of the writer.
+
+    Yields:
+        dict[str, Any]: Curated entry records.
+    """
+    with open(os.path.join(directory, ENTRIES), "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def convert(source: str, directory: str) -> None:
+    """
+    Converts a per-residue JSON table (list of entries with track lists) to the columnar store.
+    Mixed boolean/numeric tracks are stored as float32 with NaN for the boolean values.
+
+    Args:
+        source (str): Path to the JSON table, e.g. results/output.json.
+        directory (str): Output directory.
+    """
+    with open(source, "r", encoding="utf-8") as file:
+        table = json.load(file)
+
+    with Writer(directory) as writer:
+        for item in table:
+            tracks = {
+                key: np.asarray(
+                    value
+                    if all(isinstance(v, bool) for v in value)
+                    else [np.nan if isinstance(v, bool) else v for v in value]
+                )
+                for key, value in item.items()
+                if isinstance(value, list)
+            }
+            record = {key: value for key, value in item.items() if key not in tracks}
+            writer.write(item["entry"].lower(), record, tracks)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    results = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../results/")
+    convert(os.path.join(results, "output.json"), os.path.join(results, "columnar/"))
+    store = Tracks(os.path.join(results, "columnar/"))
+    for entry in store.entries[:3]:
+        tracks = store[entry]
+        print(entry, {name: int(np.nansum(values)) for name, values in tracks.items()})
@@ -1,9 +1,11 @@
 import json
 import urllib3
 import logging
+from itertools import batched
 from logging import Logger
 from typing import Any
 
+from network import METRICS, gather, WORKERS
 
 LOG: Logger = logging.getLogger(__name__)
 ENDPOINTS: dict[str, str] = {
@@ -12,52 +14,115 @@ ENDPOINTS: dict[str, str] = {
     "coverage": "https://www.ebi.ac.uk/pdbe/api/pdb/entry/polymer_coverage/{}",
     "structure": "https://www.ebi.ac.uk/pdbe/api/pdb/entry/secondary_structure/{}",
 }
+CHUNK: int = 100  # Number of entry IDs per batch request, 1 for single requests
 
 
 def pdbe(
-    client: urllib3.PoolManager, entries: set[str], features: list[str]
+    client: urllib3.PoolManager,
+    entries: set[str],
+    features: list[str],
+    workers: int = WORKERS,
+    chunk: int = CHUNK,
 ) -> dict[str, dict[str, Any]]:
     """
     Fetches selected PDBe data features for a list of PDB entry IDs.
 
+    Entries are requested in batches (POST with comma-separated IDs) per feature, all
+    batches of all features concurrently. Entries missing from a failed or incomplete batch
+    are requested again one by one.
+
     Args:
         client (urllib3.PoolManager): HTTP client for making requests.
         entries (set[str]): Set of PDB entry IDs.
         features (list[str]): Subset of ["residues", "coverage", "structure"] to fetch.
+        workers (int): Maximum number of concurrent requests.
+        chunk (int): Maximum number of entry IDs per batch request, 1 to disable batching.
 
     Returns:
         dict[str, dict[str, Any]]: Dict of {feature -> {entry -> data}}.
     """
     result = {feature: dict() for feature in features}
+    for feature in features:
+        if feature not in ENDPOINTS:
+            LOG.warning(f"Unsupported PDBe feature: {feature}")
 
-    for entry in entries:
-        for feature in features:
-            if feature not in ENDPOINTS:
-                LOG.warning(f"Unsupported PDBe feature: {feature}")
-                continue
-
-            try:
-                response = client.request(
-                    method="GET",
-                    url=ENDPOINTS[feature].format(entry),
-                    headers={"Accept": "application/json"},
-                )
-                if response.status == 200:
+    def fetch(task: tuple[str, str]) -> Any:
+        entry, feature = task
+        try:
+            response = client.request(
+                method="GET",
+                url=ENDPOINTS[feature].format(entry),
+                headers={"Accept": "application/json"},
+            )
+            if response.status == 200:
+                with METRICS.stage("decode/pdbe"):
                     raw = json.loads(response.data.decode("utf-8"))
-                    if entry in raw:
-                        result[feature][entry] = raw[entry]
-                        LOG.debug(f"Fetched {feature} for {entry}")
-                    else:
-                        LOG.warning(f"No data for {feature} in response for {entry}")
+                if entry in raw:
+                    LOG.debug(f"Fetched {feature} for {entry}")
+                    return raw[entry]
                 else:
-                    LOG.error(
-                        f"Failed to fetch {feature} for {entry}: {response.status}"
-                    )
-                    LOG.debug(response.data.decode("utf-8"))
-
-            except Exception as e:
-                LOG.exception(f"Exception during {feature} fetch for {entry}")
-                LOG.error(str(e))
+                    LOG.warning(f"No data for {feature} in response for {entry}")
+            else:
+                LOG.error(
+                    f"Failed to fetch {feature} for {entry}: {response.status}"
+                )
+                LOG.debug(response.data.decode("utf-8"))
+
+        except Exception as e:
+            LOG.exception(f"Exception during {feature} fetch for {entry}")
+            LOG.error(str(e))
+
+        return None
+
+    def batch(task: tuple[tuple[str, ...], str]) -> dict[str, Any] | None:
+        ids, feature = task
+        try:
+            response = client.request(
+                method="POST",
+                url=ENDPOINTS[feature].format(""),
+                body=",".join(ids),
+                headers={"Accept": "application/json", "Content-Type": "text/plain"},
+            )
+            if response.status == 200:
+                with METRICS.stage("decode/pdbe"):
+                    raw = json.loads(response.data.decode("utf-8"))
+                LOG.debug(f"Fetched {feature} for a batch of {len(ids)} entries")
+                return {entry: raw[entry] for entry in ids if entry in raw}
+            else:
+                LOG.error(
+                    f"Failed to fetch {feature} for a batch of {len(ids)} entries: {response.status}"
+                )
+                LOG.debug(response.data.decode("utf-8"))
+
+        except Exception as e:
+            LOG.exception(f"Exception during {feature} batch fetch")
+            LOG.error(str(e))
+
+        return None
+
+    supported = [feature for feature in features if feature in ENDPOINTS]
+    ordered = sorted(entries)
+
+    if chunk > 1:
+        batches = [
+            (ids, feature)
+            for feature in supported
+            for ids in batched(ordered, chunk)
+        ]
+        for (ids, feature), data in gather(batch, batches, workers):
+            result[feature].update(data)
+
+    # Single requests for everything the batches did not return
+    tasks = [
+        (entry, feature)
+        for entry in ordered
+        for feature in supported
+        if entry not in result[feature]
+    ]
+    if chunk > 1 and tasks:
+        LOG.info(f"Falling back to single requests for {len(tasks)} PDBe entry features")
+    for (entry, feature), data in gather(fetch, tasks, workers):
+        result[feature][entry] = data
 
     return result
 
@@ -1,49 +1,107 @@
 import json
+import time
 import logging
 from logging import Logger
 import urllib3
-from typing import Any
+from itertools import batched
+from typing import Any, Iterable, Iterator
+
+from network import METRICS, stream, WORKERS
 
 
 LOG: Logger = logging.getLogger(__name__)
 ENDPOINT: str = "https://data.rcsb.org/graphql"
+CHUNK: int = 100  # Number of entry IDs per GraphQL request
+ATTEMPTS: int = 3  # Number of attempts per chunk
+BACKOFF: float = 2.0  # Base delay in seconds between attempts
+
+
+def chunks(
+    client: urllib3.PoolManager,
+    entries: Iterable[str],
+    query: str,
+    chunk: int = CHUNK,
+    workers: int = WORKERS,
+    attempts: int = ATTEMPTS,
+) -> Iterator[dict[str, Any]]:
+    """
+    Fetches RCSB data in chunks of entry IDs via GraphQL API and yields entries as chunks complete.
+
+    Chunks are requested in parallel and retried independently, so a failing chunk only drops
+    its own entries. The input is consumed lazily and may be a generator.
+
+    Args:
+        client (urllib3.PoolManager): The HTTP client to use for making the requests.
+        entries (Iterable[str]): PDB entry IDs.
+        query (str): GraphQL query string to execute.
+        chunk (int): Maximum number of entry IDs per request.
+        workers (int): Maximum number of concurrent requests.
+        attempts (int): Maximum number of attempts per chunk.
+
+    Yields:
+        dict[str, Any]: Metadata entries in completion order.
+    """
+
+    def fetch(ids: tuple[str, ...]) -> list[dict[str, Any]] | None:
+        payload = {"query": query, "variables": {"ids": list(ids)}}
+
+        for attempt in range(1, attempts + 1):
+            try:
+                response = client.request(method="POST", url=ENDPOINT, json=payload)
+
+                if response.status == 200:
+                    with METRICS.stage("decode/rcsb"):
+                        result = json.loads(response.data.decode("utf-8"))
+                    data = (result.get("data") or {}).get("entries")
+                    if data is not None:
+                        LOG.debug(f"Fetched RCSB chunk of {len(ids)} entries")
+                        return [entry for entry in data if entry]
+                    LOG.error(f"RCSB GraphQL API returned no data: {result.get('errors')}")
+                else:
+                    LOG.error(f"Failed to query RCSB GraphQL API: {response.status}")
+                    LOG.debug(response.data.decode("utf-8"))
+
+            except Exception as e:
+                LOG.exception("Exception occurred while querying RCSB GraphQL API")
+                LOG.error(str(e))
+
+            if attempt < attempts:
+                time.sleep(BACKOFF * 2 ** (attempt - 1))
+
+        LOG.error(f"Giving up on RCSB chunk after {attempts} attempts: {', '.join(ids)}")
+        return None
+
+    for _, result in stream(fetch, batched(entries, max(1, chunk)), workers):
+        yield from result
 
 
 def rcsb(
-    client: urllib3.PoolManager, entries: set[str], query: str
+    client: urllib3.PoolManager,
+    entries: Iterable[str],
+    query: str,
+    chunk: int = CHUNK,
+    workers: int = WORKERS,
 ) -> list[dict[str, Any]]:
     """
     Fetches detailed RCSB data for a list of PDB IDs via GraphQL API.
 
     Args:
         client (urllib3.PoolManager): The HTTP client to use for making the request.
-        entries (set[str]): Set of PDB entry IDs.
+        entries (Iterable[str]): PDB entry IDs.
         query (str): GraphQL query string to execute.
+        chunk (int): Maximum number of entry IDs per request.
+        workers (int): Maximum number of concurrent requests.
 
     Returns:
         list[dict[str, Any]]: List of metadata entries corresponding to input PDB IDs.
     """
-    LOG.info(f"Fetching RCSB metadata for {len(entries)} entries...")
+    LOG.info("Fetching RCSB metadata...")
     LOG.debug(f"Query payload: {json.dumps(query, indent=2)}")
 
-    payload = {"query": query, "variables": {"ids": list(entries)}}
-
-    try:
-        response = client.request(method="POST", url=ENDPOINT, json=payload)
-
-        if response.status == 200:
-            LOG.info("Data query successful.")
-            result = json.loads(response.data.decode("utf-8"))
-            return result.get("data", {}).get("entries", [])
-        else:
-            LOG.error(f"Failed to query RCSB GraphQL API: {response.status}")
-            LOG.error(response.data.decode("utf-8"))
-            return []
+    result = list(chunks(client, entries, query, chunk, workers))
+    LOG.info(f"Data query returned {len(result)} entries.")
 
-    except Exception as e:
-        LOG.exception("Exception occurred while querying RCSB GraphQL API")
-        LOG.error(str(e))
-        return []
+    return result
 
 
 if __name__ == "__main__":
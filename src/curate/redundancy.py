@@ -0,0 +1,259 @@
+import hashlib
+import logging
+import threading
+from logging import Logger
+from typing import Any, Literal
+
+import numpy as np
+
+
+LOG: Logger = logging.getLogger(__name__)
+IDENTITY: float = 0.95  # Sequence identity above which entries are redundant
+K: int = 5  # k-mer length, at most 6 so that a k-mer code fits 30 bits
+PERMUTATIONS: int = 128  # MinHash functions per signature
+PRIME: int = (1 << 31) - 1  # Modulus of the universal hash functions
+SEED: int = 0  # Seed of the hash functions, fixed so clusters are reproducible
+
+
+def sequences(record: dict[str, Any]) -> list[str]:
+    """
+    Extracts the canonical one-letter sequences of the polymer entities of an RCSB entry.
+
+    Args:
+        record (dict[str, Any]): RCSB GraphQL entry.
+
+    Returns:
+        list[str]: Upper-case sequences without line breaks.
+    """
+    result = []
+    for entity in record.get("polymer_entities") or []:
+        sequence = (entity.get("entity_poly") or {}).get("pdbx_seq_one_letter_code_can")
+        if sequence:
+            result.append("".join(sequence.split()).upper())
+    return result
+
+
+def jaccard(identity: float, k: int = K) -> float:
+    """
+    Estimates the k-mer Jaccard similarity of two equally long sequences at a given
+    identity, assuming substitutions are spread evenly: a k-mer survives with probability
+    identity^k.
+
+    Args:
+        identity (float): Sequence identity between 0 and 1.
+        k (int): k-mer length.
+
+    Returns:
+        float: Jaccard similarity of the k-mer sets.
+    """
+    shared = identity**k
+    return shared / (2 - shared)
+
+
+def bands(threshold: float, permutations: int = PERMUTATIONS) -> tuple[int, int]:
+    """
+    Chooses the LSH banding of a signature whose collision threshold (1/b)^(1/r) is the
+    highest one not above the Jaccard threshold, so that candidates are rarely missed.
+
+    Args:
+        threshold (float): Jaccard similarity to detect.
+        permutations (int): Signature length.
+
+    Returns:
+        tuple[int, int]: Number of bands and rows per band.
+    """
+    options = [
+        (b, permutations // b) for b in range(1, permutations + 1) if permutations % b == 0
+    ]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    return max(below, key=lambda o: (1 / o[0]) ** (1 / o[1])) if below else options[-1]
+
+
+class Index:
+    """
+    Greedy redundancy index over entry sequences. Entries are added one at a time and
+    either become the representative of a new cluster or are assigned to the cluster of an
+    earlier representative: with the same set of sequences (exact hash), or with a k-mer
+    Jaccard similarity estimated by MinHash above the identity threshold. Candidates are
+    found by locality-sensitive hashing on bands of the signatures, so each addition costs
+    about the same regardless of the number of representatives.
+    """
+
+    def __init__(
+        self,
+        identity: float = IDENTITY,
+        k: int = K,
+        permutations: int = PERMUTATIONS,
+        seed: int = SEED,
+    ) -> None:
+        """
+        Args:
+            identity (float): Sequence identity above which entries are redundant.
+            k (int): k-mer length, up to 6.
+            permutations (int): MinHash functions per signature.
+            seed (int): Seed of the hash functions.
+        """
+        if not 1 <= k <= 6:
+            raise ValueError(f"k-mer length must be between 1 and 6, got {k}")
+        self.k = k
+        self.threshold = jaccard(identity, k)
+        self.bands, self.rows = bands(self.threshold, permutations)
+        generator = np.random.default_rng(seed)
+        self.a = generator.integers(1, PRIME, permutations, dtype=np.uint64)[:, None]
+        self.b = generator.integers(0, PRIME, permutations, dtype=np.uint64)[:, None]
+        self.weights = np.uint64(1) << (5 * np.arange(k - 1, -1, -1, dtype=np.uint64))
+        self.lock = threading.Lock()
+        self.digests: dict[str, str] = dict()
+        self.signatures: dict[str, np.ndarray] = dict()
+        self.buckets: list[dict[bytes, list[str]]] = [dict() for _ in range(self.bands)]
+        self.clusters: dict[str, list[str]] = dict()
+
+    def signature(self, sequences: list[str]) -> np.ndarray | None:
+        """
+        Computes the MinHash signature of the k-mers of all sequences of an entry.
+
+        Args:
+            sequences (list[str]): Entity sequences.
+
+        Returns:
+            np.ndarray | None: Minimum hash per function, None without a single k-mer.
+        """
+        codes = []
+        for sequence in sequences:
+            if len(sequence) < self.k:
+                continue
+            # Letters as 5 bit codes, k-mers as k consecutive codes
+            letters = (np.frombuffer(sequence.encode("ascii", "replace"), np.uint8) - 64) & 31
+            windows = np.lib.stride_tricks.sliding_window_view(letters.astype(np.uint64), self.k)
+            codes.append(windows @ self.weights)
+        if not codes:
+            return None
+        kmers = np.unique(np.concatenate(codes))
+        return ((self.a * kmers + self.b) % np.uint64(PRIME)).min(axis=1)
+
+    def add(self, entry: str, sequences: list[str]) -> str | None:
+        """
+        Adds an entry to the index.
+
+        Args:
+            entry (str): Entry ID.
+            sequences (list[str]): Entity sequences of the entry.
+
+        Returns:
+            str | None: Representative the entry is redundant to, or None if the entry
+                represents a new cluster.
+        """
+        if not sequences:
+            with self.lock:
+                self.clusters[entry] = [entry]
+            return None
+
+        digest = hashlib.sha256("\n".join(sorted(sequences)).encode()).hexdigest()
+        signature = self.signature(sequences)
+        keys = (
+            [signature[i * self.rows : (i + 1) * self.rows].tobytes() for i in range(self.bands)]
+            if signature is not None
+            else []
+        )
+
+        with self.lock:
+            representative = self.digests.get(digest)
+            if representative is None and signature is not None:
+                candidates = {
+                    candidate
+                    for bucket, key in zip(self.buckets, keys)
+                    for candidate in bucket.get(key, [])
+                }
+                best = 0.0
+                for candidate in candidates:
+                    similarity = float(np.mean(self.signatures[candidate] == signature))
+                    if similarity >= self.threshold and similarity > best:
+                        representative, best = candidate, similarity
+
+            if representative is not None:
+                self.clusters[representative].append(entry)
+                return representative
+
+            self.digests[digest] = entry
+            self.clusters[entry] = [entry]
+            if signature is not None:
+                self.signatures[entry] = signature
+                for bucket, key in zip(self.buckets, keys):
+                    bucket.setdefault(key, []).append(entry)
+        return None
+
+
+def rank(record: dict[str, Any], prefer: Literal["resolution", "coverage"]) -> tuple:
+    """
+    Sort key of an entry as cluster representative, best first.
+
+    Args:
+        record (dict[str, Any]): RCSB GraphQL entry.
+        prefer (str): "resolution" for the best resolution, or "coverage" for the longest
+            deposited sequence; the other criterion breaks ties.
+
+    Returns:
+        tuple: Sort key.
+    """
+    resolutions = (record.get("rcsb_entry_info") or {}).get("resolution_combined") or []
+    resolution = min((value for value in resolutions if value is not None), default=np.inf)
+    coverage = sum(len(sequence) for sequence in sequences(record))
+    return (resolution, -coverage) if prefer == "resolution" else (-coverage, resolution)
+
+
+def redundancy(
+    records: dict[str, Any],
+    identity: float = IDENTITY,
+    prefer: Literal["resolution", "coverage"] = "resolution",
+    k: int = K,
+    permutations: int = PERMUTATIONS,
+) -> dict[str, list[str]]:
+    """
+    Clusters entries by sequence redundancy and picks one representative per cluster.
+    Entries are added to an `Index` best first, so every cluster is represented by its
+    entry with the best resolution (or the longest sequence). Entries without polymer
+    sequences are kept as their own representatives.
+
+    Args:
+        records (dict[str, Any]): RCSB GraphQL entries keyed by entry ID.
+        identity (float): Sequence identity above which entries are redundant.
+        prefer (str): "resolution" or "coverage", see `rank`.
+        k (int): k-mer length, up to 6.
+        permutations (int): MinHash functions per signature.
+
+    Returns:
+        dict[str, list[str]]: Cluster members keyed by representative, which comes first.
+    """
+    index = Index(identity, k, permutations)
+    for entry in sorted(records, key=lambda entry: (rank(records[entry], prefer), entry)):
+        index.add(entry, sequences(records[entry]))
+
+    LOG.info(
+        f"Redundancy: {len(index.clusters)} clusters of {len(records)} entries "
+        f"at {identity:.0%} identity"
+    )
+    return index.clusters
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    generator = np.random.default_rng(1)
+    alphabet = np.array(list("ACDEFGHIKLMNPQRSTVWY"))
+    base = "".join(generator.choice(alphabet, 400))
+    mutant = list(base)
+    for position in generator.choice(len(base), 8, replace=False):
+        mutant[position] = "W"
+    records = {
+        "1abc": {"polymer_entities": [{"entity_poly": {"pdbx_seq_one_letter_code_can": base}}]},
+        "2abc": {"polymer_entities": [{"entity_poly": {"pdbx_seq_one_letter_code_can": base}}]},
+        "3abc": {
+            "polymer_entities": [{"entity_poly": {"pdbx_seq_one_letter_code_can": "".join(mutant)}}],
+            "rcsb_entry_info": {"resolution_combined": [2.1]},
+        },
+        "4abc": {
+            "polymer_entities": [
+                {"entity_poly": {"pdbx_seq_one_letter_code_can": "".join(generator.choice(alphabet, 400))}}
+            ]
+        },
+    }
+    print(redundancy(records))
@@ -0,0 +1,426 @@
+import os
+import queue
+import logging
+import threading
+import urllib3
+from logging import Logger
+from typing import Any, Callable, Iterable, Iterator
+
+from network import METRICS
+from curate.rcsb import chunks
+from curate.pdbe import pdbe, CHUNK as PDBE_CHUNK
+from curate.membrane import membrane
+from curate.structure import link, manifest, plan, retrieve
+from curate.state import State
+from curate.storage import locate
+from curate.output import Writer
+from curate.features import assemble, split
+from curate.redundancy import redundancy
+
+
+LOG: Logger = logging.getLogger(__name__)
+QUEUE: int = 256  # Entries buffered between two stages
+CONCURRENCY: dict[str, int] = {
+    "structure": 8,  # Concurrent single-entry downloads
+    "pdbe": 2,  # Concurrent PDBe-KB batches
+    "membrane": 4,  # Concurrent membrane batches, each resolved concurrently itself
+}
+BATCH: int = 64  # Entries per membrane batch
+WAIT: float = 0.5  # Seconds a batching stage waits for a batch to fill
+DONE: object = object()  # End of stream marker
+
+
+class Stage:
+    """
+    Group of worker threads taking entries from a bounded inbox and passing the entries
+    that survive to the inbox of the next stage.
+
+    Workers either process one entry at a time, or batches of up to `batch` entries
+    collected for at most `wait` seconds. The end of the stream is passed on once the last
+    worker has finished.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        task: Callable[[list[str]], Iterable[str]],
+        outbox: queue.Queue | None,
+        workers: int = 1,
+        batch: int = 1,
+        wait: float = WAIT,
+        size: int = QUEUE,
+        failed: Callable[[list[str]], None] | None = None,
+    ) -> None:
+        """
+        Args:
+            name (str): Stage name, for logging and metrics.
+            task (Callable[[list[str]], Iterable[str]]): Processes a batch of entries and
+                returns the entries passed on.
+            outbox (queue.Queue | None): Inbox of the next stage, None for the last stage.
+            workers (int): Number of worker threads.
+            batch (int): Maximum number of entries per task.
+            wait (float): Seconds to wait for a batch to fill.
+            size (int): Capacity of the inbox.
+            failed (Callable[[list[str]], None] | None): Records the entries of a batch
+                whose task raised, so they are retried on the next run.
+        """
+        self.name = name
+        self.task = task
+        self.failed = failed
+        self.outbox = outbox
+        self.batch = max(1, batch)
+        self.wait = wait
+        self.inbox: queue.Queue = queue.Queue(maxsize=size)
+        self.remaining = max(1, workers)
+        self.lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self.work, name=f"{name}-{i}", daemon=True)
+            for i in range(self.remaining)
+        ]
+
+    def start(self) -> None:
+        for thread in self.threads:
+            thread.start()
+
+    def join(self) -> None:
+        for thread in self.threads:
+            thread.join()
+
+    def collect(self) -> tuple[list[str], bool]:
+        """
+        Takes the next batch from the inbox.
+
+        Returns:
+            tuple[list[str], bool]: Entries, and whether the end of the stream was reached.
+        """
+        item = self.inbox.get()
+        if item is DONE:
+            return [], True
+
+        entries = [item]
+        while len(entries) < self.batch:
+            try:
+                item = self.inbox.get(timeout=self.wait)
+            except queue.Empty:
+                break
+            if item is DONE:
+                return entries, True
+            entries.append(item)
+        return entries, False
+
+    def work(self) -> None:
+        finished = False
+        while not finished:
+            entries, finished = self.collect()
+            if not entries:
+                continue
+
+            try:
+                with METRICS.stage(self.name):
+                    survivors = list(self.task(entries))
+            except Exception as e:
+                LOG.exception(f"Exception in stage {self.name} for {len(entries)} entries")
+                LOG.error(str(e))
+                if self.failed is not None:
+                    self.failed(entries)
+                continue
+
+            if self.outbox is not None:
+                for entry in survivors:
+                    self.outbox.put(entry)
+
+        # Let the other workers of the stage see the end of the stream as well
+        self.inbox.put(DONE)
+        with self.lock:
+            self.remaining -= 1
+            last = self.remaining == 0
+        if last and self.outbox is not None:
+            self.outbox.put(DONE)
+
+
+class Scheduler:
+    """
+    Dataflow variant of `curate`: every entry moves through RCSB → structure → PDBe-KB →
+    membrane on its own, with bounded queues between the stages. Structures are downloaded
+    while metadata for later entries is still arriving, PDBe-KB and membrane data are
+    requested for the first entries while structures of later ones are downloading.
+
+    Filtering is the same as in the staged pipeline: an entry must be returned by RCSB,
+    have its structure stored, have every PDBe-KB feature, and get a membrane annotation
+    and structure from the first source in preference order. Stage output is checkpointed
+    per entry in the state store, so re-runs resume as before.
+
+    With redundancy reduction, RCSB metadata of all entries is collected first, as the
+    best representative of a cluster is only known once every member has arrived; the
+    downstream stages still overlap.
+    """
+
+    def __init__(
+        self,
+        client: urllib3.PoolManager,
+        options: dict[str, Any],
+        writer: Writer | None = None,
+        concurrency: dict[str, int] | None = None,
+        size: int = QUEUE,
+    ) -> None:
+        """
+        Args:
+            client (urllib3.PoolManager): HTTP client used to execute the data queries.
+            options (dict[str, Any]): Data section of the configuration.
+            writer (Writer | None): Output writer receiving every curated entry.
+            concurrency (dict[str, int] | None): Worker threads per stage (see CONCURRENCY).
+            size (int): Capacity of the queue in front of each stage.
+        """
+        self.client = client
+        self.options = options
+        self.writer = writer
+        self.concurrency = CONCURRENCY | (concurrency or dict())
+        self.size = size
+        self.storage = options.get("storage", "plain")
+        self.state = State(options.get("state", ":memory:"))
+        self.lock = threading.Lock()
+        self.data: dict[str, Any] = {
+            "entries": [],
+            "rcsb": {},
+            "pdbe": {feature: {} for feature in options["pdbe"]},
+            "membrane": {},
+        }
+        self.checksums: dict[str, str] = dict()
+        self.checksums_lock = threading.Lock()
+        self.records: dict[str, Any] = dict()
+        self.linked = 0
+
+    def emit(self, entry: str) -> None:
+        """
+        Writes a finished entry and the feature tracks of its polymer entities.
+
+        Args:
+            entry (str): PDB entry ID.
+        """
+        if self.writer is None:
+            return
+        pdbe = {feature: self.data["pdbe"][feature][entry] for feature in self.options["pdbe"]}
+        record = {
+            "rcsb": self.data["rcsb"][entry],
+            "pdbe": pdbe,
+            "membrane": self.data["membrane"][entry],
+        }
+        with METRICS.stage("output"):
+            self.writer.write(entry, record)
+            for entity, matrix in assemble(self.data["rcsb"][entry], pdbe).items():
+                self.writer.append(f"{entry}_{entity}", split(matrix))
+
+    def admit(self, entry: str, value: dict[str, Any], outbox: queue.Queue) -> None:
+        """
+        Passes an entry with RCSB metadata on, or holds it back for redundancy reduction.
+
+        Args:
+            entry (str): PDB entry ID.
+            value (dict[str, Any]): RCSB metadata of the entry.
+            outbox (queue.Queue): Inbox of the structure stage.
+        """
+        if self.options.get("redundancy") is not None:
+            self.records[entry] = value
+            return
+        with self.lock:
+            self.data["rcsb"][entry] = value
+        outbox.put(entry)
+
+    def rcsb(self, entries: Iterable[str], outbox: queue.Queue) -> None:
+        """
+        Source stage: requests RCSB metadata as entries arrive and passes every entry with
+        metadata on, restored ones immediately. With redundancy reduction, only the cluster
+        representatives are passed on, once the metadata of all entries has arrived.
+
+        Args:
+            entries (Iterable[str]): PDB identifiers, possibly a generator.
+            outbox (queue.Queue): Inbox of the structure stage.
+        """
+        finished = self.state.finished("rcsb")
+        seen, pending, fetched = set(), set(), set()
+
+        def incoming() -> Iterator[str]:
+            for entry in entries:
+                entry = entry.lower()
+                if entry in seen:
+                    continue
+                seen.add(entry)
+                if entry in finished:
+                    self.admit(entry, self.state.done("rcsb", [entry])[entry], outbox)
+                else:
+                    pending.add(entry)
+                    yield entry
+
+        try:
+            for value in chunks(self.client, incoming(), self.options["rcsb"]):
+                entry = value["entry"]["id"].lower()
+                self.state.save("rcsb", {entry: value})
+                fetched.add(entry)
+                self.admit(entry, value, outbox)
+
+            if self.options.get("redundancy") is not None:
+                with METRICS.stage("redundancy"):
+                    clusters = redundancy(self.records, **self.options["redundancy"])
+                LOG.info(f"Redundancy: {len(clusters)} representatives retained")
+                for entry in sorted(clusters):
+                    with self.lock:
+                        self.data["rcsb"][entry] = self.records[entry]
+                    outbox.put(entry)
+        except Exception as e:
+            # Failing input, e.g. a search page, must not pass for a complete entry set
+            LOG.exception("Exception in stage rcsb")
+            LOG.error(str(e))
+            raise
+        finally:
+            self.state.fail("rcsb", pending - fetched)
+            LOG.info(f"RCSB: {len(seen)} entries received, {len(seen - pending)} restored")
+            outbox.put(DONE)
+
+    def fail(self, stages: list[str], entries: list[str]) -> None:
+        """
+        Records entries of a batch that raised as failed for stages they are not done with.
+
+        Args:
+            stages (list[str]): State store stage names.
+            entries (list[str]): PDB entry IDs.
+        """
+        for stage in stages:
+            self.state.fail(stage, self.state.pending(stage, entries))
+
+    def structure(self, entries: list[str]) -> Iterator[str]:
+        """
+        Downloads the experimental structure of an entry unless it is stored or in the
+        local PDB mirror.
+        """
+        directory = self.options["pdb"]
+        for entry in entries:
+            path = locate(directory, entry, ".cif")
+            if path is None and self.options.get("mirror"):
+                if link(self.options["mirror"], entry, directory):
+                    path = locate(directory, entry, ".cif")
+                    with self.lock:
+                        self.linked += 1
+            if path is None:
+                task = plan("rcsb", [entry], self.storage)[0]
+                retrieve(self.client, task, directory, self.checksums, self.checksums_lock)
+                path = locate(directory, entry, ".cif")
+
+            if path is None:
+                self.state.fail("structure", [entry])
+                continue
+            self.state.save("structure", {entry: os.path.basename(path)})
+            yield entry
+
+    def pdbe(self, entries: list[str]) -> Iterator[str]:
+        """
+        Requests the PDBe-KB features of a batch of entries not checkpointed yet, per entry
+        only the features it lacks, and passes on the entries with every feature.
+        """
+        features = self.options["pdbe"]
+        groups = self.state.outstanding([f"pdbe/{feature}" for feature in features], entries)
+        for stages, pending in groups.items():
+            missing = [feature for feature in features if f"pdbe/{feature}" in stages]
+            result = pdbe(
+                self.client,
+                pending,
+                missing,
+                chunk=self.options.get("pdbe_chunk", PDBE_CHUNK),
+            )
+            for feature in missing:
+                self.state.save(f"pdbe/{feature}", result[feature])
+                self.state.fail(f"pdbe/{feature}", pending - result[feature].keys())
+
+        complete = set(entries)
+        for feature in features:
+            done = self.state.done(f"pdbe/{feature}", entries)
+            with self.lock:
+                self.data["pdbe"][feature].update(done)
+            complete &= done.keys()
+        yield from sorted(complete)
+
+    def membrane(self, entries: list[str]) -> Iterator[str]:
+        """
+        Resolves membrane data and structures for a batch of entries, restoring
+        checkpointed entries whose structure is stored, and writes the finished entries.
+        """
+        directory = self.options["tm"]
+        restored = {
+            entry: value
+            for entry, value in self.state.done("membrane", entries).items()
+            if locate(directory, entry, ".pdb") is not None
+        }
+        pending = set(entries) - restored.keys()
+
+        result = membrane(self.client, pending, directory, storage=self.storage) if pending else {}
+        processed = {
+            entry: value
+            for entry, value in result.items()
+            if locate(directory, entry, ".pdb") is not None
+        }
+        self.state.save("membrane", processed)
+        self.state.fail("membrane", pending - processed.keys())
+
+        for entry in sorted(restored.keys() | processed.keys()):
+            with self.lock:
+                self.data["membrane"][entry] = restored.get(entry, processed.get(entry))
+                self.data["entries"].append(entry)
+            self.emit(entry)
+            yield entry
+
+    def run(self, entries: Iterable[str]) -> dict[str, Any]:
+        """
+        Runs all stages concurrently until every entry has passed or dropped out.
+
+        Args:
+            entries (Iterable[str]): PDB identifiers to be curated, possibly a generator.
+
+        Returns:
+            dict[str, Any]: Curated data, see `curate`.
+        """
+        LOG.info("Starting overlapping data curation...")
+        self.checksums = manifest(self.options["pdb"])
+
+        last = Stage(
+            "membrane",
+            self.membrane,
+            None,
+            self.concurrency["membrane"],
+            batch=BATCH,
+            size=self.size,
+            failed=lambda entries: self.fail(["membrane"], entries),
+        )
+        middle = Stage(
+            "pdbe",
+            self.pdbe,
+            last.inbox,
+            self.concurrency["pdbe"],
+            batch=self.options.get("pdbe_chunk", PDBE_CHUNK),
+            size=self.size,
+            failed=lambda entries: self.fail(
+                [f"pdbe/{feature}" for feature in self.options["pdbe"]], entries
+            ),
+        )
+        first = Stage(
+            "structure/rcsb",
+            self.structure,
+            middle.inbox,
+            self.concurrency["structure"],
+            size=self.size,
+            failed=lambda entries: self.fail(["structure"], entries),
+        )
+        stages = (first, middle, last)
+        for stage in stages:
+            stage.start()
+
+        try:
+            with METRICS.stage("rcsb"):
+                self.rcsb(entries, first.inbox)
+        finally:
+            for stage in stages:
+                stage.join()
+
+        manifest(self.options["pdb"], self.checksums)
+        if self.options.get("mirror"):
+            LOG.info(f"Linked {self.linked} structures from the mirror {self.options['mirror']}")
+        LOG.info(f"Final curated set: {len(self.data['entries'])} entries")
+        return self.data
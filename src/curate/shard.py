@@ -0,0 +1,563 @@
+import os
+import json
+import time
+import hashlib
+import socket
+import sqlite3
+import logging
+import threading
+import multiprocessing
+from logging import Logger
+from typing import Any, Iterable
+
+from network import Cache, Client
+from curate import curate
+from curate.rcsb import rcsb
+from curate.state import State
+from curate.redundancy import redundancy
+from curate.output import Writer, Tracks, read, INDEX, TRACKS
+
+
+LOG: Logger = logging.getLogger(__name__)
+QUEUE: str = "queue.sqlite"  # Shard queue in the shard directory
+DOCUMENT: str = "curated.json"  # Curated data of a finished shard
+RECORDS: str = "rcsb.sqlite"  # RCSB checkpoints of the coordinator, fetched before partitioning
+SIZE: int = 500  # Entries per shard
+PROCESSES: int = 2  # Local worker processes
+LEASE: float = 900.0  # Seconds without a heartbeat after which a claimed shard is reclaimed
+POLL: float = 10.0  # Seconds between claims while other workers hold the remaining shards
+TIMEOUT: float = 60.0  # Seconds to wait for the queue's write lock
+CONNECTIONS: int = 8  # Maximum number of requests in flight per host, as in main.py
+SCHEMA: str = """
+    CREATE TABLE IF NOT EXISTS shards (
+        id INTEGER PRIMARY KEY,
+        entries TEXT NOT NULL,
+        status TEXT NOT NULL,
+        worker TEXT,
+        output TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        updated REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+"""
+
+
+class Queue:
+    """
+    Work queue of entry shards in SQLite, shared by worker processes on one or several
+    hosts through a common filesystem, without a broker.
+
+    Shards are "pending", "claimed" by a worker, "done" or "failed". A claim takes the write
+    lock (`BEGIN IMMEDIATE`), so no two workers get the same shard, and records the
+    directory the worker curates into as the shard's output. Workers renew their claim with
+    a heartbeat; a claim older than the lease is taken over, so shards of a crashed worker
+    are not lost. Only the worker still holding the claim can mark the shard done, so the
+    recorded output is always that of the finishing worker. Claims of dead processes on
+    the same host are released right away (`release`). The rollback journal is kept, as WAL
+    mode needs shared memory that network filesystems do not provide.
+    """
+
+    def __init__(self, path: str, timeout: float = TIMEOUT) -> None:
+        """
+        Args:
+            path (str): Path to the SQLite database.
+            timeout (float): Seconds to wait for another worker's write lock.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self.connection.executescript(SCHEMA)
+        LOG.debug(f"Opened shard queue at {path}")
+
+    def fill(self, shards: list[list[str]]) -> int:
+        """
+        Enqueues shards. If the queue already holds the same partition, e.g. from another
+        coordinator or an interrupted run, only its failed shards are queued again. A queue
+        of a different partition is replaced, so results of an earlier search are not merged.
+
+        Args:
+            shards (list[list[str]]): Entries per shard.
+
+        Returns:
+            int: Number of shards in the queue.
+        """
+        now = time.time()
+        digest = hashlib.sha256(json.dumps(shards).encode()).hexdigest()
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.connection.execute(
+                    "SELECT value FROM meta WHERE key = 'partition'"
+                ).fetchone()
+                (count,) = self.connection.execute("SELECT COUNT(*) FROM shards").fetchone()
+                if row is not None and row[0] == digest:
+                    self.connection.execute(
+                        "UPDATE shards SET status = 'pending', worker = NULL, updated = ? "
+                        "WHERE status = 'failed'",
+                        (now,),
+                    )
+                else:
+                    if count:
+                        LOG.warning(f"Replacing {count} shards of a different entry set")
+                    self.connection.execute("DELETE FROM shards")
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO meta VALUES ('partition', ?)", (digest,)
+                    )
+                    self.connection.executemany(
+                        "INSERT INTO shards (id, entries, status, updated) "
+                        "VALUES (?, ?, 'pending', ?)",
+                        [(i, json.dumps(entries), now) for i, entries in enumerate(shards)],
+                    )
+                    count = len(shards)
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+        return count
+
+    def claim(
+        self, worker: str, output: str, lease: float = LEASE
+    ) -> tuple[int, list[str], str | None] | None:
+        """
+        Claims the next pending shard, or a shard whose claim has expired.
+
+        Args:
+            worker (str): Worker name.
+            output (str): Directory the worker curates the shard into.
+            lease (float): Seconds after which a claim without heartbeat expires.
+
+        Returns:
+            tuple[int, list[str], str | None] | None: Shard ID, entries and the directory of
+                the previous claim if it was taken over, or None if no shard is free.
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.connection.execute(
+                    "SELECT id, entries, status, worker, output FROM shards "
+                    "WHERE status = 'pending' OR (status = 'claimed' AND updated < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (now - lease,),
+                ).fetchone()
+                if row is not None:
+                    self.connection.execute(
+                        "UPDATE shards SET status = 'claimed', worker = ?, output = ?, "
+                        "attempts = attempts + 1, updated = ? WHERE id = ?",
+                        (worker, output.format(row[0]), now, row[0]),
+                    )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        shard, entries, status, previous, directory = row
+        if status == "claimed":
+            LOG.warning(f"Claim of {previous} on shard {shard} expired, taken over by {worker}")
+        return shard, json.loads(entries), directory
+
+    def release(self, host: str) -> int:
+        """
+        Expires the claims of workers on a host whose process no longer runs, e.g. after a
+        restart, so they are taken over with their partial state at once instead of after
+        the lease. Workers are named "host:pid", see `work`.
+
+        Args:
+            host (str): Host name of the calling worker.
+
+        Returns:
+            int: Number of claims released.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, worker FROM shards WHERE status = 'claimed' AND worker LIKE ?",
+                (f"{host}:%",),
+            ).fetchall()
+
+        dead = []
+        for shard, worker in rows:
+            pid = worker.rsplit(":", 1)[1]
+            if not pid.isdigit():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                dead.append((shard, worker))
+            except PermissionError:
+                continue
+
+        with self.lock:
+            for shard, worker in dead:
+                self.connection.execute(
+                    "UPDATE shards SET updated = 0 WHERE id = ? AND worker = ? "
+                    "AND status = 'claimed'",
+                    (shard, worker),
+                )
+        if dead:
+            LOG.info(f"Released {len(dead)} claims of stopped workers on {host}")
+        return len(dead)
+
+    def beat(self, shard: int, worker: str) -> bool:
+        """
+        Renews the claim of a worker on a shard.
+
+        Returns:
+            bool: Whether the worker still holds the claim.
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE shards SET updated = ? WHERE id = ? AND worker = ? AND status = 'claimed'",
+                (time.time(), shard, worker),
+            )
+        return cursor.rowcount > 0
+
+    def finish(self, shard: int, worker: str, status: str) -> bool:
+        """
+        Marks a claimed shard "done" or "failed".
+
+        Args:
+            shard (int): Shard ID.
+            worker (str): Worker name, which must still hold the claim.
+            status (str): Final status.
+
+        Returns:
+            bool: Whether the worker held the claim, i.e. its output counts.
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE shards SET status = ?, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'claimed'",
+                (status, time.time(), shard, worker),
+            )
+        if not cursor.rowcount:
+            LOG.warning(f"Shard {shard} was taken over from {worker}, result discarded")
+        return cursor.rowcount > 0
+
+    def progress(self) -> dict[str, int]:
+        """
+        Counts the shards per status.
+
+        Returns:
+            dict[str, int]: Number of shards keyed by status.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT status, COUNT(*) FROM shards GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def finished(self) -> list[tuple[int, str]]:
+        """
+        Lists the shards that are done, in order.
+
+        Returns:
+            list[tuple[int, str]]: Shard IDs and the directories they were curated into.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, output FROM shards WHERE status = 'done' ORDER BY id"
+            ).fetchall()
+        return [(shard, output) for shard, output in rows]
+
+
+def partition(entries: Iterable[str], size: int = SIZE) -> list[list[str]]:
+    """
+    Splits entries into shards of consecutive sorted, unique identifiers, so that a
+    repeated search partitions the same entries the same way.
+
+    Args:
+        entries (Iterable[str]): PDB identifiers, possibly a generator.
+        size (int): Entries per shard.
+
+    Returns:
+        list[list[str]]: Entries per shard.
+    """
+    entries = sorted({entry.lower() for entry in entries})
+    return [entries[i : i + size] for i in range(0, len(entries), size)]
+
+
+def connect(settings: dict[str, Any]) -> Client:
+    """
+    Opens the HTTP client of a worker process.
+
+    Args:
+        settings (dict[str, Any]): Client section of the configuration, with the arguments
+            of the response cache (`Cache`) under "cache" if it is enabled.
+
+    Returns:
+        Client: HTTP client.
+    """
+    settings = dict(settings)
+    cache = settings.pop("cache", None)
+    return Client(
+        cache=Cache(**cache) if cache else None,
+        maxsize=settings.pop("connections", CONNECTIONS),
+        block=True,
+        **settings,
+    )
+
+
+def resume(source: str, target: str) -> None:
+    """
+    Copies the state store of a shard's previous claimant, so a takeover resumes from its
+    checkpoints. The SQLite backup API gives a consistent copy even if the previous worker
+    is still writing.
+
+    Args:
+        source (str): State store of the previous claim.
+        target (str): State store of the new claim.
+    """
+    if not os.path.exists(source):
+        return
+    try:
+        old, new = sqlite3.connect(source), sqlite3.connect(target)
+        try:
+            old.backup(new)
+        finally:
+            old.close()
+            new.close()
+        LOG.info(f"Resuming from the checkpoints in {source}")
+    except sqlite3.Error as e:
+        LOG.exception(f"Exception while copying the state store {source}")
+        LOG.error(str(e))
+
+
+def represent(
+    entries: Iterable[str], options: dict[str, Any], settings: dict[str, Any], directory: str
+) -> list[str]:
+    """
+    Filters redundant entries across the full entry set before it is partitioned. RCSB
+    records are checkpointed in the shard directory, so a re-run only fetches new entries
+    and workers do not fetch them again.
+
+    Args:
+        entries (Iterable[str]): PDB identifiers, possibly a generator.
+        options (dict[str, Any]): Data section of the configuration.
+        settings (dict[str, Any]): Client settings, see `connect`.
+        directory (str): Shard directory.
+
+    Returns:
+        list[str]: Cluster representatives, see `redundancy.redundancy`.
+    """
+    entries = {entry.lower() for entry in entries}
+    state = State(os.path.join(directory, RECORDS))
+    pending = state.pending("rcsb", entries)
+    if pending:
+        fetched = {
+            record["entry"]["id"].lower(): record
+            for record in rcsb(connect(settings), sorted(pending), options["rcsb"])
+        }
+        state.save("rcsb", fetched)
+        state.fail("rcsb", pending - fetched.keys())
+
+    clusters = redundancy(state.done("rcsb", entries), **options["redundancy"])
+    LOG.info(f"Sharding {len(clusters)} representatives of {len(entries)} entries")
+    return list(clusters)
+
+
+def work(
+    directory: str,
+    options: dict[str, Any],
+    settings: dict[str, Any],
+    worker: str | None = None,
+    lease: float = LEASE,
+) -> int:
+    """
+    Claims and curates shards until none is left. Each shard is curated into a directory
+    of its own per worker, with its own state store. A worker taking over an expired claim
+    starts from a copy of the previous worker's state, so the shard resumes from its
+    checkpoints, and a worker that lost its claim never writes into the new claimant's
+    directory. Claims left by stopped workers on the same host, e.g. of an interrupted
+    run, are taken over immediately rather than once their lease expires. Returns once
+    every shard is done or failed; while other workers hold the last shards, their claims
+    are watched in case they expire.
+
+    Shards only hold representatives if `shard` filtered redundant entries, so redundancy
+    filtering is off within a shard, and the RCSB records fetched by the coordinator seed
+    the shard's state store instead of being fetched again.
+
+    Args:
+        directory (str): Shard directory holding the queue, on a filesystem shared by all hosts.
+        options (dict[str, Any]): Data section of the configuration.
+        settings (dict[str, Any]): Client settings, see `connect`.
+        worker (str | None): Worker name, host name and process ID by default.
+        lease (float): Seconds after which a claim without heartbeat expires.
+
+    Returns:
+        int: Number of shards finished by this worker.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    name = "".join(c if c.isalnum() or c in "-_." else "-" for c in worker)
+    queue = Queue(os.path.join(directory, QUEUE))
+    queue.release(socket.gethostname())
+    client = connect(settings)
+    options = options | {"redundancy": None}
+    records = os.path.join(directory, RECORDS)
+    count = 0
+
+    while True:
+        claimed = queue.claim(worker, os.path.join("{:05d}", name, ""), lease)
+        if claimed is None:
+            progress = queue.progress()
+            if not progress.get("pending") and not progress.get("claimed"):
+                break
+            time.sleep(min(POLL, lease / 4))
+            continue
+
+        shard, entries, previous = claimed
+        LOG.info(f"{worker}: curating shard {shard} ({len(entries)} entries)")
+        outdir = os.path.join(directory, f"{shard:05d}", name, "")
+        os.makedirs(outdir, exist_ok=True)
+        state = os.path.join(outdir, "state.sqlite")
+        if previous is not None and os.path.join(directory, previous) != outdir:
+            resume(os.path.join(directory, previous, "state.sqlite"), state)
+        if os.path.exists(records):
+            State(state).save("rcsb", State(records).done("rcsb", entries))
+
+        # Heartbeat renewing the claim while the shard is curated
+        stop, lost = threading.Event(), threading.Event()
+
+        def heartbeat() -> None:
+            while not stop.wait(lease / 4):
+                if not queue.beat(shard, worker):
+                    LOG.warning(f"{worker}: lost claim on shard {shard}")
+                    lost.set()
+                    return
+
+        thread = threading.Thread(target=heartbeat, name=f"heartbeat-{shard}", daemon=True)
+        thread.start()
+        try:
+            with Writer(outdir) as writer:
+                data = curate(
+                    client=client,
+                    entries=entries,
+                    options=options | {"state": state},
+                    writer=writer,
+                )
+            if lost.is_set():
+                raise RuntimeError(f"Claim on shard {shard} lost while curating")
+            path = os.path.join(outdir, DOCUMENT)
+            with open(path + ".part", "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(path + ".part", path)
+            status = "done"
+        except Exception as e:
+            LOG.exception(f"Exception while curating shard {shard}")
+            LOG.error(str(e))
+            status = "failed"
+        finally:
+            stop.set()
+            thread.join()
+        if queue.finish(shard, worker, status) and status == "done":
+            count += 1
+
+    LOG.info(f"{worker}: finished {count} shards")
+    return count
+
+
+def merge(directory: str, writer: Writer | None = None) -> dict[str, Any]:
+    """
+    Merges the curated data of all finished shards into a single document, and their
+    entries and feature tracks into a writer.
+
+    Args:
+        directory (str): Shard directory holding the queue.
+        writer (Writer | None): Output writer receiving the entries of every shard.
+
+    Returns:
+        dict[str, Any]: Curated data, see `curate`.
+    """
+    queue = Queue(os.path.join(directory, QUEUE))
+    progress = queue.progress()
+    if progress.get("failed") or progress.get("pending") or progress.get("claimed"):
+        LOG.warning(f"Merging incomplete shard set: {progress}")
+
+    finished = queue.finished()
+    data: dict[str, Any] = {"entries": [], "rcsb": {}, "pdbe": {}, "membrane": {}}
+    for shard, output in finished:
+        outdir = os.path.join(directory, output)
+        with open(os.path.join(outdir, DOCUMENT), "r", encoding="utf-8") as file:
+            part = json.load(file)
+
+        data["entries"] += part["entries"]
+        data["rcsb"].update(part["rcsb"])
+        data["membrane"].update(part["membrane"])
+        for feature, values in part["pdbe"].items():
+            data["pdbe"].setdefault(feature, {}).update(values)
+
+        if writer is None:
+            continue
+        for record in read(outdir):
+            entry = record.pop("entry")
+            writer.write(entry, record)
+        if os.path.exists(os.path.join(outdir, TRACKS, INDEX)):
+            store = Tracks(outdir)
+            for key in store.entries:
+                writer.append(key, store[key])
+
+    LOG.info(f"Merged {len(finished)} shards: {len(data['entries'])} entries")
+    return data
+
+
+def shard(
+    entries: Iterable[str],
+    options: dict[str, Any],
+    settings: dict[str, Any],
+    directory: str,
+    processes: int = PROCESSES,
+    size: int = SIZE,
+    lease: float = LEASE,
+    writer: Writer | None = None,
+) -> dict[str, Any]:
+    """
+    Curates entries in shards claimed by local worker processes from a queue in
+    `directory`. Workers on other hosts join with `work` on the same directory. Once no
+    shard is left, the shards are merged into the document `curate` would return.
+
+    With `options["redundancy"]`, clusters must span all entries, not a single shard, so
+    the RCSB records of every entry are fetched and checkpointed here first (`RECORDS`),
+    and only the cluster representatives are partitioned into shards.
+
+    Args:
+        entries (Iterable[str]): PDB identifiers to be curated, possibly a generator.
+        options (dict[str, Any]): Data section of the configuration.
+        settings (dict[str, Any]): Client settings, see `connect`.
+        directory (str): Shard directory, on a filesystem shared by all hosts.
+        processes (int): Number of local worker processes.
+        size (int): Entries per shard.
+        lease (float): Seconds after which a claim without heartbeat expires.
+        writer (Writer | None): Output writer receiving the merged entries.
+
+    Returns:
+        dict[str, Any]: Curated data including RCSB, PDBe-KB, membrane data, as well as the final entry list.
+    """
+    os.makedirs(directory, exist_ok=True)
+    if options.get("redundancy") is not None:
+        entries = represent(entries, options, settings, directory)
+    count = Queue(os.path.join(directory, QUEUE)).fill(partition(entries, size))
+    LOG.info(f"Curating {count} shards with {processes} local workers...")
+
+    # Spawned, so workers do not inherit the parent's connections and threads
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(
+            target=work,
+            args=(directory, options, settings, None, lease),
+            name=f"shard-worker-{i}",
+        )
+        for i in range(max(1, processes))
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+    return merge(directory, writer)
+
@@ -0,0 +1,267 @@
+import os
+import gzip
+import sqlite3
+import logging
+import argparse
+import threading
+from logging import Logger
+from typing import Iterable, Iterator
+
+
+LOG: Logger = logging.getLogger(__name__)
+SOURCE: str = "pdb_chain_uniprot.tsv.gz"  # Bulk SIFTS mapping, ftp.ebi.ac.uk/pub/databases/msd/sifts/flatfiles/tsv/
+STORE: str = "sifts.sqlite"  # Indexed mapping store in the output directory
+MODEL: str = "AF-{}-F1"  # AlphaFold DB model ID of a UniProt accession
+BATCH: int = 100_000  # Rows inserted per statement batch
+CHUNK: int = 500  # Identifiers per lookup query
+COLUMNS: tuple[str, ...] = (
+    "entry",
+    "chain",
+    "accession",
+    "res_beg",
+    "res_end",
+    "pdb_beg",
+    "pdb_end",
+    "sp_beg",
+    "sp_end",
+)
+SCHEMA: str = """
+    CREATE TABLE mapping (
+        entry TEXT NOT NULL,
+        chain TEXT NOT NULL,
+        accession TEXT NOT NULL,
+        res_beg INTEGER,
+        res_end INTEGER,
+        pdb_beg TEXT,
+        pdb_end TEXT,
+        sp_beg INTEGER,
+        sp_end INTEGER
+    );
+"""
+INSERT: str = f"INSERT INTO mapping VALUES ({', '.join('?' * len(COLUMNS))})"
+INDICES: str = """
+    CREATE INDEX mapping_entry ON mapping (entry, chain);
+    CREATE INDEX mapping_accession ON mapping (accession, entry);
+"""
+
+
+def number(value: str) -> int | None:
+    """
+    Parses a residue number, None if the field is empty or carries an insertion code.
+    """
+    return int(value) if value.lstrip("-").isdigit() else None
+
+
+def rows(source: str) -> Iterator[tuple]:
+    """
+    Streams the segments of a SIFTS `pdb_chain_uniprot` file, plain or gzipped.
+
+    Args:
+        source (str): Path to the TSV file.
+
+    Yields:
+        tuple: Entry (lower case), chain, accession and residue ranges of a segment.
+    """
+    opener = gzip.open if source.endswith(".gz") else open
+    with opener(source, "rt", encoding="utf-8") as file:
+        for line in file:
+            # Skip the timestamp comment and the header
+            if line.startswith("#") or line.startswith("PDB\t"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < len(COLUMNS):
+                continue
+            entry, chain, accession, res_beg, res_end, pdb_beg, pdb_end, sp_beg, sp_end = fields[:9]
+            yield (
+                entry.lower(),
+                chain,
+                accession,
+                number(res_beg),
+                number(res_end),
+                pdb_beg,
+                pdb_end,
+                number(sp_beg),
+                number(sp_end),
+            )
+
+
+def sifts(source: str, path: str, batch: int = BATCH) -> int:
+    """
+    Ingests the bulk SIFTS `pdb_chain_uniprot` mapping into an indexed SQLite store. The
+    store is built next to the target and renamed into place, so readers never see a
+    partial index. Indices on both identifiers make lookups in either direction O(log n).
+
+    Args:
+        source (str): Path to the SIFTS TSV file, plain or gzipped.
+        path (str): Path to the SQLite store.
+        batch (int): Rows inserted per statement batch.
+
+    Returns:
+        int: Number of segments ingested.
+    """
+    LOG.info(f"Ingesting SIFTS mapping from {source}...")
+    partial = f"{path}.{os.getpid()}.part"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    connection = sqlite3.connect(partial)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(SCHEMA)
+
+        count, buffer = 0, []
+        for row in rows(source):
+            buffer.append(row)
+            if len(buffer) >= batch:
+                connection.executemany(INSERT, buffer)
+                count += len(buffer)
+                buffer = []
+        connection.executemany(INSERT, buffer)
+        count += len(buffer)
+
+        # Indices are built once after loading, which is faster than maintaining them
+        connection.executescript(INDICES)
+        connection.commit()
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+    os.replace(partial, path)
+    LOG.info(f"Ingested {count} SIFTS segments into {path}")
+    return count
+
+
+class Mapping:
+    """
+    Read-only lookups between PDB entries, UniProt accessions and AlphaFold DB models in a
+    store built by `sifts`, without network calls.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): Path to the SQLite store.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"SIFTS mapping store not found: {path}")
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        LOG.debug(f"Opened SIFTS mapping at {path}")
+
+    def select(self, column: str, values: Iterable[str], target: str) -> dict[str, list[str]]:
+        """
+        Looks up the distinct values of a target column for values of an indexed column.
+
+        Args:
+            column (str): Indexed column, "entry" or "accession".
+            values (Iterable[str]): Values to look up.
+            target (str): Column to return.
+
+        Returns:
+            dict[str, list[str]]: Sorted target values keyed by looked up value, for values found.
+        """
+        values = sorted(set(values))
+        result: dict[str, list[str]] = dict()
+        for i in range(0, len(values), CHUNK):
+            chunk = values[i : i + CHUNK]
+            with self.lock:
+                found = self.connection.execute(
+                    f"SELECT DISTINCT {column}, {target} FROM mapping "
+                    f"WHERE {column} IN ({', '.join('?' * len(chunk))}) "
+                    f"ORDER BY {column}, {target}",
+                    chunk,
+                ).fetchall()
+            for key, value in found:
+                result.setdefault(key, []).append(value)
+        return result
+
+    def uniprot(self, entries: Iterable[str]) -> dict[str, list[str]]:
+        """
+        Maps PDB entries to the UniProt accessions of their chains.
+
+        Args:
+            entries (Iterable[str]): PDB entry IDs.
+
+        Returns:
+            dict[str, list[str]]: Accessions keyed by entry (lower case).
+        """
+        return self.select("entry", (entry.lower() for entry in entries), "accession")
+
+    def pdb(self, accessions: Iterable[str]) -> dict[str, list[str]]:
+        """
+        Maps UniProt accessions to the PDB entries covering them.
+
+        Args:
+            accessions (Iterable[str]): UniProt accessions.
+
+        Returns:
+            dict[str, list[str]]: Entries keyed by accession.
+        """
+        return self.select("accession", (accession.upper() for accession in accessions), "entry")
+
+    def group(self, entries: Iterable[str]) -> dict[str, list[str]]:
+        """
+        Groups PDB entries by UniProt accession. Entries with several accessions, e.g.
+        complexes, appear in each group.
+
+        Args:
+            entries (Iterable[str]): PDB entry IDs.
+
+        Returns:
+            dict[str, list[str]]: Entries keyed by accession.
+        """
+        groups: dict[str, list[str]] = dict()
+        for entry, accessions in self.uniprot(entries).items():
+            for accession in accessions:
+                groups.setdefault(accession, []).append(entry)
+        return groups
+
+    def chains(self, entry: str) -> list[dict[str, str | int | None]]:
+        """
+        Lists the UniProt segments of the chains of an entry.
+
+        Args:
+            entry (str): PDB entry ID.
+
+        Returns:
+            list[dict[str, str | int | None]]: Segments with chain, accession and residue
+                ranges in SEQRES, author and UniProt numbering.
+        """
+        with self.lock:
+            found = self.connection.execute(
+                "SELECT * FROM mapping WHERE entry = ? ORDER BY chain, sp_beg", (entry.lower(),)
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in found]
+
+    def alphafold(self, entries: Iterable[str]) -> dict[str, list[str]]:
+        """
+        Maps PDB entries to the AlphaFold DB models of their UniProt accessions.
+
+        Args:
+            entries (Iterable[str]): PDB entry IDs.
+
+        Returns:
+            dict[str, list[str]]: AlphaFold model IDs keyed by entry.
+        """
+        return {
+            entry: [MODEL.format(accession) for accession in accessions]
+            for entry, accessions in self.uniprot(entries).items()
+        }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    results = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../results/")
+    parser = argparse.ArgumentParser(description="Ingest the SIFTS PDB to UniProt mapping.")
+    parser.add_argument("source", nargs="?", default=os.path.join(results, SOURCE))
+    parser.add_argument("--output", default=os.path.join(results, STORE))
+    arguments = parser.parse_args()
+
+    sifts(arguments.source, arguments.output)
+    mapping = Mapping(arguments.output)
+    print(mapping.uniprot(["1a0s", "6xdc"]))
+    print(mapping.alphafold(["1a0s"]))
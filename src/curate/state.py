@@ -0,0 +1,150 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from logging import Logger
+from typing import Any, Iterable
+
+
+LOG: Logger = logging.getLogger(__name__)
+SCHEMA: str = """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        stage TEXT NOT NULL,
+        entry TEXT NOT NULL,
+        status TEXT NOT NULL,
+        data TEXT,
+        updated REAL NOT NULL,
+        PRIMARY KEY (stage, entry)
+    );
+"""
+
+
+class State:
+    """
+    Checkpoint store recording the per-entry output of each curation stage in SQLite.
+
+    Entries are either "done", with their stage output, or "failed". A re-run only needs to
+    process the entries of a stage that are not done yet.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        """
+        Args:
+            path (str): Path to the SQLite database, in memory by default.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        LOG.debug(f"Opened curation state at {path}")
+
+    def done(self, stage: str, entries: Iterable[str] | None = None) -> dict[str, Any]:
+        """
+        Loads the checkpointed output of a stage.
+
+        Args:
+            stage (str): Stage name.
+            entries (Iterable[str] | None): Restrict the result to these entries.
+
+        Returns:
+            dict[str, Any]: Stage output keyed by entry.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT entry, data FROM checkpoints WHERE stage = ? AND status = 'done'",
+                (stage,),
+            ).fetchall()
+
+        result = {entry: json.loads(data) for entry, data in rows}
+        if entries is not None:
+            result = {entry: result[entry] for entry in entries if entry in result}
+        return result
+
+    def finished(self, stage: str) -> set[str]:
+        """
+        Lists the entries with a successful checkpoint for a stage, without loading their output.
+
+        Args:
+            stage (str): Stage name.
+
+        Returns:
+            set[str]: Entries done.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT entry FROM checkpoints WHERE stage = ? AND status = 'done'", (stage,)
+            ).fetchall()
+        return {entry for (entry,) in rows}
+
+    def pending(self, stage: str, entries: Iterable[str]) -> set[str]:
+        """
+        Selects the entries of a stage that are new or failed.
+
+        Args:
+            stage (str): Stage name.
+            entries (Iterable[str]): Candidate entries.
+
+        Returns:
+            set[str]: Entries without a successful checkpoint.
+        """
+        return set(entries) - self.finished(stage)
+
+    def outstanding(
+        self, stages: Iterable[str], entries: Iterable[str]
+    ) -> dict[frozenset[str], set[str]]:
+        """
+        Groups entries by the stages they are still pending for, so that each entry is only
+        processed again for those stages.
+
+        Args:
+            stages (Iterable[str]): Stage names.
+            entries (Iterable[str]): Candidate entries.
+
+        Returns:
+            dict[frozenset[str], set[str]]: Pending entries keyed by their pending stages.
+        """
+        entries = set(entries)
+        finished = {stage: self.finished(stage) for stage in stages}
+        groups: dict[frozenset[str], set[str]] = dict()
+        for entry in entries:
+            pending = frozenset(stage for stage, done in finished.items() if entry not in done)
+            if pending:
+                groups.setdefault(pending, set()).add(entry)
+        return groups
+
+    def save(self, stage: str, results: dict[str, Any]) -> None:
+        """
+        Checkpoints successful stage output per entry.
+
+        Args:
+            stage (str): Stage name.
+            results (dict[str, Any]): Stage output keyed by entry.
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, 'done', ?, ?)",
+                [(stage, entry, json.dumps(data), now) for entry, data in results.items()],
+            )
+            self.connection.commit()
+        LOG.debug(f"Checkpointed {len(results)} entries for stage '{stage}'")
+
+    def fail(self, stage: str, entries: Iterable[str]) -> None:
+        """
+        Records entries that failed a stage, so they are retried on the next run. Entries
+        already done keep their checkpoint.
+
+        Args:
+            stage (str): Stage name.
+            entries (Iterable[str]): Failed entries.
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT INTO checkpoints VALUES (?, ?, 'failed', NULL, ?) "
+                "ON CONFLICT (stage, entry) DO UPDATE SET status = 'failed', data = NULL, "
+                "updated = excluded.updated WHERE status != 'done'",
+                [(stage, entry, now) for entry in entries],
+            )
+            self.connection.commit()
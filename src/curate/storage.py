@@ -0,0 +1,210 @@
+import os
+import gzip
+import shutil
+import logging
+from logging import Logger
+from typing import Any, Literal
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # BinaryCIF support is optional
+    msgpack = None
+
+try:
+    import foldcomp
+except ImportError:  # Foldcomp support is optional
+    foldcomp = None
+
+
+LOG: Logger = logging.getLogger(__name__)
+Storage = Literal["plain", "gzip", "bcif", "foldcomp"]
+SUFFIXES: dict[str, dict[str, str]] = {
+    ".cif": {"plain": ".cif", "gzip": ".cif.gz", "bcif": ".bcif", "foldcomp": ".fcz"},
+    ".pdb": {"plain": ".pdb", "gzip": ".pdb.gz", "foldcomp": ".fcz"},
+}
+BYTES: dict[int, str] = {
+    1: "<i1", 2: "<i2", 3: "<i4", 4: "<u1", 5: "<u2", 6: "<u4", 32: "<f4", 33: "<f8"
+}
+
+
+def suffix(kind: str, storage: Storage = "plain") -> str:
+    """
+    Resolves the file suffix of a structure format in a storage mode.
+
+    Args:
+        kind (str): Uncompressed format suffix, ".cif" or ".pdb".
+        storage (Storage): Storage mode.
+
+    Returns:
+        str: File suffix, falling back to gzip where the mode does not apply to the format.
+    """
+    if storage not in SUFFIXES[kind]:
+        LOG.warning(f"Storage mode '{storage}' unsupported for {kind} files, using gzip")
+        storage = "gzip"
+    return SUFFIXES[kind][storage]
+
+
+def stored(directory: str, kind: str) -> set[str]:
+    """
+    Lists the entries with a structure file of a format in a directory, in any storage mode.
+
+    Args:
+        directory (str): Structure directory.
+        kind (str): Uncompressed format suffix, ".cif" or ".pdb".
+
+    Returns:
+        set[str]: Lower-case entry IDs with a structure file.
+    """
+    suffixes = sorted(SUFFIXES[kind].values(), key=len, reverse=True)
+    entries = set()
+    for file in os.listdir(directory):
+        for ending in suffixes:
+            if file.endswith(ending):
+                entries.add(file.removesuffix(ending).lower())
+                break
+    return entries
+
+
+def locate(directory: str, entry: str, kind: str) -> str | None:
+    """
+    Finds the structure file of an entry in a directory, in any storage mode.
+
+    Args:
+        directory (str): Structure directory.
+        entry (str): Entry ID.
+        kind (str): Uncompressed format suffix, ".cif" or ".pdb".
+
+    Returns:
+        str | None: Path to the structure file, or None if there is none.
+    """
+    for ending in SUFFIXES[kind].values():
+        for name in (entry.lower(), entry.upper(), entry):
+            path = os.path.join(directory, f"{name}{ending}")
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def compress(source: str, target: str) -> None:
+    """
+    Compresses a plain structure file into the storage mode given by the target suffix.
+    The target is written atomically and the source removed afterwards.
+
+    Args:
+        source (str): Path to the plain mmCIF or PDB file.
+        target (str): Path to the compressed file (".gz" or ".fcz").
+    """
+    partial = target + ".part"
+
+    if target.endswith(".gz"):
+        with open(source, "rb") as file, gzip.open(partial, "wb") as output:
+            shutil.copyfileobj(file, output)
+    elif target.endswith(".fcz"):
+        if foldcomp is None:
+            raise ImportError("foldcomp is required for the 'foldcomp' storage mode")
+        with open(source, "r", encoding="utf-8") as file:
+            data = foldcomp.compress(os.path.basename(target), file.read())
+        with open(partial, "wb") as output:
+            output.write(data)
+    else:
+        raise ValueError(f"Unsupported compression target: {target}")
+
+    os.replace(partial, target)
+    os.remove(source)
+
+
+def read(path: str) -> str:
+    """
+    Reads a plain, gzip or Foldcomp compressed mmCIF/PDB file as text.
+
+    Args:
+        path (str): Path to the structure file.
+
+    Returns:
+        str: File content in mmCIF or PDB format.
+    """
+    if path.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            return file.read()
+    if path.endswith(".fcz"):
+        if foldcomp is None:
+            raise ImportError("foldcomp is required to read .fcz files")
+        with open(path, "rb") as file:
+            _, text = foldcomp.decompress(file.read())
+        return text
+    if path.endswith(".bcif"):
+        raise ValueError(f"BinaryCIF has no text form, use decode(): {path}")
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def unpack(data: Any, encodings: list[dict[str, Any]]) -> Any:
+    """
+    Reverses the chain of BinaryCIF encodings applied to a column.
+
+    Args:
+        data (Any): Encoded column data.
+        encodings (list[dict[str, Any]]): Encodings in the order they were applied.
+
+    Returns:
+        Any: Decoded values as a NumPy array (or list of strings for string columns).
+    """
+    for encoding in reversed(encodings):
+        match encoding["kind"]:
+            case "ByteArray":
+                data = np.frombuffer(data, dtype=BYTES[encoding["type"]])
+            case "FixedPoint":
+                data = data.astype(np.float64) / encoding["factor"]
+            case "IntervalQuantization":
+                step = (encoding["max"] - encoding["min"]) / (encoding["numSteps"] - 1)
+                data = encoding["min"] + step * data.astype(np.float64)
+            case "RunLength":
+                data = np.repeat(data[0::2], data[1::2])
+            case "Delta":
+                data = np.cumsum(data.astype(np.int64)) + encoding["origin"]
+            case "IntegerPacking":
+                data = data.astype(np.int64)
+                bits = 8 * encoding["byteCount"] - (0 if encoding["isUnsigned"] else 1)
+                limit = (1 << bits) - 1
+                carry = (data == limit) | (data == -limit - 1)
+                ends = np.flatnonzero(~carry)
+                starts = np.concatenate(([0], ends[:-1] + 1)).astype(np.intp)
+                data = np.add.reduceat(data, starts) if len(ends) else data[:0]
+            case "StringArray":
+                offsets = unpack(encoding["offsets"], encoding["offsetEncoding"])
+                text = encoding["stringData"]
+                strings = [text[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+                indices = unpack(data, encoding["dataEncoding"])
+                data = [strings[i] if i >= 0 else "" for i in indices]
+            case kind:
+                raise ValueError(f"Unsupported BinaryCIF encoding: {kind}")
+    return data
+
+
+def decode(path: str) -> dict[str, dict[str, Any]]:
+    """
+    Decodes the first data block of a BinaryCIF file into columns.
+
+    Args:
+        path (str): Path to a .bcif or .bcif.gz file.
+
+    Returns:
+        dict[str, dict[str, Any]]: Columns keyed by category (e.g. "_atom_site") and column name.
+    """
+    if msgpack is None:
+        raise ImportError("msgpack is required to read BinaryCIF files")
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as file:
+        content = msgpack.unpackb(file.read(), raw=False)
+
+    block = content["dataBlocks"][0]
+    return {
+        category["name"]: {
+            column["name"]: unpack(column["data"]["data"], column["data"]["encoding"])
+            for column in category["columns"]
+        }
+        for category in block["categories"]
+    }
@@ -1,17 +1,323 @@
 import os
+import fcntl
+import hashlib
 import logging
+import threading
 import urllib3
-from Bio.PDB import PDBList, alphafold_db
 from logging import Logger
 from typing import Literal, Any
 
+from network import gather, WORKERS
+from curate.storage import Storage, compress, locate, suffix
+
 
 LOG: Logger = logging.getLogger(__name__)
 ENDPOINTS: dict[str, str] = {
+    "rcsb": "https://files.rcsb.org/download/{}.cif",
+    "bcif": "https://models.rcsb.org/{}.bcif",
     "memprotmd": "https://memprotmd.bioch.ox.ac.uk/data/memprotmd/simulations/{}/files/structures/at.pdb",
     "pdbtm": "https://pdbtm.unitmp.org/api/v1/entry/{}.trpdb",
     "opm": "https://biomembhub.org/shared/opm-assets/pdb/{}.pdb",
 }
+CHUNK: int = 1 << 16  # Bytes per streamed read
+PARTIAL: str = ".part"  # Suffix of incomplete downloads
+STAGING: str = ".download"  # Suffix of downloads awaiting compression
+CHECKSUMS: str = "SHA256SUMS"  # Checksum manifest in each output directory
+LOCK: threading.Lock = threading.Lock()  # Serialises manifest writes within the process
+MIRROR: str = "mmCIF/{}/{}.cif.gz"  # Divided layout of a PDB mirror, by the middle two characters
+
+
+def checksum(filename: str) -> str:
+    """
+    Computes the SHA-256 digest of a file.
+
+    Args:
+        filename (str): Path to the file.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest(outdir: str, checksums: dict[str, str] | None = None) -> dict[str, str]:
+    """
+    Reads or atomically writes the checksum manifest of a directory (`sha256sum` format).
+    Writes are merged into the manifest on disk under a lock file, so concurrent downloads
+    into the same directory, also from other processes or hosts, do not drop each other's
+    digests.
+
+    Args:
+        outdir (str): Directory containing the manifest.
+        checksums (dict[str, str] | None): Digests keyed by file name to write, or None to read.
+
+    Returns:
+        dict[str, str]: Digests keyed by file name.
+    """
+    path = os.path.join(outdir, CHECKSUMS)
+
+    if checksums is None:
+        if not os.path.exists(path):
+            return dict()
+        with open(path, "r", encoding="utf-8") as file:
+            lines = [line.rstrip("\n").split("  ", 1) for line in file if line.strip()]
+            return {name: digest for digest, name in lines}
+
+    partial = f"{path}.{os.getpid()}{PARTIAL}"
+    with LOCK, open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        merged = manifest(outdir) | checksums
+        with open(partial, "w", encoding="utf-8") as file:
+            for name, digest in sorted(merged.items()):
+                file.write(f"{digest}  {name}\n")
+        os.replace(partial, path)
+    return merged
+
+
+def download(client: urllib3.PoolManager, url: str, filename: str) -> str | None:
+    """
+    Streams a file to disk in chunks, resuming a previous partial download if present.
+
+    The body is written to a temporary file that is validated against the announced size
+    and only then renamed to its final name, so incomplete files never appear in place.
+
+    Args:
+        client (urllib3.PoolManager): HTTP client for external requests.
+        url (str): URL of the file.
+        filename (str): Destination path.
+
+    Returns:
+        str | None: SHA-256 digest of the downloaded file, or None on failure.
+    """
+    partial = filename + PARTIAL
+    offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+
+    try:
+        response = client.request(
+            method="GET", url=url, headers=headers, preload_content=False
+        )
+        try:
+            match response.status:
+                case 206:
+                    LOG.debug(f"Resuming {filename} at byte {offset}")
+                    mode = "ab"
+                case 200:
+                    offset, mode = 0, "wb"
+                case 416:
+                    LOG.warning(f"Discarding unusable partial download {partial}")
+                    os.remove(partial)
+                    return download(client, url, filename)
+                case _:
+                    LOG.error(f"Failed to download {url}: {response.status}")
+                    return None
+
+            length = response.headers.get("Content-Length")
+            expected = offset + int(length) if length is not None else None
+
+            with open(partial, mode) as file:
+                for chunk in response.stream(CHUNK, decode_content=False):
+                    file.write(chunk)
+
+        finally:
+            response.release_conn()
+
+        size = os.path.getsize(partial)
+        if expected is not None and size != expected:
+            LOG.error(f"Incomplete download of {url}: {size} of {expected} bytes")
+            if size > expected:
+                os.remove(partial)
+            return None
+
+        digest = checksum(partial)
+        os.replace(partial, filename)
+        LOG.info(f"Downloaded: {filename}")
+        return digest
+
+    except Exception as e:
+        LOG.exception(f"Exception during download of {url}")
+        LOG.error(str(e))
+        return None
+
+
+def link(directory: str, entry: str, outdir: str) -> bool:
+    """
+    Links the mmCIF file of an entry from a local PDB mirror into a directory, as a hard
+    link or, across filesystems, as a symbolic link.
+
+    Args:
+        directory (str): Root of the mirror, containing the divided `mmCIF/` tree.
+        entry (str): Lower-case PDB entry ID.
+        outdir (str): Directory to link the file into.
+
+    Returns:
+        bool: Whether the file is linked, now or before.
+    """
+    source = os.path.join(directory, MIRROR.format(entry[1:3], entry))
+    if not os.path.exists(source):
+        return False
+    target = os.path.join(outdir, f"{entry}.cif.gz")
+    try:
+        try:
+            os.link(source, target)
+        except OSError:
+            os.symlink(os.path.abspath(source), target)
+        return True
+    except FileExistsError:
+        return True
+    except OSError as e:
+        LOG.exception(f"Exception while linking {source}")
+        LOG.error(str(e))
+        return False
+
+
+def mirror(directory: str, entries: list[str], outdir: str) -> set[str]:
+    """
+    Links the mmCIF files of entries from a local PDB mirror into a directory (`link`).
+    Files are linked gzip compressed as in the mirror, which every reader accepts
+    regardless of the storage mode.
+
+    Args:
+        directory (str): Root of the mirror, containing the divided `mmCIF/` tree.
+        entries (list[str]): PDB entry IDs.
+        outdir (str): Directory to link the files into.
+
+    Returns:
+        set[str]: Lower-case entries stored in the directory, linked or present before.
+    """
+    linked = set()
+    for entry in entries:
+        entry = entry.lower()
+        if locate(outdir, entry, ".cif") is not None or link(directory, entry, outdir):
+            linked.add(entry)
+
+    LOG.info(f"Linked {len(linked)} of {len(entries)} structures from the mirror {directory}")
+    return linked
+
+
+def plan(
+    method: Literal["rcsb", "alphafold", "memprotmd", "pdbtm", "opm"],
+    entries: list[Any],
+    storage: Storage = "plain",
+) -> list[tuple[str, str, bool]] | None:
+    """
+    Builds the download tasks of a structure source for a storage mode.
+
+    Args:
+        method (str): One of 'rcsb', 'alphafold', 'memprotmd', 'pdbtm', or 'opm'.
+        entries (list[Any]): Structure identifiers (AlphaFold predictions for 'alphafold').
+        storage (Storage): One of 'plain', 'gzip', 'bcif' or 'foldcomp'.
+
+    Returns:
+        list[tuple[str, str, bool]] | None: Tuples of URL, file name and whether the
+            download is compressed locally, or None for an unknown method.
+    """
+    match method, storage:
+        case "rcsb", "bcif":
+            tasks = [
+                (ENDPOINTS["bcif"].format(entry.lower()), f"{entry.lower()}.bcif", False)
+                for entry in entries
+            ]
+        case "rcsb", "plain":
+            tasks = [
+                (ENDPOINTS[method].format(entry.upper()), f"{entry.lower()}.cif", False)
+                for entry in entries
+            ]
+        case "rcsb", _:
+            tasks = [
+                (
+                    ENDPOINTS[method].format(entry.upper()) + ".gz",
+                    f"{entry.lower()}.cif.gz",
+                    False,
+                )
+                for entry in entries
+            ]
+        case "alphafold", "bcif":
+            tasks = [
+                (entry["bcifUrl"], f"{entry['entryId']}.bcif", False) for entry in entries
+            ]
+        case "alphafold", "foldcomp":
+            tasks = [
+                (entry["pdbUrl"], f"{entry['entryId']}.fcz", True) for entry in entries
+            ]
+        case "alphafold", _:
+            ending = suffix(".cif", storage)
+            tasks = [
+                (entry["cifUrl"], f"{entry['entryId']}{ending}", storage != "plain")
+                for entry in entries
+            ]
+        case "memprotmd" | "pdbtm" | "opm", _:
+            ending = suffix(".pdb", "plain" if storage == "plain" else "gzip")
+            tasks = [
+                (ENDPOINTS[method].format(entry), f"{entry[:4]}{ending}", storage != "plain")
+                for entry in entries
+            ]
+        case _:
+            LOG.error(f"Unknown structure method: '{method}'")
+            return None
+
+    return tasks
+
+
+def retrieve(
+    client: urllib3.PoolManager,
+    task: tuple[str, str, bool],
+    outdir: str,
+    checksums: dict[str, str],
+    lock: threading.Lock,
+    verify: bool = False,
+) -> str | None:
+    """
+    Downloads (and compresses) a single structure file unless it is already present, and
+    records its digest in the checksums.
+
+    Args:
+        client (urllib3.PoolManager): HTTP client for external requests.
+        task (tuple[str, str, bool]): Download task from `plan`.
+        outdir (str): Directory to save the file to.
+        checksums (dict[str, str]): Digests by file name, from `manifest`.
+        lock (threading.Lock): Guards the checksums between concurrent downloads.
+        verify (bool): Validate an existing file against its recorded checksum.
+
+    Returns:
+        str | None: SHA-256 digest of the file, or None on failure.
+    """
+    url, name, compressed = task
+    filename = os.path.join(outdir, name)
+
+    if os.path.exists(filename):
+        if not verify or name not in checksums:
+            LOG.info(f"{filename} already exists, skipping.")
+            return checksums.get(name)
+        if checksum(filename) == checksums[name]:
+            LOG.debug(f"{filename} matches its checksum, skipping.")
+            return checksums[name]
+        LOG.warning(f"{filename} does not match its checksum, downloading again.")
+        os.remove(filename)
+
+    if not compressed:
+        digest = download(client, url, filename)
+    elif download(client, url, filename + STAGING) is not None:
+        try:
+            compress(filename + STAGING, filename)
+            digest = checksum(filename)
+        except Exception as e:
+            LOG.exception(f"Exception while compressing {filename}")
+            LOG.error(str(e))
+            digest = None
+    else:
+        digest = None
+
+    if digest is not None:
+        with lock:
+            checksums[name] = digest
+    return digest
 
 
 def structure(
@@ -19,57 +325,54 @@ def structure(
     method: Literal["rcsb", "alphafold", "memprotmd", "pdbtm", "opm"],
     entries: list[Any],
     outdir: str,
+    workers: int = WORKERS,
+    verify: bool = False,
+    storage: Storage = "plain",
+    local: str | None = None,
 ) -> None:
     """
     Downloads structure files from various sources based on the specified method.
 
+    Files are downloaded in parallel and their SHA-256 digests recorded in a manifest in
+    the output directory. Existing files are skipped, unless `verify` is set and they do
+    not match the manifest.
+
+    Structures are stored according to `storage`: "gzip" keeps gzip compressed mmCIF/PDB
+    files, "bcif" BinaryCIF for RCSB and AlphaFold entries and "foldcomp" Foldcomp archives
+    for AlphaFold models. Combinations a source does not support fall back to gzip.
+
+    With a local PDB mirror, RCSB entries it holds are linked from it (see `mirror`) and
+    only the others are downloaded.
+
     Args:
         client (urllib3.PoolManager): HTTP client for external requests.
         method (str): One of 'rcsb', 'alphafold', 'memprotmd', 'pdbtm', or 'opm'.
-        entries (list[Any]): List of structure identifiers to download.
+        entries (list[Any]): List of structure identifiers to download (AlphaFold predictions for 'alphafold').
         outdir (str): Directory to save downloaded files.
+        workers (int): Maximum number of concurrent downloads.
+        verify (bool): Validate existing files against the checksum manifest.
+        storage (Storage): One of 'plain', 'gzip', 'bcif' or 'foldcomp'.
+        local (str | None): Root of a local PDB mirror in the divided layout.
     """
     os.makedirs(outdir, exist_ok=True)
+    if method == "rcsb" and local is not None:
+        linked = mirror(local, entries, outdir)
+        entries = [entry for entry in entries if entry.lower() not in linked]
+        if not entries:
+            return
+
     LOG.info(
         f"Downloading {len(entries)} structures using '{method}' method to '{outdir}'..."
     )
 
-    match method:
-        case "rcsb":
-            pdbl = PDBList(verbose=False)
-            pdbl.download_pdb_files(pdb_codes=entries, pdir=outdir, file_format="mmCif")
-
-        case "alphafold":
-            for entry in entries:
-                alphafold_db.download_cif_for(entry, outdir)
-
-        case "memprotmd" | "pdbtm" | "opm":
-            for entry in entries:
-                filename = os.path.join(outdir, f"{entry[:4]}.pdb")
-                if os.path.exists(filename):
-                    LOG.info(f"{filename} already exists, skipping.")
-                    continue
-
-                try:
-                    response = client.request(
-                        method="GET", url=ENDPOINTS[method].format(entry)
-                    )
-                    if response.status == 200:
-                        with open(filename, "w", encoding="utf-8") as file:
-                            file.write(response.data.decode("utf-8"))
-                        LOG.info(f"Downloaded: {filename}")
-                    else:
-                        LOG.error(
-                            f"Failed to download {method} structure for {entry}: {response.status}"
-                        )
-                        LOG.debug(response.data.decode("utf-8"))
-
-                except Exception as e:
-                    LOG.exception(f"Exception during {method} download for {entry}")
-                    LOG.error(str(e))
+    tasks = plan(method, entries, storage)
+    if tasks is None:
+        return
 
-        case _:
-            LOG.error(f"Unknown structure method: '{method}'")
+    checksums = manifest(outdir)
+    lock = threading.Lock()
+    gather(lambda task: retrieve(client, task, outdir, checksums, lock, verify), tasks, workers)
+    manifest(outdir, checksums)
 
 
 if __name__ == "__main__":
@@ -6,39 +6,142 @@ from typing import Any, cast
 
 from SPARQLWrapper import SPARQLWrapper, JSON
 
+from network import gather
+from curate.state import State
+
 LOG: Logger = logging.getLogger(__name__)
 ENDPOINT: str = "https://sparql.uniprot.org/sparql"
+CHUNK: int = 200  # PDB entry IDs per VALUES clause
+WORKERS: int = 4  # Concurrent SPARQL queries, the endpoint throttles heavier use
+STAGE: str = "uniprot"  # State stage of the per-entry result cache
 
 
-def uniprot(query: str, entries: set[str]) -> list[dict[str, Any]]:
+def fetch(query: str, entries: tuple[str, ...]) -> list[dict[str, Any]] | None:
     """
-    Fetches UniProt data using the provided SPARQL query and optional entry substitution.
+    Runs the SPARQL query for a single batch of entries.
 
     Args:
         query (str): The SPARQL query to execute, with `$entries` placeholder.
-        entries (set[str]): Set of PDB entry IDs for substitution.
+        entries (tuple[str, ...]): PDB entry IDs substituted into the VALUES clause.
 
     Returns:
-        list[dict[str, Any]]: List of results (SPARQL bindings).
+        list[dict[str, Any]] | None: SPARQL bindings, or None on failure.
     """
     query = query.replace("$entries", " ".join(f"('{entry}')" for entry in entries))
     client = SPARQLWrapper(ENDPOINT)
-
-    LOG.info(f"Fetching UNIPROT SPARQL data for {len(entries)} entries...")
     LOG.debug(f"Query payload:\n{query.strip()}")
 
     client.setQuery(query)
     client.setReturnFormat(JSON)
 
     try:
-        LOG.info("Data query successful.")
         response = cast(dict, client.query().convert())
+        LOG.info(f"Retrieved UNIPROT SPARQL data for {len(entries)} entries")
         return response.get("results", {}).get("bindings", [])
 
     except Exception as e:
-        LOG.exception("Failed to fetch data from UniProt SPARQL API.")
+        LOG.exception(f"Failed to fetch data from UniProt SPARQL API for {len(entries)} entries.")
         LOG.error(str(e))
-        return []
+        return None
+
+
+def assign(entries: tuple[str, ...], bindings: list[dict[str, Any]]) -> dict[str, list]:
+    """
+    Distributes the bindings of a batch to the entries they were found for.
+
+    Args:
+        entries (tuple[str, ...]): PDB entry IDs of the batch.
+        bindings (list[dict[str, Any]]): SPARQL bindings with the matched entries in "rcsb".
+
+    Returns:
+        dict[str, list]: Bindings keyed by entry, empty for entries without a match.
+    """
+    result: dict[str, list] = {entry: [] for entry in entries}
+    lookup = {entry.lower(): entry for entry in entries}
+    for binding in bindings:
+        matched = binding.get("rcsb", {}).get("value", "")
+        for entry in {value.strip().lower() for value in matched.split(",")}:
+            if entry in lookup:
+                result[lookup[entry]].append(binding)
+    return result
+
+
+def merge(bindings: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Merges bindings of the same UniProt accession, e.g. found in different batches, by
+    joining their comma separated values.
+
+    Args:
+        bindings (list[dict[str, Any]]): SPARQL bindings.
+
+    Returns:
+        list[dict[str, Any]]: One binding per accession.
+    """
+    merged: dict[str, dict[str, set[str]]] = dict()
+    first: dict[str, dict[str, Any]] = dict()
+    for binding in bindings:
+        accession = binding["uniprot"]["value"]
+        first.setdefault(accession, binding)
+        values = merged.setdefault(accession, dict())
+        for key, value in binding.items():
+            if key == "uniprot":
+                continue
+            parts = {part.strip() for part in value.get("value", "").split(",")}
+            values.setdefault(key, set()).update(part for part in parts if part)
+
+    return [
+        {"uniprot": first[accession]["uniprot"]}
+        | {
+            key: first[accession][key] | {"value": ", ".join(sorted(parts))}
+            for key, parts in values.items()
+        }
+        for accession, values in merged.items()
+    ]
+
+
+def uniprot(
+    query: str,
+    entries: set[str],
+    workers: int = WORKERS,
+    chunk: int = CHUNK,
+    state: State | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Fetches UniProt data using the provided SPARQL query and optional entry substitution.
+
+    Entries are sent in VALUES batches of `chunk` IDs, `workers` batches at a time. The
+    bindings found for every entry are cached in the state store, so re-runs only query
+    entries not seen before; a failed batch only fails its own entries.
+
+    Args:
+        query (str): The SPARQL query to execute, with `$entries` placeholder.
+        entries (set[str]): Set of PDB entry IDs for substitution.
+        workers (int): Maximum number of concurrent queries.
+        chunk (int): Maximum number of entries per query.
+        state (State | None): Per-entry result cache, in memory if None.
+
+    Returns:
+        list[dict[str, Any]]: List of results (SPARQL bindings), one per UniProt accession.
+    """
+    if "$entries" not in query:
+        return fetch(query, ()) or []
+
+    state = state or State()
+    pending = sorted(state.pending(STAGE, entries))
+    batches = [tuple(pending[i : i + chunk]) for i in range(0, len(pending), chunk)]
+    LOG.info(
+        f"Fetching UNIPROT SPARQL data for {len(pending)} of {len(entries)} entries "
+        f"in {len(batches)} batches..."
+    )
+
+    for batch, bindings in gather(lambda batch: fetch(query, batch), batches, workers):
+        state.save(STAGE, assign(batch, bindings))
+    cached = state.done(STAGE, entries)
+    state.fail(STAGE, set(pending) - cached.keys())
+    if len(cached) < len(entries):
+        LOG.warning(f"UNIPROT: {len(entries) - len(cached)} entries failed")
+
+    return merge([binding for bindings in cached.values() for binding in bindings])
 
 
 if __name__ == "__main__":
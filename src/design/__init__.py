@@ -0,0 +1,2 @@
+from .hotspots import hotspots
+from .crop import crop
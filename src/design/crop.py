@@ -0,0 +1,148 @@
+import os
+import json
+import logging
+from logging import Logger
+from typing import Any
+
+import numpy as np
+
+from curate.output import Tracks
+
+
+LOG: Logger = logging.getLogger(__name__)
+LENGTH: int = 512  # Maximum number of residues of a design target
+CROPS: str = "crops.json"  # Crop windows next to the curated entries
+# Objective: weight of every track per residue in the window, missing values count as 0
+WEIGHTS: dict[str, float] = {
+    "present": 1.0,
+    "confidence": 1.0,  # pLDDT, scaled to 0-1
+    "disorder": -1.0,
+    "cytoplasmic": 0.5,
+    "exoplasmic": 0.0,
+    "helix": 0.25,
+}
+PENALTY: float = 5.0  # Cost of a window boundary inside a secondary structure element
+ELEMENTS: tuple[str, ...] = ("helix", "sheet")  # Tracks a domain-respecting crop must not cut
+
+
+def scores(store: Tracks, weights: dict[str, float] = WEIGHTS) -> np.ndarray:
+    """
+    Scores every residue of a feature store by the weighted sum of its tracks.
+
+    Args:
+        store (Tracks): Feature store written by `curate.output.Writer`.
+        weights (dict[str, float]): Weight per track name.
+
+    Returns:
+        np.ndarray: Float64 score per residue of the store.
+    """
+    total = int(store.offsets[-1] + store.lengths[-1]) if len(store) else 0
+    result = np.zeros(total, dtype=np.float64)
+
+    for name, weight in weights.items():
+        if name not in store.types or not weight:
+            LOG.debug(f"Track '{name}' not in store or without weight, skipped")
+            continue
+        values = store.track(name, 0, total).astype(np.float64)
+        if name == "confidence" and np.nanmax(values, initial=0.0) > 1.0:
+            values = values / 100.0
+        result += weight * np.nan_to_num(values, nan=0.0)
+
+    return result
+
+
+def cuts(store: Tracks, elements: tuple[str, ...] = ELEMENTS) -> np.ndarray:
+    """
+    Marks the positions where a window boundary would split a secondary structure element.
+
+    Args:
+        store (Tracks): Feature store.
+        elements (tuple[str, ...]): Boolean tracks whose runs must not be cut.
+
+    Returns:
+        np.ndarray: Boolean per residue: residue and its predecessor belong to the same element.
+    """
+    total = int(store.offsets[-1] + store.lengths[-1]) if len(store) else 0
+    result = np.zeros(total, dtype=bool)
+    for name in elements:
+        if store.types.get(name) == "bool":
+            track = store.track(name, 0, total)
+            result[1:] |= track[1:] & track[:-1]
+    # Entity boundaries are never inside an element
+    result[store.offsets[store.offsets < total]] = False
+    return result
+
+
+def crop(
+    directory: str,
+    length: int = LENGTH,
+    weights: dict[str, float] = WEIGHTS,
+    penalty: float = PENALTY,
+) -> dict[str, dict[str, Any]]:
+    """
+    Selects the best window of at most `length` residues for every polymer entity of the
+    curated output and writes the windows to crops.json in the output directory.
+
+    Window scores are differences of one prefix sum over the residue scores of the whole
+    store, evaluated for all candidate windows of all entities at once. With a penalty,
+    windows starting or ending inside a helix or strand lose that penalty per cut, so
+    domain-respecting windows are preferred.
+
+    Args:
+        directory (str): Output directory of `curate.output.Writer`.
+        length (int): Maximum window length; shorter entities are kept whole.
+        weights (dict[str, float]): Objective weight per track (see WEIGHTS).
+        penalty (float): Cost per boundary cutting a secondary structure element, 0 for
+            plain contiguous windows.
+
+    Returns:
+        dict[str, dict[str, Any]]: Window per entity with 1-based start and inclusive end,
+            its length and score.
+    """
+    store = Tracks(directory)
+    LOG.info(f"Selecting crop windows of {length} residues for {len(store)} entities...")
+
+    residues = scores(store, weights)
+    prefix = np.concatenate(([0.0], np.cumsum(residues)))
+    broken = cuts(store) if penalty else np.zeros(len(residues), dtype=bool)
+    # A window [s, e) cuts at s if residue s continues an element, and at e likewise
+    ending = np.append(broken, False)
+
+    # All candidate window starts of all entities: offset + 0 .. length - window
+    windows = np.minimum(store.lengths, length)
+    candidates = store.lengths - windows + 1
+    entity = np.repeat(np.arange(len(store)), candidates)
+    first = np.cumsum(candidates) - candidates
+    starts = store.offsets[entity] + np.arange(len(entity)) - first[entity]
+    ends = starts + windows[entity]
+
+    value = prefix[ends] - prefix[starts]
+    value -= penalty * (broken[starts].astype(np.float64) + ending[ends])
+
+    # Best candidate per entity: sort by entity, then descending score
+    order = np.lexsort((-value, entity))
+    best = order[np.searchsorted(entity[order], np.arange(len(store)))]
+
+    result = {
+        name: {
+            "start": int(starts[i] - store.offsets[e]) + 1,
+            "end": int(ends[i] - store.offsets[e]),
+            "length": int(windows[e]),
+            "score": round(float(value[i]), 3),
+        }
+        for e, (name, i) in enumerate(zip(store.entries, best))
+    }
+
+    with open(os.path.join(directory, CROPS), "w", encoding="utf-8") as file:
+        json.dump(result, file, indent=2)
+    LOG.info(f"Wrote {len(result)} crop windows to {directory}")
+
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    results = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../results/")
+    result = crop(os.path.join(results, "columnar/"))
+    for name, window in list(result.items())[:5]:
+        print(name, window)
@@ -0,0 +1,291 @@
+import os
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from logging import Logger
+from typing import Any
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from curate.coordinates import coordinates
+from curate.storage import locate, stored
+
+
+LOG: Logger = logging.getLogger(__name__)
+
+# Eisenberg normalized consensus hydrophobicity, see src/pymol/color_hydrophobicity.py
+EISENBERG: dict[str, float] = {
+    "ALA": 0.62, "ARG": -2.53, "ASN": -0.78, "ASP": -0.90, "CYS": 0.29,
+    "GLN": -0.85, "GLU": -0.74, "GLY": 0.48, "HIS": -0.40, "ILE": 1.38,
+    "LEU": 1.06, "LYS": -1.50, "MET": 0.64, "PHE": 1.19, "PRO": 0.12,
+    "SER": -0.18, "THR": -0.05, "TRP": 0.81, "TYR": 0.26, "VAL": 1.08,
+}
+# Theoretical maximum accessible surface areas in Å² (Tien et al. 2013)
+MAXIMUM: dict[str, float] = {
+    "ALA": 129.0, "ARG": 274.0, "ASN": 195.0, "ASP": 193.0, "CYS": 167.0,
+    "GLN": 225.0, "GLU": 223.0, "GLY": 104.0, "HIS": 224.0, "ILE": 197.0,
+    "LEU": 201.0, "LYS": 236.0, "MET": 224.0, "PHE": 240.0, "PRO": 159.0,
+    "SER": 155.0, "THR": 172.0, "TRP": 285.0, "TYR": 263.0, "VAL": 174.0,
+}
+RADII: dict[str, float] = {"C": 1.70, "N": 1.55, "O": 1.52, "S": 1.80, "SE": 1.90}
+RADIUS: float = 1.80  # Radius of other elements
+PROBE: float = 1.4  # Solvent probe radius in Å
+POINTS: int = 96  # Sphere points per atom (Shrake-Rupley)
+BATCH: int = 512  # Atoms per batch of sphere points
+EXPOSED: float = 0.25  # Relative solvent accessibility of exposed residues
+HYDROPHOBIC: float = 0.5  # Minimum Eisenberg value of hydrophobic residues
+CONTACT: float = 6.5  # Distance in Å between side chain centres of adjacent residues
+MINIMUM: int = 3  # Minimum number of residues per patch
+
+
+def sphere(points: int = POINTS) -> np.ndarray:
+    """
+    Distributes points evenly on the unit sphere (golden spiral).
+
+    Args:
+        points (int): Number of points.
+
+    Returns:
+        np.ndarray: Float32 array of shape (points, 3).
+    """
+    index = np.arange(points) + 0.5
+    polar = np.arccos(1 - 2 * index / points)
+    azimuth = np.pi * (1 + 5**0.5) * index
+    return np.stack(
+        [np.cos(azimuth) * np.sin(polar), np.sin(azimuth) * np.sin(polar), np.cos(polar)],
+        axis=1,
+    ).astype(np.float32)
+
+
+def exposure(
+    coords: np.ndarray, radii: np.ndarray, probe: float = PROBE, points: int = POINTS
+) -> np.ndarray:
+    """
+    Computes the solvent accessible surface area of every atom (Shrake-Rupley).
+
+    The neighbours of every atom are found once with a KD-tree and padded to a fixed
+    width, so the sphere points of a batch of atoms are tested against all their
+    neighbours in a single matrix product.
+
+    Args:
+        coords (np.ndarray): Atom coordinates of shape (atoms, 3).
+        radii (np.ndarray): Van der Waals radius of every atom.
+        probe (float): Solvent probe radius.
+        points (int): Sphere points per atom.
+
+    Returns:
+        np.ndarray: Float32 accessible area per atom in Å².
+    """
+    count = len(coords)
+    if not count:
+        return np.zeros(0, dtype=np.float32)
+
+    coords = np.asarray(coords, dtype=np.float32)
+    extended = (radii + probe).astype(np.float32)
+    unit = sphere(points)
+
+    # Neighbour lists padded with a far away sentinel atom (index == count)
+    pairs = cKDTree(coords).query_pairs(2 * float(extended.max()), output_type="ndarray")
+    pairs = np.concatenate((pairs, pairs[:, ::-1]))
+    pairs = pairs[np.argsort(pairs[:, 0], kind="stable")]
+    degree = np.bincount(pairs[:, 0], minlength=count)
+    width = max(int(degree.max()), 1)
+    neighbours = np.full((count, width), count, dtype=np.int64)
+    rank = np.arange(len(pairs)) - np.repeat(np.cumsum(degree) - degree, degree)
+    neighbours[pairs[:, 0], rank] = pairs[:, 1]
+
+    padded = np.concatenate((coords, np.full((1, 3), 1e6, dtype=np.float32)))
+    limits = np.append(extended, 0.0).astype(np.float32) ** 2
+    exposed = np.zeros(count, dtype=np.int32)
+
+    for start in range(0, count, BATCH):
+        owners = np.arange(start, min(start + BATCH, count))
+        # Relative to the owning atom a sphere point p has |p|² = extended², so p lies
+        # within reach of neighbour q if 2 p·q > extended² + |q|² - reach(q)²
+        around = padded[neighbours[owners]] - coords[owners, None, :]
+        threshold = (
+            extended[owners, None] ** 2
+            + (around**2).sum(axis=2)
+            - limits[neighbours[owners]]
+        )
+        doubled = 2 * extended[owners, None, None] * unit[None, :, :]
+        products = np.matmul(doubled, around.transpose(0, 2, 1))
+        buried = (products > threshold[:, None, :]).any(axis=2)
+        exposed[owners] = points - buried.sum(axis=1)
+
+    return (4 * np.pi * extended**2 * exposed / points).astype(np.float32)
+
+
+def residues(atoms: np.ndarray, probe: float = PROBE) -> dict[str, np.ndarray]:
+    """
+    Computes per-residue solvent exposure of the standard amino acids of a structure.
+
+    Args:
+        atoms (np.ndarray): Atom array from `curate.coordinates`.
+        probe (float): Solvent probe radius.
+
+    Returns:
+        dict[str, np.ndarray]: Chain, number, name, accessible area, relative accessibility
+            and side chain centre (CA for glycine) per residue.
+    """
+    protein = atoms[
+        np.isin(atoms["resname"], list(EISENBERG)) & (atoms["element"] != "H") & ~atoms["hetero"]
+    ]
+    radii = np.array([RADII.get(element.upper(), RADIUS) for element in protein["element"]])
+    area = exposure(protein["coord"], radii, probe)
+
+    # Residues are runs of atoms sharing chain and number
+    change = (protein["chain"][1:] != protein["chain"][:-1]) | (
+        protein["number"][1:] != protein["number"][:-1]
+    )
+    starts = np.flatnonzero(np.concatenate(([True], change)))
+    index = np.cumsum(np.concatenate(([False], change)))
+
+    # Side chain centres, the CA for glycine or residues without side chain atoms
+    side = ~np.isin(protein["name"], ["N", "C", "O", "OXT"])
+    side &= (protein["name"] != "CA") | (protein["resname"] == "GLY")
+    weights = np.bincount(index, weights=side, minlength=len(starts))
+    fallback = weights == 0
+    side |= fallback[index] & (protein["name"] == "CA")
+    weights = np.bincount(index, weights=side, minlength=len(starts))
+    centres = np.stack(
+        [np.bincount(index, weights=protein["coord"][:, axis] * side, minlength=len(starts))
+         for axis in range(3)],
+        axis=1,
+    ) / np.maximum(weights, 1)[:, None]
+
+    names = protein["resname"][starts]
+    total = np.bincount(index, weights=area, minlength=len(starts))
+    maximum = np.array([MAXIMUM[name] for name in names])
+    return {
+        "chain": protein["chain"][starts],
+        "number": protein["number"][starts],
+        "name": names,
+        "area": total.astype(np.float32),
+        "relative": (total / maximum).astype(np.float32),
+        "centre": centres.astype(np.float32),
+    }
+
+
+def patches(
+    table: dict[str, np.ndarray],
+    scale: dict[str, float] = EISENBERG,
+    hydrophobic: float = HYDROPHOBIC,
+    exposed: float = EXPOSED,
+    contact: float = CONTACT,
+    minimum: int = MINIMUM,
+) -> list[dict[str, Any]]:
+    """
+    Clusters spatially adjacent, exposed hydrophobic residues into ranked patches.
+
+    Args:
+        table (dict[str, np.ndarray]): Per-residue exposure from `residues`.
+        scale (dict[str, float]): Hydrophobicity per residue name.
+        hydrophobic (float): Minimum scale value of hydrophobic residues.
+        exposed (float): Minimum relative accessibility of exposed residues.
+        contact (float): Maximum distance between side chain centres of adjacent residues.
+        minimum (int): Minimum number of residues per patch.
+
+    Returns:
+        list[dict[str, Any]]: Patches by descending score (hydrophobicity weighted exposed
+            area), with their residues as "chain:number", size, area, score and centre.
+    """
+    values = np.array([scale.get(name, 0.0) for name in table["name"]], dtype=np.float32)
+    candidates = np.flatnonzero((values >= hydrophobic) & (table["relative"] >= exposed))
+    if len(candidates) < minimum:
+        return []
+
+    # Connected components of the contact graph between candidate residues
+    pairs = cKDTree(table["centre"][candidates]).query_pairs(contact, output_type="ndarray")
+    graph = coo_matrix(
+        (np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])),
+        shape=(len(candidates), len(candidates)),
+    )
+    count, labels = connected_components(graph, directed=False)
+
+    sizes = np.bincount(labels, minlength=count)
+    scores = np.bincount(
+        labels, weights=values[candidates] * table["area"][candidates], minlength=count
+    )
+    areas = np.bincount(labels, weights=table["area"][candidates], minlength=count)
+
+    result = []
+    for label in np.argsort(-scores):
+        if sizes[label] < minimum:
+            continue
+        members = candidates[labels == label]
+        result.append(
+            {
+                "residues": [
+                    f"{chain}:{number}"
+                    for chain, number in zip(table["chain"][members], table["number"][members])
+                ],
+                "size": int(sizes[label]),
+                "area": round(float(areas[label]), 1),
+                "score": round(float(scores[label]), 1),
+                "centre": [round(float(x), 2) for x in table["centre"][members].mean(axis=0)],
+            }
+        )
+    return result
+
+
+def analyse(path: str) -> list[dict[str, Any]]:
+    """
+    Detects the hydrophobic patches of a single structure file.
+
+    Args:
+        path (str): Path to the structure file.
+
+    Returns:
+        list[dict[str, Any]]: Ranked patches, see `patches`.
+    """
+    try:
+        return patches(residues(coordinates(path)))
+    except Exception as e:
+        LOG.exception(f"Exception while detecting patches in {path}")
+        LOG.error(str(e))
+        return []
+
+
+def hotspots(
+    directory: str,
+    entries: set[str] | None = None,
+    kind: str = ".cif",
+    workers: int | None = None,
+) -> dict[str, list[dict[str, Any]]]:
+    """
+    Detects surface hydrophobic patches in the stored structures of a directory, e.g.
+    `options["pdb"]` (".cif") or `options["tm"]` (".pdb"), in parallel processes.
+
+    Args:
+        directory (str): Structure directory.
+        entries (set[str] | None): Entries to analyse, all stored entries if None.
+        kind (str): Uncompressed format suffix, ".cif" or ".pdb".
+        workers (int | None): Number of processes, one per CPU if None.
+
+    Returns:
+        dict[str, list[dict[str, Any]]]: Ranked patches keyed by entry.
+    """
+    entries = sorted(stored(directory, kind) if entries is None else entries)
+    paths = {entry: locate(directory, entry, kind) for entry in entries}
+    paths = {entry: path for entry, path in paths.items() if path is not None}
+    LOG.info(f"Detecting hydrophobic patches in {len(paths)} structures...")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        result = dict(zip(paths, executor.map(analyse, paths.values(), chunksize=4)))
+
+    LOG.info(f"Found {sum(len(value) for value in result.values())} patches")
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    results = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../results/")
+    result = hotspots(os.path.join(results, "structure/"))
+    with open(os.path.join(results, "hotspots.json"), "w", encoding="utf-8") as file:
+        json.dump(result, file, indent=2)
+    for entry, found in list(result.items())[:5]:
+        print(entry, [(patch["size"], patch["score"]) for patch in found[:3]])
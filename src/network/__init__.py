@@ -0,0 +1,5 @@
+from .pool import gather, stream, WORKERS
+from .cache import Cache
+from .client import Client
+from .throttle import Breaker, Bucket, CircuitOpenError
+from .metrics import METRICS, Metrics, profile
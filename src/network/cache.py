@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from logging import Logger
+from typing import Any
+
+from urllib3.util import parse_url
+
+
+LOG: Logger = logging.getLogger(__name__)
+SIZE: int = 2 * 1024**3  # Maximum cache size in bytes
+TTL: float = 24 * 3600  # Default time-to-live in seconds
+TIMEOUT: float = 60.0  # Seconds to wait for another process's write lock
+FLUSH: int = 256  # Buffered access times written at once
+SCHEMA: str = """
+    CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        headers TEXT NOT NULL,
+        body BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        stored REAL NOT NULL,
+        accessed REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+    CREATE TABLE IF NOT EXISTS usage (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        total INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO usage
+        SELECT 0, COALESCE(SUM(size), 0) FROM responses WHERE NOT EXISTS (SELECT 1 FROM usage);
+"""
+
+
+class Cache:
+    """
+    Persistent, content-addressed HTTP response cache backed by SQLite.
+
+    Responses are keyed by a hash of the request method, URL and body. Each source (host) has
+    its own time-to-live; expired responses carrying an ETag or Last-Modified header are kept for
+    revalidation. The cache is bounded in size and evicts the least recently used responses.
+
+    The database may be shared by several processes, e.g. shard workers. Reads do not take
+    the write lock: access times are buffered and written with the next store, the total
+    size is kept in a row updated along with every store and eviction, and writers wait for
+    each other's lock. Database errors are logged and treated as cache misses.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        size: int = SIZE,
+        ttl: dict[str, float] | None = None,
+    ) -> None:
+        """
+        Args:
+            directory (str): Directory holding the cache database.
+            size (int): Maximum total size of the cached bodies in bytes.
+            ttl (dict[str, float] | None): Time-to-live in seconds per host, with an optional "default".
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "responses.sqlite")
+        self.size = size
+        self.ttl = {"default": TTL} | (ttl or {})
+        self.lock = threading.Lock()
+        self.accessed: dict[str, float] = dict()
+        self.connection = sqlite3.connect(self.path, timeout=TIMEOUT, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        LOG.debug(f"Opened response cache at {self.path}")
+
+    @staticmethod
+    def key(method: str, url: str, body: Any = None) -> str:
+        """
+        Computes the content address of a request.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            body (Any): Encoded request body, if any.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        digest = hashlib.sha256(f"{method.upper()} {url}\n".encode("utf-8"))
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if isinstance(body, bytes):
+            digest.update(body)
+        return digest.hexdigest()
+
+    def expired(self, entry: dict[str, Any]) -> bool:
+        """
+        Checks whether a cached response has outlived the time-to-live of its host.
+
+        Args:
+            entry (dict[str, Any]): Cached response as returned by `get`.
+
+        Returns:
+            bool: True if the response must be revalidated or fetched again.
+        """
+        host = parse_url(entry["url"]).host or ""
+        ttl = self.ttl.get(host, self.ttl["default"])
+        return time.time() - entry["stored"] > ttl
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """
+        Looks up a cached response and marks it as recently used.
+
+        Args:
+            key (str): Content address of the request.
+
+        Returns:
+            dict[str, Any] | None: Cached response with url, status, headers, body and stored time.
+        """
+        try:
+            with self.lock:
+                row = self.connection.execute(
+                    "SELECT url, status, headers, body, stored FROM responses WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is None:
+                    return None
+                self.accessed[key] = time.time()
+                if len(self.accessed) >= FLUSH:
+                    self.flush()
+                    self.connection.commit()
+        except sqlite3.Error as e:
+            self.rollback()
+            LOG.exception("Exception while reading the response cache")
+            LOG.error(str(e))
+            return None
+
+        url, status, headers, body, stored = row
+        return {
+            "url": url,
+            "status": status,
+            "headers": json.loads(headers),
+            "body": body,
+            "stored": stored,
+        }
+
+    def put(
+        self, key: str, url: str, status: int, headers: dict[str, str], body: bytes
+    ) -> None:
+        """
+        Stores a response and evicts least recently used entries beyond the size limit.
+
+        Args:
+            key (str): Content address of the request.
+            url (str): Request URL.
+            status (int): HTTP status code.
+            headers (dict[str, str]): Response headers.
+            body (bytes): Decoded response body.
+        """
+        if len(body) > self.size:
+            LOG.debug(f"Response for {url} exceeds cache size, not cached")
+            return
+
+        now = time.time()
+        try:
+            with self.lock:
+                self.connection.execute("BEGIN IMMEDIATE")
+                self.accessed.pop(key, None)
+                self.flush()
+                row = self.connection.execute(
+                    "SELECT size FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, status, json.dumps(headers), body, len(body), now, now),
+                )
+                self.connection.execute(
+                    "UPDATE usage SET total = total + ?",
+                    (len(body) - (row[0] if row is not None else 0),),
+                )
+                self.evict()
+                self.connection.commit()
+        except sqlite3.Error as e:
+            self.rollback()
+            LOG.exception(f"Exception while caching the response for {url}")
+            LOG.error(str(e))
+
+    def touch(self, key: str) -> None:
+        """
+        Resets the age of a cached response after a successful revalidation.
+
+        Args:
+            key (str): Content address of the request.
+        """
+        now = time.time()
+        try:
+            with self.lock:
+                self.accessed.pop(key, None)
+                self.connection.execute(
+                    "UPDATE responses SET stored = ?, accessed = ? WHERE key = ?",
+                    (now, now, key),
+                )
+                self.connection.commit()
+        except sqlite3.Error as e:
+            self.rollback()
+            LOG.exception("Exception while revalidating the response cache")
+            LOG.error(str(e))
+
+    def flush(self) -> None:
+        """
+        Writes the buffered access times, without committing.
+        Must be called while holding the lock.
+        """
+        if self.accessed:
+            self.connection.executemany(
+                "UPDATE responses SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self.accessed.items()],
+            )
+            self.accessed.clear()
+
+    def rollback(self) -> None:
+        """
+        Discards a failed transaction, so the connection stays usable.
+        """
+        with self.lock:
+            try:
+                self.connection.rollback()
+            except sqlite3.Error as e:
+                LOG.debug(f"Rollback of the response cache failed: {e}")
+
+    def evict(self) -> None:
+        """
+        Removes least recently used responses until the cache fits its size limit.
+        Must be called while holding the lock.
+        """
+        (total,) = self.connection.execute("SELECT total FROM usage").fetchone()
+        if total <= self.size:
+            return
+
+        removed = 0
+        for key, size in self.connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed ASC"
+        ).fetchall():
+            if total <= self.size:
+                break
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        self.connection.execute("UPDATE usage SET total = ?", (total,))
+        LOG.debug(f"Evicted {removed} responses from cache")
@@ -0,0 +1,221 @@
+import io
+import logging
+import time
+import threading
+import urllib3
+from logging import Logger
+from typing import Any
+
+from urllib3.exceptions import MaxRetryError
+from urllib3.util import Retry, parse_url
+
+from .cache import Cache
+from .metrics import METRICS, Metrics
+from .throttle import Breaker, Bucket
+
+
+LOG: Logger = logging.getLogger(__name__)
+CACHEABLE: set[str] = {"GET", "POST"}
+UNCACHED: set[str] = {"content-encoding", "content-length", "transfer-encoding"}
+TRANSIENT: set[int] = {429, 500, 502, 503, 504}  # Status codes worth retrying
+RETRIES: int = 5
+BACKOFF: float = 0.5  # Base of the exponential backoff in seconds
+THRESHOLD: int = 20  # Consecutive failures opening a host's circuit
+COOLDOWN: float = 60.0  # Seconds a host's circuit stays open
+
+
+class Client(urllib3.PoolManager):
+    """
+    Drop-in replacement for `urllib3.PoolManager` for all API calls of the pipeline.
+
+    - Repeated requests are served from a persistent response cache, streaming requests
+      (`preload_content=False`) bypass it.
+    - Transient failures (connection errors, 429 and 5xx responses) are retried with
+      exponential backoff and jitter, honouring Retry-After headers (`urllib3.Retry`).
+    - Requests to a host are rate limited by a token bucket, if a rate is configured.
+    - A circuit breaker per host fails fast after repeated failures.
+
+    Retries run in `send` rather than in the connection pool, so every attempt takes a token
+    and is recorded by the breaker, and a host answering 429 is not retried above its rate.
+    """
+
+    def __init__(
+        self,
+        cache: Cache | None = None,
+        rates: dict[str, float] | None = None,
+        retries: int = RETRIES,
+        backoff: float = BACKOFF,
+        threshold: int = THRESHOLD,
+        cooldown: float = COOLDOWN,
+        metrics: Metrics = METRICS,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Args:
+            cache (Cache | None): Response cache, or None to disable caching.
+            rates (dict[str, float] | None): Requests per second per host, with an optional "default".
+            retries (int): Maximum number of retries per request.
+            backoff (float): Backoff factor (and maximum jitter) in seconds between retries.
+            threshold (int): Consecutive failures after which a host's circuit opens.
+            cooldown (float): Seconds before an open circuit lets a trial request through.
+            metrics (Metrics): Registry recording requests, latencies and cache hits.
+            **kwargs: Passed on to `urllib3.PoolManager`.
+        """
+        super().__init__(**kwargs)
+        self.retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            backoff_jitter=backoff,
+            status_forcelist=TRANSIENT,
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.cache = cache
+        self.rates = rates or dict()
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.metrics = metrics
+        self.buckets: dict[str, Bucket | None] = dict()
+        self.breakers: dict[str, Breaker] = dict()
+        self.lock = threading.Lock()
+
+    def guard(self, host: str) -> tuple[Bucket | None, Breaker]:
+        """
+        Gets the rate limiter and circuit breaker of a host, creating them on first use.
+
+        Args:
+            host (str): Host name.
+
+        Returns:
+            tuple[Bucket | None, Breaker]: Token bucket (None if unlimited) and circuit breaker.
+        """
+        with self.lock:
+            if host not in self.breakers:
+                rate = self.rates.get(host, self.rates.get("default"))
+                self.buckets[host] = Bucket(rate) if rate else None
+                self.breakers[host] = Breaker(host, self.threshold, self.cooldown)
+            return self.buckets[host], self.breakers[host]
+
+    def send(
+        self, method: str, url: str, redirect: bool = True, **kw: Any
+    ) -> urllib3.BaseHTTPResponse:
+        """
+        Sends a request over the network, retrying transient failures. Every attempt is
+        subject to the rate limit and circuit breaker of its host.
+        """
+        host = parse_url(url).host or ""
+        bucket, breaker = self.guard(host)
+        retry = self.retry
+        start = time.perf_counter()
+
+        while True:
+            breaker.check()
+            if bucket is not None:
+                bucket.acquire()
+
+            try:
+                response = super().urlopen(method, url, redirect=redirect, retries=False, **kw)
+            except Exception as e:
+                breaker.record(False)
+                try:
+                    retry = retry.increment(method, url, error=e)
+                except Exception:
+                    self.metrics.request(
+                        host, time.perf_counter() - start, 0, len(retry.history), error=True
+                    )
+                    raise
+                LOG.debug(f"Retrying {method} {url} after {type(e).__name__}")
+                retry.sleep()
+                continue
+
+            breaker.record(response.status not in TRANSIENT)
+            if not retry.is_retry(method, response.status, "Retry-After" in response.headers):
+                break
+            try:
+                retry = retry.increment(method, url, response=response)
+            except MaxRetryError:
+                break
+            LOG.debug(f"Retrying {method} {url} after status {response.status}")
+            response.drain_conn()
+            retry.sleep(response)
+
+        # Streamed bodies are not read yet, their size is taken from the headers
+        size = (
+            len(response.data)
+            if kw.get("preload_content", True)
+            else int(response.headers.get("Content-Length") or 0)
+        )
+        self.metrics.request(
+            host,
+            time.perf_counter() - start,
+            size,
+            len(retry.history),
+            error=response.status >= 400,
+        )
+        return response
+
+    def urlopen(
+        self, method: str, url: str, redirect: bool = True, **kw: Any
+    ) -> urllib3.BaseHTTPResponse:
+        if (
+            self.cache is None
+            or method.upper() not in CACHEABLE
+            or not kw.get("preload_content", True)
+        ):
+            return self.send(method, url, redirect=redirect, **kw)
+
+        key = self.cache.key(method, url, kw.get("body"))
+        entry = self.cache.get(key)
+
+        if entry is not None and not self.cache.expired(entry):
+            LOG.debug(f"Cache hit for {method} {url}")
+            self.metrics.hit(parse_url(url).host or "")
+            return self.replay(entry)
+
+        # Revalidate stale responses where the server supports it
+        if entry is not None:
+            headers = dict(kw.get("headers") or self.headers)
+            if "etag" in entry["headers"]:
+                headers["If-None-Match"] = entry["headers"]["etag"]
+            if "last-modified" in entry["headers"]:
+                headers["If-Modified-Since"] = entry["headers"]["last-modified"]
+            kw["headers"] = headers
+
+        response = self.send(method, url, redirect=redirect, **kw)
+
+        if response.status == 304 and entry is not None:
+            LOG.debug(f"Cache revalidated for {method} {url}")
+            self.cache.touch(key)
+            self.metrics.hit(parse_url(url).host or "")
+            return self.replay(entry)
+
+        if response.status == 200:
+            headers = {
+                name.lower(): value
+                for name, value in response.headers.items()
+                if name.lower() not in UNCACHED
+            }
+            self.cache.put(key, url, response.status, headers, response.data)
+
+        return response
+
+    @staticmethod
+    def replay(entry: dict[str, Any]) -> urllib3.HTTPResponse:
+        """
+        Builds a response object from a cached entry.
+
+        Args:
+            entry (dict[str, Any]): Cached response as returned by `Cache.get`.
+
+        Returns:
+            urllib3.HTTPResponse: Response equivalent to the original one.
+        """
+        return urllib3.HTTPResponse(
+            body=io.BytesIO(entry["body"]),
+            headers=entry["headers"],
+            status=entry["status"],
+            preload_content=True,
+            decode_content=False,
+            request_url=entry["url"],
+        )
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import logging
+import threading
+import cProfile
+from contextlib import contextmanager
+from logging import Logger
+from typing import Any, Iterator
+
+try:
+    import pyinstrument
+except ImportError:  # pyinstrument profiling is optional
+    pyinstrument = None
+
+
+LOG: Logger = logging.getLogger(__name__)
+BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIX: str = "structure_query"
+
+
+class Metrics:
+    """
+    Thread-safe registry of pipeline metrics: wall time per stage and, per host, request
+    counts, latency histograms, bytes transferred, errors, retries and cache hits.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.stages: dict[str, dict[str, float]] = dict()
+        self.hosts: dict[str, dict[str, Any]] = dict()
+
+    def host(self, host: str) -> dict[str, Any]:
+        """
+        Gets the counters of a host, creating them on first use. Must hold the lock.
+        """
+        if host not in self.hosts:
+            self.hosts[host] = {
+                "requests": 0,
+                "errors": 0,
+                "retries": 0,
+                "cache_hits": 0,
+                "bytes": 0,
+                "seconds": 0.0,
+                "latency": [0] * (len(BUCKETS) + 1),
+            }
+        return self.hosts[host]
+
+    def request(
+        self, host: str, seconds: float, size: int, retries: int = 0, error: bool = False
+    ) -> None:
+        """
+        Records a request sent over the network.
+
+        Args:
+            host (str): Host name.
+            seconds (float): Wall time including retries.
+            size (int): Response body size in bytes.
+            retries (int): Number of retries needed.
+            error (bool): Whether the request failed.
+        """
+        with self.lock:
+            counters = self.host(host)
+            counters["requests"] += 1
+            counters["errors"] += int(error)
+            counters["retries"] += retries
+            counters["bytes"] += size
+            counters["seconds"] += seconds
+            bucket = next((i for i, bound in enumerate(BUCKETS) if seconds <= bound), len(BUCKETS))
+            counters["latency"][bucket] += 1
+
+    def hit(self, host: str) -> None:
+        """
+        Records a request answered from the response cache.
+
+        Args:
+            host (str): Host name.
+        """
+        with self.lock:
+            self.host(host)["cache_hits"] += 1
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Times a pipeline stage; repeated stages accumulate.
+
+        Args:
+            name (str): Stage name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+                stage["seconds"] += elapsed
+                stage["calls"] += 1
+            LOG.debug(f"Stage '{name}' took {elapsed:.2f}s")
+
+    def report(self) -> dict[str, Any]:
+        """
+        Builds the machine-readable run report.
+
+        Returns:
+            dict[str, Any]: Run duration, stage timings and host counters.
+        """
+        with self.lock:
+            return {
+                "started": self.started,
+                "seconds": time.time() - self.started,
+                "stages": json.loads(json.dumps(self.stages)),
+                "hosts": {
+                    host: counters | {"latency": dict(zip([*map(str, BUCKETS), "+Inf"], counters["latency"]))}
+                    for host, counters in self.hosts.items()
+                },
+            }
+
+    def prometheus(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text.
+        """
+        report = self.report()
+        lines = []
+
+        def family(name: str, kind: str, description: str) -> None:
+            lines.append(f"# HELP {PREFIX}_{name} {description}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        family("stage_seconds_total", "counter", "Wall time spent per pipeline stage.")
+        for stage, values in report["stages"].items():
+            lines.append(f'{PREFIX}_stage_seconds_total{{stage="{stage}"}} {values["seconds"]}')
+
+        for counter, description in (
+            ("requests", "Requests sent per host."),
+            ("errors", "Failed requests per host."),
+            ("retries", "Retries per host."),
+            ("cache_hits", "Requests answered from the response cache per host."),
+            ("bytes", "Response bytes received per host."),
+        ):
+            family(f"{counter}_total", "counter", description)
+            for host, counters in report["hosts"].items():
+                lines.append(f'{PREFIX}_{counter}_total{{host="{host}"}} {counters[counter]}')
+
+        family("request_seconds", "histogram", "Request latency per host.")
+        for host, counters in report["hosts"].items():
+            cumulative = 0
+            for bound, count in counters["latency"].items():
+                cumulative += count
+                lines.append(f'{PREFIX}_request_seconds_bucket{{host="{host}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PREFIX}_request_seconds_sum{{host="{host}"}} {counters["seconds"]}')
+            lines.append(f'{PREFIX}_request_seconds_count{{host="{host}"}} {counters["requests"]}')
+
+        return "\n".join(lines) + "\n"
+
+    def save(self, directory: str) -> None:
+        """
+        Writes the run report as JSON (run.json) and Prometheus text (metrics.prom).
+
+        Args:
+            directory (str): Output directory.
+        """
+        with open(os.path.join(directory, "run.json"), "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+        with open(os.path.join(directory, "metrics.prom"), "w", encoding="utf-8") as file:
+            file.write(self.prometheus())
+        LOG.info(f"Saved run report to {directory}")
+
+
+@contextmanager
+def profile(name: str, directory: str, profiler: str | None = None) -> Iterator[None]:
+    """
+    Profiles a block with cProfile (name.prof) or pyinstrument (name.html), if requested.
+
+    Only the thread entering the block is profiled faithfully: pyinstrument samples that
+    thread alone, and cProfile ignores other threads before Python 3.12 and merges their
+    calls into one call tree from 3.12 on. Requests run on the pool threads of `gather` and
+    `stream`, so their time mostly shows up as the caller waiting. The profile is meant for
+    the CPU work of the calling thread, e.g. decoding and output; request times per host
+    are in the run report (`Metrics.save`).
+
+    Args:
+        name (str): Name of the profiled block, used as file name.
+        directory (str): Output directory.
+        profiler (str | None): "cprofile", "pyinstrument" or None to disable profiling.
+    """
+    match profiler:
+        case "cprofile":
+            session = cProfile.Profile()
+            session.enable()
+            try:
+                yield
+            finally:
+                session.disable()
+                session.dump_stats(os.path.join(directory, f"{name}.prof"))
+        case "pyinstrument" if pyinstrument is not None:
+            session = pyinstrument.Profiler()
+            session.start()
+            try:
+                yield
+            finally:
+                session.stop()
+                with open(os.path.join(directory, f"{name}.html"), "w", encoding="utf-8") as file:
+                    file.write(session.output_html())
+        case None:
+            yield
+        case _:
+            LOG.warning(f"Profiler '{profiler}' unavailable, running without profiling")
+            yield
+
+
+METRICS: Metrics = Metrics()
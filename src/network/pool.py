@@ -0,0 +1,81 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from logging import Logger
+from typing import Callable, Iterable, Iterator, TypeVar
+
+
+LOG: Logger = logging.getLogger(__name__)
+WORKERS: int = 16
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def gather(
+    task: Callable[[T], R | None], entries: Iterable[T], workers: int = WORKERS
+) -> list[tuple[T, R]]:
+    """
+    Runs a task for every entry on a bounded thread pool and collects the results.
+
+    The number of requests in flight per host is bounded by the connection pool of the
+    HTTP client (`maxsize` with `block=True`), the number of concurrent tasks by `workers`.
+
+    Args:
+        task (Callable[[T], R | None]): Function fetching a single entry, returning None on failure.
+        entries (Iterable[T]): Entries to process.
+        workers (int): Maximum number of concurrently running tasks.
+
+    Returns:
+        list[tuple[T, R]]: Pairs of entry and result in input order, failed entries omitted.
+    """
+    entries = list(entries)
+    if not entries:
+        return []
+
+    workers = max(1, min(workers, len(entries)))
+    LOG.debug(f"Running {len(entries)} tasks on {workers} workers")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(task, entries)
+        return [
+            (entry, result)
+            for entry, result in zip(entries, results)
+            if result is not None
+        ]
+
+
+def stream(
+    task: Callable[[T], R | None], entries: Iterable[T], workers: int = WORKERS
+) -> Iterator[tuple[T, R]]:
+    """
+    Runs a task for every entry on a bounded thread pool and yields results as they complete.
+
+    Entries are consumed lazily, so the input may itself be a generator. At most twice as
+    many tasks as workers are queued at any time.
+
+    Args:
+        task (Callable[[T], R | None]): Function processing a single entry, returning None on failure.
+        entries (Iterable[T]): Entries to process.
+        workers (int): Maximum number of concurrently running tasks.
+
+    Yields:
+        tuple[T, R]: Pairs of entry and result in completion order, failed entries omitted.
+    """
+    workers = max(1, workers)
+    entries = iter(entries)
+    pending: dict[Future, T] = dict()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for entry in islice(entries, 2 * workers):
+            pending[executor.submit(task, entry)] = entry
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry = pending.pop(future)
+                for following in islice(entries, 1):
+                    pending[executor.submit(task, following)] = following
+                result = future.result()
+                if result is not None:
+                    yield entry, result
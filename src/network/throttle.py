@@ -0,0 +1,119 @@
+import time
+import logging
+import threading
+from logging import Logger
+
+from urllib3.exceptions import HTTPError
+
+
+LOG: Logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(HTTPError):
+    """
+    Raised when a request is refused because the circuit breaker of its host is open.
+    """
+
+
+class Bucket:
+    """
+    Thread-safe token bucket limiting the request rate to a host.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        """
+        Args:
+            rate (float): Sustained number of requests per second.
+            burst (float | None): Bucket capacity, defaults to one second worth of requests.
+        """
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Takes a token, blocking until one is available.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+    def take(self) -> bool:
+        """
+        Takes a token if one is available, without blocking.
+
+        Returns:
+            bool: Whether a token was taken.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class Breaker:
+    """
+    Circuit breaker for a host: opens after a number of consecutive failures and refuses
+    requests until a cooldown has passed, then lets a trial request through (half-open).
+    """
+
+    def __init__(self, host: str, threshold: int, cooldown: float) -> None:
+        """
+        Args:
+            host (str): Host name, for logging.
+            threshold (int): Consecutive failures that open the circuit.
+            cooldown (float): Seconds the circuit stays open.
+        """
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened: float | None = None
+        self.lock = threading.Lock()
+
+    def check(self) -> None:
+        """
+        Raises if the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the host failed too often recently.
+        """
+        with self.lock:
+            if self.opened is None:
+                return
+            if time.monotonic() - self.opened >= self.cooldown:
+                # Half-open: allow a trial request, a single failure opens the circuit again
+                LOG.info(f"Circuit for {self.host} half-open, sending trial request")
+                self.opened = None
+                self.failures = self.threshold - 1
+                return
+        raise CircuitOpenError(f"Circuit open for {self.host}, request refused")
+
+    def record(self, success: bool) -> None:
+        """
+        Records the outcome of a request.
+
+        Args:
+            success (bool): Whether the host answered without a server-side error.
+        """
+        with self.lock:
+            if success:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.failures >= self.threshold and self.opened is None:
+                LOG.warning(f"Circuit for {self.host} opened after {self.failures} failures")
+                self.opened = time.monotonic()
@@ -2,16 +2,8 @@ from pymol import cmd
 from pymol.cgo import *
 import numpy as np
 
-# Membrane normal vector (already correct)
-normal = np.array([
-    0,
-    0,
-    13.46204853
-])
-# Define membrane planes
-center = np.array([0, 0, 0])  # Center is now at the origin
-upper_plane_center = center + (normal)
-lower_plane_center = center - (normal)
+# Half thickness of the hydrophobic slab used when the entry has none (Å)
+HALF_THICKNESS = 13.46204853
 
 # Plane size (adjust if necessary)
 plane_size = 40  # Reduce size if it appears too wide
@@ -25,7 +17,7 @@ corners = np.array([
 ])
 
 # Function to create and load a plane in PyMOL
-def create_plane(plane_center, name):
+def create_plane(plane_center, name, pymol=cmd):
     obj = [
         BEGIN, TRIANGLE_STRIP,
         COLOR, 0.0, 0.5, 1.0,  # Blue color
@@ -38,8 +30,14 @@ def create_plane(plane_center, name):
 
     obj.append(END)
 
-    cmd.load_cgo(obj, name)
-
-# Create upper and lower membrane planes
-create_plane(upper_plane_center, "upper_membrane_plane")
-create_plane(lower_plane_center, "lower_membrane_plane")
\ No newline at end of file
+    pymol.load_cgo(obj, name)
+
+# Create upper and lower membrane planes of a structure in membrane coordinates
+# (OPM and PDBTM place the membrane centre at the origin with its normal along z)
+def draw_membrane(half_thickness=HALF_THICKNESS, pymol=cmd):
+    # Membrane normal vector
+    normal = np.array([0, 0, float(half_thickness)])
+    center = np.array([0, 0, 0])  # Center is at the origin
+    create_plane(center + normal, "upper_membrane_plane", pymol)
+    create_plane(center - normal, "lower_membrane_plane", pymol)
+cmd.extend('draw_membrane', draw_membrane)
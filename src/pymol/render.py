@@ -0,0 +1,158 @@
+import os
+import sys
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from logging import Logger
+from typing import Any
+
+SCRIPTS: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if SCRIPTS not in sys.path:
+    sys.path.append(SCRIPTS)
+
+from pymol2 import PyMOL
+
+from color_hydrophobicity import hydrophobicity
+from membrane import draw_membrane
+from curate.output import read
+from curate.storage import locate, read as text
+
+
+LOG: Logger = logging.getLogger(__name__)
+WIDTH: int = 1200  # Image size in pixels
+HEIGHT: int = 900
+SESSION: Any = None  # Headless PyMOL instance of the worker process
+
+
+def thickness(record: dict[str, Any]) -> float | None:
+    """
+    Gets the half thickness of the hydrophobic membrane slab of a curated entry.
+
+    Args:
+        record (dict[str, Any]): Membrane data of the entry with its "_source".
+
+    Returns:
+        float | None: Distance of the membrane planes from the origin in Å, or None if the
+            source carries no thickness or its structure is not in membrane coordinates.
+    """
+    match record.get("_source"):
+        case "opm":
+            # OPM reports the full hydrophobic thickness
+            value = record.get("thickness")
+            return float(value) / 2 if value else None
+        case "pdbtm":
+            # PDBTM reports the membrane normal, its length is the half thickness
+            normal = (record.get("membrane") or {}).get("normal") or {}
+            value = normal.get("z")
+            return abs(float(value)) if value else None
+    # MemProtMD simulations are not centred on the membrane
+    return None
+
+
+def start() -> None:
+    """
+    Launches the headless PyMOL instance of a worker process.
+    """
+    global SESSION
+    SESSION = PyMOL()
+    SESSION.start()
+
+
+def draw(task: tuple[str, str, float | None, str, bool, int, int]) -> str | None:
+    """
+    Renders a single structure in the worker's PyMOL instance.
+
+    Args:
+        task (tuple): Entry ID, structure path, membrane half thickness, output directory,
+            whether to save a session, image width and height.
+
+    Returns:
+        str | None: Path of the image, or None on failure.
+    """
+    entry, path, half, outdir, session, width, height = task
+    cmd = SESSION.cmd
+    try:
+        cmd.reinitialize()
+        if path.endswith(".fcz"):
+            cmd.read_pdbstr(text(path), entry)
+        else:
+            cmd.load(path, entry)
+
+        cmd.hide("everything")
+        cmd.show("cartoon", entry)
+        cmd.show("sticks", f"{entry} and hetatm and not resn HOH+DUM")
+        hydrophobicity(entry, "color_h", cmd)
+        if half is not None:
+            draw_membrane(half, cmd)
+
+        cmd.orient(entry)
+        cmd.turn("x", -90)  # Membrane normal in the image plane
+        cmd.bg_color("white")
+        image = os.path.join(outdir, f"{entry}.png")
+        cmd.png(image, width=width, height=height, ray=1)
+        if session:
+            cmd.save(os.path.join(outdir, f"{entry}.pse"))
+        return image
+
+    except Exception as e:
+        LOG.exception(f"Exception while rendering {entry}")
+        LOG.error(str(e))
+        return None
+
+
+def render(
+    directory: str,
+    structures: str,
+    outdir: str,
+    workers: int | None = None,
+    session: bool = False,
+    width: int = WIDTH,
+    height: int = HEIGHT,
+) -> dict[str, str]:
+    """
+    Renders the membrane structures of all curated entries headless and in parallel, one
+    PyMOL instance per process. Residues are coloured by hydrophobicity and the membrane
+    planes are drawn from the entry's OPM or PDBTM thickness.
+
+    Args:
+        directory (str): Output directory of the curation (entries.jsonl).
+        structures (str): Membrane structure directory, `options["tm"]`.
+        outdir (str): Directory for the images and sessions.
+        workers (int | None): Number of processes, one per CPU if None.
+        session (bool): Whether to also save a PyMOL session per entry.
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+
+    Returns:
+        dict[str, str]: Image path keyed by entry, for rendered entries.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    tasks = []
+    for record in read(directory):
+        path = locate(structures, record["entry"], ".pdb")
+        if path is None:
+            LOG.warning(f"No membrane structure of {record['entry']}")
+            continue
+        half = thickness(record.get("membrane") or {})
+        tasks.append((record["entry"], path, half, outdir, session, width, height))
+    LOG.info(f"Rendering {len(tasks)} structures...")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=start) as executor:
+        result = {
+            task[0]: image
+            for task, image in zip(tasks, executor.map(draw, tasks))
+            if image is not None
+        }
+
+    LOG.info(f"Rendered {len(result)} of {len(tasks)} structures to {outdir}")
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    results = os.path.join(SCRIPTS, "../results/")
+    render(
+        results,
+        os.path.join(results, "simulation/"),
+        os.path.join(results, "render/"),
+        session="--session" in sys.argv,
+    )
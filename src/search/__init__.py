@@ -1,19 +1,20 @@
+import copy
 import urllib3
-from typing import Any
+from typing import Any, Iterator
 
-from .query import parse, transform
-from .request import fetch
+from .query import parse, transform, GROUPING
+from .request import fetch, pages, ROWS
+from .planner import Planner
 
-def search(client: urllib3.PoolManager, config: dict[str, Any]) -> set[str]:
+def compose(config: dict[str, Any]) -> dict[str, Any]:
     """
-    Executes an RCSB search query based on the configuration provided in a JSON file.
+    Builds the RCSB search query from the search configuration.
 
     Args:
-        client (urllib3.PoolManager): HTTP client used to execute the search query.
         config (dict[str, Any]): Configuration containing the search parameters and expression.
 
     Returns:
-        set[str]: Set of unique PDB identifiers extracted from the search results.
+        dict[str, Any]: Search query returning all hits, grouped by UniProt accession.
     """
     # Extract the query parameters and expression
     parameters = {
@@ -25,22 +26,56 @@ def search(client: urllib3.PoolManager, config: dict[str, Any]) -> set[str]:
     # Generate the query
     query = {
         "query": transform(parse(expression), parameters),
-        "request_options": {
-            "results_verbosity": "compact",
-            "return_all_hits": True,
-            "group_by": {
-                "aggregation_method": "matching_uniprot_accession",
-                "ranking_criteria_type": {
-                    "sort_by": "coverage"
-                },
-            },
-            "group_by_return_type": "representatives"
-        },
+        "request_options": copy.deepcopy(GROUPING),
         "return_type": "polymer_entity"
     }
 
+    return query
+
+
+def search(
+    client: urllib3.PoolManager, config: dict[str, Any], planner: Planner | None = None
+) -> set[str]:
+    """
+    Executes an RCSB search query based on the configuration provided in a JSON file.
+
+    Args:
+        client (urllib3.PoolManager): HTTP client used to execute the search query.
+        config (dict[str, Any]): Configuration containing the search parameters and expression.
+        planner (Planner | None): Evaluates the expression locally from cached per-terminal
+            searches instead of sending a single group query.
+
+    Returns:
+        set[str]: Set of unique PDB identifiers extracted from the search results.
+    """
+    if planner is not None:
+        return planner.search(config)
+
     # Execute the search
-    output = fetch(client, query)
+    output = fetch(client, compose(config))
     result = {item[:4] for item in output["result_set"]}
 
     return result
+
+
+def paginate(client: urllib3.PoolManager, config: dict[str, Any]) -> Iterator[str]:
+    """
+    Executes an RCSB search query page by page (`config["rows"]` results per page) and
+    yields the PDB identifiers as pages arrive, so curation can start on the first page.
+
+    Args:
+        client (urllib3.PoolManager): HTTP client used to execute the search query.
+        config (dict[str, Any]): Configuration containing the search parameters and expression.
+
+    Yields:
+        str: Unique PDB identifiers in result order.
+    """
+    query = compose(config)
+    query["request_options"].pop("return_all_hits")
+
+    seen = set()
+    for output in pages(client, query, config.get("rows", ROWS)):
+        for item in output.get("result_set") or []:
+            if item[:4] not in seen:
+                seen.add(item[:4])
+                yield item[:4]
@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import urllib3
+from logging import Logger
+from typing import Any
+
+from network import gather, WORKERS
+
+from .query import parse, GROUPING
+from .request import fetch
+
+
+LOG: Logger = logging.getLogger(__name__)
+TTL: float = 86400.0  # Seconds a cached terminal result stays valid
+IDENTIFIER: str = "rcsb_polymer_entity_container_identifiers.rcsb_id"  # Polymer entity ID attribute
+
+
+class Planner:
+    """
+    Evaluates the boolean search expression locally: every labelled terminal is searched on
+    its own, and the resulting ID sets are combined with set operations.
+
+    Terminal results are cached by their parameters, in memory and optionally on disk, so
+    changing one term of the expression only sends that terminal again. The combined polymer
+    entities are then collapsed to one representative per UniProt accession by a grouped
+    query on their IDs, so the result is the same as that of the single group query.
+    """
+
+    def __init__(
+        self,
+        client: urllib3.PoolManager,
+        directory: str | None = None,
+        ttl: float = TTL,
+        workers: int = WORKERS,
+    ) -> None:
+        """
+        Args:
+            client (urllib3.PoolManager): HTTP client used to execute the terminal searches.
+            directory (str | None): Directory of the persistent terminal cache, or None.
+            ttl (float): Seconds a cached terminal result stays valid.
+            workers (int): Maximum number of concurrent terminal searches.
+        """
+        self.client = client
+        self.directory = directory
+        self.ttl = ttl
+        self.workers = workers
+        self.memory: dict[str, set[str]] = dict()
+        self.lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(parameters: dict[str, Any]) -> str:
+        """
+        Hashes terminal parameters independently of their key order.
+
+        Args:
+            parameters (dict[str, Any]): Parameters of a terminal search.
+
+        Returns:
+            str: Hex digest identifying the terminal.
+        """
+        return hashlib.sha256(json.dumps(parameters, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def cached(self, key: str) -> set[str] | None:
+        """
+        Looks a terminal result up in memory, then on disk.
+
+        Args:
+            key (str): Terminal key.
+
+        Returns:
+            set[str] | None: Polymer entity IDs, or None if not cached or expired.
+        """
+        with self.lock:
+            if key in self.memory:
+                return self.memory[key]
+
+        if self.directory is None:
+            return None
+        path = os.path.join(self.directory, f"{key}.json")
+        if not os.path.exists(path) or time.time() - os.path.getmtime(path) > self.ttl:
+            return None
+
+        with open(path, "r", encoding="utf-8") as file:
+            result = set(json.load(file))
+        with self.lock:
+            self.memory[key] = result
+        return result
+
+    def store(self, key: str, result: set[str]) -> None:
+        """
+        Caches a terminal result in memory and, atomically, on disk.
+
+        Args:
+            key (str): Terminal key.
+            result (set[str]): Polymer entity IDs.
+        """
+        with self.lock:
+            self.memory[key] = result
+
+        if self.directory is None:
+            return
+        path = os.path.join(self.directory, f"{key}.json")
+        with open(f"{path}.part", "w", encoding="utf-8") as file:
+            json.dump(sorted(result), file)
+        os.replace(f"{path}.part", path)
+
+    def terminal(self, parameters: dict[str, Any]) -> set[str] | None:
+        """
+        Runs a single terminal search.
+
+        Args:
+            parameters (dict[str, Any]): Parameters of the terminal.
+
+        Returns:
+            set[str] | None: Polymer entity IDs, or None if the search failed.
+        """
+        query = {
+            "query": {"type": "terminal", "service": "text", "parameters": parameters},
+            "request_options": {"results_verbosity": "compact", "return_all_hits": True},
+            "return_type": "polymer_entity",
+        }
+        output = fetch(self.client, query)
+        if "result_set" not in output:
+            return None
+        return set(output["result_set"])
+
+    def resolve(self, parameters: dict[str, dict[str, Any]]) -> dict[str, set[str]]:
+        """
+        Gets the results of the given terminals, searching only those not cached.
+
+        Args:
+            parameters (dict[str, dict[str, Any]]): Terminal parameters by label.
+
+        Returns:
+            dict[str, set[str]]: Polymer entity IDs by label.
+
+        Raises:
+            RuntimeError: If a terminal search failed.
+        """
+        keys = {label: self.key(value) for label, value in parameters.items()}
+        result = {label: self.cached(key) for label, key in keys.items()}
+        missing = [label for label, value in result.items() if value is None]
+        LOG.info(f"Planner: {len(result) - len(missing)} terminals cached, {len(missing)} to search")
+
+        found = dict(gather(lambda label: self.terminal(parameters[label]), missing, self.workers))
+        for label in missing:
+            if label not in found:
+                raise RuntimeError(f"Terminal search '{label}' failed")
+            self.store(keys[label], found[label])
+            result[label] = found[label]
+            LOG.debug(f"Terminal '{label}' matched {len(found[label])} polymer entities")
+
+        return result
+
+    def group(self, entities: set[str]) -> set[str]:
+        """
+        Collapses polymer entities to one representative per UniProt accession, with the
+        grouping of the single group query (`query.GROUPING`). The grouped result is cached
+        like a terminal, keyed by the entity IDs.
+
+        Args:
+            entities (set[str]): Polymer entity IDs.
+
+        Returns:
+            set[str]: Representative polymer entity IDs.
+
+        Raises:
+            RuntimeError: If the grouped query failed.
+        """
+        if not entities:
+            return set()
+        parameters = {"attribute": IDENTIFIER, "operator": "in", "value": sorted(entities)}
+        key = self.key({"group": GROUPING, "parameters": parameters})
+        result = self.cached(key)
+        if result is not None:
+            return result
+
+        query = {
+            "query": {"type": "terminal", "service": "text", "parameters": parameters},
+            "request_options": GROUPING,
+            "return_type": "polymer_entity",
+        }
+        output = fetch(self.client, query)
+        if "result_set" not in output:
+            raise RuntimeError("Grouping of the combined search results failed")
+        result = set(output["result_set"])
+        self.store(key, result)
+        LOG.info(f"Planner: {len(entities)} polymer entities grouped into {len(result)}")
+        return result
+
+    def evaluate(self, node: str | dict[str, Any], results: dict[str, set[str]]) -> set[str]:
+        """
+        Evaluates a parsed boolean expression with set operations.
+
+        Args:
+            node (str | dict[str, Any]): Label or group node from `query.parse`.
+            results (dict[str, set[str]]): Terminal results by label.
+
+        Returns:
+            set[str]: Polymer entity IDs matching the expression.
+        """
+        if isinstance(node, str):
+            if node not in results:
+                raise KeyError(f"Unknown label '{node}' in expression.")
+            return results[node]
+        elif isinstance(node, dict):
+            sets = [self.evaluate(subnode, results) for subnode in node["nodes"]]
+            return set.intersection(*sets) if node["operator"] == "and" else set.union(*sets)
+        else:
+            raise ValueError(f"Invalid node type during evaluation: {type(node)}")
+
+    def search(self, config: dict[str, Any]) -> set[str]:
+        """
+        Executes the search configuration, see `search.search`.
+
+        Args:
+            config (dict[str, Any]): Configuration containing the search parameters and expression.
+
+        Returns:
+            set[str]: Set of unique PDB identifiers matching the expression.
+        """
+        tree = parse(config["expression"])
+        labels = set()
+
+        def collect(node: str | dict[str, Any]) -> None:
+            if isinstance(node, str):
+                labels.add(node)
+            elif isinstance(node, dict):
+                for subnode in node["nodes"]:
+                    collect(subnode)
+
+        collect(tree)
+        parameters = {
+            item["label"]: item["parameters"]
+            for item in config["query"]
+            if item["label"] in labels
+        }
+        results = self.resolve(parameters)
+        return {item[:4] for item in self.group(self.evaluate(tree, results))}
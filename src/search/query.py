@@ -36,6 +36,18 @@ GRAMMAR: str = """
     %ignore WS
 """
 PARSER: Lark = Lark(GRAMMAR, parser="lalr", transformer=BooleanTransformer())
+# Request options collapsing the matching polymer entities to one per UniProt accession
+GROUPING: dict[str, Any] = {
+    "results_verbosity": "compact",
+    "return_all_hits": True,
+    "group_by": {
+        "aggregation_method": "matching_uniprot_accession",
+        "ranking_criteria_type": {
+            "sort_by": "coverage"
+        },
+    },
+    "group_by_return_type": "representatives"
+}
 
 
 def parse(expression: str) -> Tree:
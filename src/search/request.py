@@ -1,12 +1,17 @@
 import json
 import urllib3
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from logging import Logger
-from typing import Any
+from typing import Any, Iterator
+
+from network import METRICS
 
 
 LOG: Logger = logging.getLogger(__name__)
 ENDPOINT: str = "https://search.rcsb.org/rcsbsearch/v2/query"
+ROWS: int = 1000  # Number of results (or groups) per page
+ATTEMPTS: int = 3  # Requests per page before pagination gives up
 
 
 def fetch(client: urllib3.PoolManager, query: dict[str, Any]) -> dict[str, Any]:
@@ -30,7 +35,11 @@ def fetch(client: urllib3.PoolManager, query: dict[str, Any]) -> dict[str, Any]:
 
         if response.status == 200:
             LOG.info("Search query successful.")
-            return json.loads(response.data.decode("utf8"))
+            with METRICS.stage("decode/search"):
+                return json.loads(response.data.decode("utf8"))
+        elif response.status == 204:
+            LOG.info("Search query returned no results.")
+            return {"result_set": [], "total_count": 0}
         else:
             LOG.error(f"Failed to query RCSB search API: {response.status}")
             LOG.error(response.data.decode("utf8"))
@@ -42,6 +51,56 @@ def fetch(client: urllib3.PoolManager, query: dict[str, Any]) -> dict[str, Any]:
         return dict()
 
 
+def pages(
+    client: urllib3.PoolManager, query: dict[str, Any], rows: int = ROWS
+) -> Iterator[dict[str, Any]]:
+    """
+    Searches the RCSB PDB database page by page, requesting the next page in the background
+    while the current one is processed.
+
+    Args:
+        client (urllib3.PoolManager): The HTTP client to use for making the requests.
+        query (dict[str, Any]): The search query, without "paginate" or "return_all_hits"
+            request options.
+        rows (int): Number of results per page (groups, if the query groups its results).
+
+    Yields:
+        dict[str, Any]: The search results of each page, in order.
+
+    Raises:
+        RuntimeError: If a page still fails after `ATTEMPTS` requests, so that a failed page
+            is never mistaken for the last one.
+    """
+
+    def request(start: int) -> Future:
+        options = query.get("request_options", {}) | {
+            "paginate": {"start": start, "rows": rows}
+        }
+        return executor.submit(fetch, client, query | {"request_options": options})
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        start = 0
+        following: Future | None = request(start)
+
+        while following is not None:
+            output = following.result()
+            for attempt in range(1, ATTEMPTS):
+                if "result_set" in output:
+                    break
+                LOG.warning(f"Search page {start // rows + 1} failed, retrying ({attempt})")
+                output = request(start).result()
+            if "result_set" not in output:
+                raise RuntimeError(f"Search page {start // rows + 1} failed")
+
+            results = output.get("result_set") or []
+            total = output.get("group_count", output.get("total_count", 0))
+            LOG.info(f"Search page {start // rows + 1}: {len(results)} results of {total}")
+
+            start += rows
+            following = request(start) if len(results) == rows and start < total else None
+            yield output
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     result = fetch(